@@ -0,0 +1,112 @@
+"""
+输入回调延迟基准（突发负载 + 并发分析）
+功能：
+1. 以突发方式连续调用 on_move，同时另一个线程高频执行 analyze_period
+2. 对比旧版"回调与分析共用一把锁"与当前"回调无锁投递到聚合线程"的回调延迟
+3. 报告回调延迟的 p50 / p99 / p99.9 / 最大值
+
+用法：python benchmarks/bench_callback_latency.py [突发次数]
+"""
+
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# 无显示环境下使用 pynput 的 dummy 后端
+os.environ.setdefault('PYNPUT_BACKEND', 'dummy')
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monitoring.mouse_monitor import MouseMonitor  # noqa: E402
+
+BURSTS = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+BURST_SIZE = 5000
+BURST_GAP = 0.005
+ANALYSIS_PERIOD = 0.02
+
+
+class LegacyLockedMouse:
+    """旧版结构：回调持锁追加 dict，分析时在锁内复制并重建事件列表"""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.last_position = None
+        self.last_move_time = None
+
+    def on_move(self, x, y):
+        current_time = datetime.now()
+        distance = speed = 0
+        if self.last_position and self.last_move_time:
+            distance = math.sqrt((x - self.last_position[0]) ** 2 + (y - self.last_position[1]) ** 2)
+            time_diff = (current_time - self.last_move_time).total_seconds()
+            if time_diff > 0:
+                speed = distance / time_diff
+        event = {'timestamp': current_time, 'event_type': 'move', 'x': x, 'y': y,
+                 'distance': distance, 'speed': speed}
+        with self.lock:
+            self.events.append(event)
+        self.last_position = (x, y)
+        self.last_move_time = current_time
+        return True
+
+    def analyze_period(self):
+        with self.lock:
+            events_copy = self.events.copy()
+            cutoff_time = datetime.now() - timedelta(seconds=5)
+            self.events = [e for e in self.events if e['timestamp'] >= cutoff_time]
+        sum(e['distance'] for e in events_copy)
+
+
+def run(target):
+    """返回每次回调的延迟列表（纳秒）"""
+    done = threading.Event()
+
+    def analyzer():
+        while not done.wait(ANALYSIS_PERIOD):
+            target.analyze_period()
+
+    thread = threading.Thread(target=analyzer, daemon=True)
+    thread.start()
+
+    latencies = []
+    on_move = target.on_move
+    clock = time.perf_counter_ns
+    for burst in range(BURSTS):
+        for i in range(BURST_SIZE):
+            t0 = clock()
+            on_move(i % 1920, burst % 1080)
+            latencies.append(clock() - t0)
+        time.sleep(BURST_GAP)
+
+    done.set()
+    thread.join()
+    return latencies
+
+
+def summarize(name, latencies):
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q))] / 1000
+
+    print(f"{name:>22} | {pct(0.5):>7.1f} | {pct(0.99):>7.1f} | {pct(0.999):>8.1f} | {latencies[-1] / 1000:>9.1f}")
+
+
+def main():
+    print(f"{BURSTS} 次突发 x {BURST_SIZE} 次 on_move，分析周期 {ANALYSIS_PERIOD * 1000:.0f} ms（单位：微秒）")
+    print(f"{'callbacks':>22} | {'p50':>7} | {'p99':>7} | {'p99.9':>8} | {'max':>9}")
+    summarize('legacy shared lock', run(LegacyLockedMouse()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        monitor = MouseMonitor(output_file=os.path.join(tmp, 'mouse_performance.csv'), keep_raw_events=True)
+        monitor.pipe.start()
+        summarize('SimpleQueue hand-off', run(monitor))
+        monitor.pipe.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+CSV 写入基准：逐行打开文件 vs 共享缓冲追加器
+功能：
+1. 旧版方式：每行先 os.path.exists，再打开文件、写一行、关闭（与原 KeyboardMonitor.save_analysis_result 相同）
+2. 新版方式：BufferedAppender 保持句柄打开，按行数批量刷新，分别测试 fsync=never / flush
+3. 报告每秒写入行数、open() 次数（审计钩子统计）和写系统调用次数（/proc/self/io 的 syscw）
+4. 校验两种方式生成的文件逐字节一致
+
+用法：python benchmarks/bench_csv_writer.py [行数]
+"""
+
+import csv
+import filecmp
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monitoring.csv_writer import BufferedAppender  # noqa: E402
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+HEADER = [
+    'start_time', 'end_time', 'duration_sec', 'total_keypresses',
+    'median_ikd', 'p95_ikd', 'mad', 'auto_correction_rate',
+    'space_rate', 'backspace_count', 'space_count'
+]
+
+_opens = [0]
+
+
+def _audit(event, args):
+    if event == 'open':
+        _opens[0] += 1
+
+
+sys.addaudithook(_audit)
+
+
+def write_syscalls():
+    """当前进程累计的写系统调用次数（不支持 /proc 时返回 None）"""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('syscw:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def make_row(i):
+    return ['2024-01-01 10:00:00', '2024-01-01 10:02:00', 120.0, 100 + i % 50,
+            0.1234, 0.2345, 0.0123, 0.05, 0.18, i % 7, i % 19]
+
+
+def legacy(path, rows):
+    for row in rows:
+        file_exists = os.path.exists(path)
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(HEADER)
+            writer.writerow(row)
+
+
+def buffered(path, rows, fsync):
+    appender = BufferedAppender(path, header=HEADER, fsync=fsync, flush_interval=60)
+    for row in rows:
+        appender.append(row)
+    appender.close()
+
+
+def measure(name, func, path, *args):
+    opens, syscw = _opens[0], write_syscalls()
+    start = time.perf_counter()
+    func(path, *args)
+    elapsed = time.perf_counter() - start
+    opens = _opens[0] - opens
+    syscw = write_syscalls() - syscw if syscw is not None else float('nan')
+    print(f"{name:>22} | {ROWS / elapsed:>12,.0f} | {opens:>7} | {syscw:>7}")
+
+
+def main():
+    rows = [make_row(i) for i in range(ROWS)]
+    print(f"{ROWS} 行 CSV 写入")
+    print(f"{'writer':>22} | {'rows/sec':>12} | {'open()':>7} | {'syscw':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.csv')
+        measure('open per row', legacy, legacy_path, rows)
+        for fsync in ('never', 'flush'):
+            path = os.path.join(tmp, f'buffered_{fsync}.csv')
+            measure(f'appender fsync={fsync}', buffered, path, rows, fsync)
+            assert filecmp.cmp(legacy_path, path, shallow=False), f"fsync={fsync} 输出与旧版不一致"
+
+    print("输出文件逐字节一致")
+
+
+if __name__ == '__main__':
+    main()
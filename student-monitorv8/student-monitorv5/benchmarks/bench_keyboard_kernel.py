@@ -0,0 +1,128 @@
+"""
+键盘窗口指标内核基准与一致性校验
+功能：
+1. 用随机生成的按键窗口对比 NumPy 内核与旧版 pandas 实现的输出（取整后必须完全一致）
+2. 报告两种实现在不同窗口大小下的耗时与加速比
+
+用法：python benchmarks/bench_keyboard_kernel.py
+"""
+
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monitoring.event_buffer import CodeTable, EVENT_KEY_DOWN, EVENT_KEY_RELEASE  # noqa: E402
+from monitoring.metrics import keyboard_metrics  # noqa: E402
+
+KEYS = list('abcdefghijklmnopqrstuvwxyz') + [' ', 'space', 'backspace', '\x08', 'shift', 'enter']
+SIZES = [200, 2_000, 20_000]
+PARITY_WINDOWS = 300
+ROUNDS = 50
+
+COLUMNS = ['total_keypresses', 'median_ikd', 'p95_ikd', 'mad', 'auto_correction_rate',
+           'space_rate', 'backspace_count', 'space_count']
+
+
+def generate_window(n, rng):
+    """生成 n 次按键的窗口：返回 (旧版事件字典列表, 列式数组, 编码表)"""
+    table = CodeTable()
+    events, kind, code, value = [], [], [], []
+    for _ in range(n):
+        key = rng.choice(KEYS)
+        held_ns = rng.randint(20, 400) * 10**6 + rng.randint(0, 999_999)
+        events.append({'event_type': 'key_down', 'key': key, 'duration': 0.0})
+        kind.append(EVENT_KEY_DOWN)
+        code.append(table.encode(key))
+        value.append(0)
+        if rng.random() < 0.97:  # 少量按键的释放事件丢失
+            events.append({'event_type': 'key_release', 'key': key, 'duration': round(held_ns / 1e9, 3)})
+            kind.append(EVENT_KEY_RELEASE)
+            code.append(table.encode(key))
+            value.append(held_ns)
+    arrays = (np.array(kind, dtype=np.uint8), np.array(code, dtype=np.int16), np.array(value, dtype=np.int64))
+    return events, arrays, table
+
+
+def pandas_metrics(events):
+    """旧版 analyze_period 中基于 pandas DataFrame 的计算"""
+    df = pd.DataFrame(events)
+    key_down_events = df[df['event_type'] == 'key_down']
+    key_release_events = df[df['event_type'] == 'key_release']
+    total_keypresses = len(key_down_events) if not key_down_events.empty else 0
+
+    durations = key_release_events['duration'].values if not key_release_events.empty else []
+    if len(durations) > 0:
+        median_ikd = np.median(durations)
+        p95_ikd = np.percentile(durations, 95)
+        mad = np.median(np.abs(durations - median_ikd))
+    else:
+        median_ikd = p95_ikd = mad = 0
+
+    backspace_count = 0
+    space_count = 0
+    if not key_down_events.empty:
+        backspace_count = len(key_down_events[(key_down_events['key'] == 'backspace') |
+                                              (key_down_events['key'] == '\x08')])
+        space_count = len(key_down_events[(key_down_events['key'] == ' ') |
+                                          (key_down_events['key'] == 'space')])
+
+    return {
+        'total_keypresses': total_keypresses,
+        'median_ikd': median_ikd,
+        'p95_ikd': p95_ikd,
+        'mad': mad,
+        'auto_correction_rate': backspace_count / total_keypresses if total_keypresses > 0 else 0,
+        'space_rate': space_count / total_keypresses if total_keypresses > 0 else 0,
+        'backspace_count': backspace_count,
+        'space_count': space_count
+    }
+
+
+def numpy_metrics(arrays, table):
+    kind, code, value = arrays
+    return keyboard_metrics(kind, code, value,
+                            table.lookup('backspace', '\x08'), table.lookup(' ', 'space'))
+
+
+def rounded(metrics):
+    return {name: round(float(metrics[name]), 4) for name in COLUMNS}
+
+
+def check_parity(rng):
+    for i in range(PARITY_WINDOWS):
+        events, arrays, table = generate_window(rng.randint(0, 500), rng)
+        if not events:
+            continue
+        expected = rounded(pandas_metrics(events))
+        actual = rounded(numpy_metrics(arrays, table))
+        assert expected == actual, f"窗口 {i} 结果不一致:\n  pandas: {expected}\n  numpy:  {actual}"
+    print(f"一致性校验通过：{PARITY_WINDOWS} 个随机窗口")
+
+
+def timeit(fn, *args):
+    t0 = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(*args)
+    return (time.perf_counter() - t0) / ROUNDS * 1000
+
+
+def main():
+    rng = random.Random(42)
+    check_parity(rng)
+
+    print(f"{'keypresses':>10} | {'pandas ms':>10} | {'numpy ms':>9} | {'speedup':>7}")
+    for size in SIZES:
+        events, arrays, table = generate_window(size, rng)
+        pandas_ms = timeit(pandas_metrics, events)
+        numpy_ms = timeit(numpy_metrics, arrays, table)
+        print(f"{size:>10} | {pandas_ms:>10.3f} | {numpy_ms:>9.3f} | {pandas_ms / numpy_ms:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
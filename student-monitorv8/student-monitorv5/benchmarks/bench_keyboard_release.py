@@ -0,0 +1,96 @@
+"""
+键盘释放事件处理延迟微基准
+功能：
+1. 预先向 KeyboardMonitor 填充 100 ~ 100k 条缓冲事件
+2. 测量释放事件在聚合线程中的处理延迟（中位数 / p99）：持有监控器锁调用 apply_event，
+   包含未释放按键表配对、写入缓冲区和更新按住时长草图（on_release 回调本身只投递元组）
+3. 与旧版"倒序扫描事件列表"的配对方式对比，验证延迟不随窗口大小增长
+
+用法：python benchmarks/bench_keyboard_release.py
+"""
+
+import os
+import sys
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+# 无显示环境下使用 pynput 的 dummy 后端
+os.environ.setdefault('PYNPUT_BACKEND', 'dummy')
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monitoring.keyboard_monitor import KeyboardMonitor  # noqa: E402
+from monitoring.event_buffer import EventBuffer, EVENT_KEY_DOWN, EVENT_KEY_RELEASE  # noqa: E402
+
+SIZES = [100, 1_000, 10_000, 100_000]
+ROUNDS = 2000
+
+
+def legacy_find_press(events, key_name):
+    """旧版配对方式：倒序扫描事件列表查找最近的按下事件"""
+    for event in reversed(events):
+        if event['event_type'] == 'key_down' and event['key'] == key_name:
+            return event
+    return None
+
+
+def fill_events(monitor, size):
+    """把事件缓冲区填满 size 条事件（容量即为 size，之后的写入覆盖最旧事件，缓冲量保持不变）"""
+    monitor.events = EventBuffer(size)
+    code = monitor.key_table.encode('x')
+    for i in range(size):
+        monitor.events.append(time.perf_counter_ns(), EVENT_KEY_DOWN if i % 2 == 0 else EVENT_KEY_RELEASE, code)
+
+
+def legacy_events(size):
+    """旧版的事件字典列表（不包含被测按键，模拟最坏情况的扫描长度）"""
+    now = datetime.now()
+    return [
+        {'timestamp': now, 'event_type': 'key_down' if i % 2 == 0 else 'key_release',
+         'key': 'x', 'duration': 0.0}
+        for i in range(size)
+    ]
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def bench_size(monitor, size):
+    """返回 (当前实现延迟, 旧版未命中扫描延迟)，单位纳秒"""
+    current, legacy = [], []
+    for _ in range(ROUNDS):
+        with monitor.lock:
+            monitor.apply_event((time.perf_counter_ns(), EVENT_KEY_DOWN, 'a'))
+
+        t0 = time.perf_counter_ns()
+        with monitor.lock:
+            monitor.apply_event((t0, EVENT_KEY_RELEASE, 'a'))
+        current.append(time.perf_counter_ns() - t0)
+    assert not monitor.pending_presses, "按下与释放未配对"
+
+    # 旧版在按下事件不在当前窗口时（如跨窗口按住的修饰键）会扫描整个列表
+    events = legacy_events(size)
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter_ns()
+        with monitor.lock:
+            legacy_find_press(events, 'shift')
+        legacy.append(time.perf_counter_ns() - t0)
+    return current, legacy
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        monitor = KeyboardMonitor(output_file=os.path.join(tmp, 'keyboard_performance.csv'))
+        print(f"{'buffered':>10} | {'release p50':>15} {'p99':>10} | {'legacy scan p50':>16} {'p99':>10}")
+        for size in SIZES:
+            fill_events(monitor, size)
+            current, legacy = bench_size(monitor, size)
+            print(f"{size:>10} | {statistics.median(current) / 1000:>12.2f} us {percentile(current, 0.99) / 1000:>7.2f} us"
+                  f" | {statistics.median(legacy) / 1000:>13.2f} us {percentile(legacy, 0.99) / 1000:>7.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+/api/monitoring_data 读取延迟基准（模拟长时间会话）
+功能：
+1. 鼠标分析文件逐行增长，每追加一行模拟一次学生端轮询（取最近10条）
+2. 对比旧版"每次完整解析 CSV 再取最后10条"与增量跟随读取（CSVFollower）
+3. 在不同会话长度下报告单次轮询延迟，并校验结果一致、截断后能正确重新读取
+
+用法：python benchmarks/bench_monitoring_data.py [最大行数]
+"""
+
+import csv
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from storage.backend import CSVStorage  # noqa: E402
+
+MAX_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 28800  # 8 小时，每秒一个窗口
+CHECKPOINTS = sorted({n for n in (100, 1000, 5000, 10000, 28800, MAX_ROWS) if n <= MAX_ROWS})
+SAMPLES = 20
+HEADER = [
+    'start_time', 'end_time', 'duration_sec',
+    'move_entropy', 'effective_path_ratio',
+    'avg_speed', 'acceleration_variance',
+    'total_distance', 'click_count', 'scroll_count'
+]
+
+
+def make_row(i):
+    return [f'2024-01-01 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}', '2024-01-01 10:02:00',
+            1.0, 2.3456, 0.8123, 512.34, 1234.5678, 5123.45, i % 9, i % 4]
+
+
+def format_rows(rows):
+    return [{
+        'time': row.get('start_time', ''),
+        'action': f"移动 (距离: {row.get('total_distance', 0)}px)",
+        'position': f"熵: {row.get('move_entropy', 0)}"
+    } for row in rows]
+
+
+def legacy_poll(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        data = format_rows(csv.DictReader(f))
+    return data[-10:]
+
+
+def follower_poll(storage):
+    return format_rows(storage.fetch_rows('bench', 'mouse', limit=10))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1e6, result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = CSVStorage(tmp)
+        path = storage.data_file('bench', 'mouse')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(HEADER)
+
+        print(f"每次追加一行后轮询一次（单位：微秒，取 {SAMPLES} 次中位数）")
+        print(f"{'rows':>8} | {'full parse':>12} | {'tail-follow':>12}")
+
+        written = 0
+        for checkpoint in CHECKPOINTS:
+            legacy_times, follower_times = [], []
+            while written < checkpoint:
+                with open(path, 'a', newline='', encoding='utf-8') as f:
+                    csv.writer(f).writerow(make_row(written))
+                written += 1
+
+                follower_us, follower_result = timed(follower_poll, storage)
+                if written > checkpoint - SAMPLES:
+                    legacy_us, legacy_result = timed(legacy_poll, path)
+                    assert legacy_result == follower_result, "增量读取结果与完整解析不一致"
+                    legacy_times.append(legacy_us)
+                    follower_times.append(follower_us)
+
+            print(f"{checkpoint:>8} | {statistics.median(legacy_times):>12.1f} | "
+                  f"{statistics.median(follower_times):>12.1f}")
+
+        # 截断后重新写入，增量读取应丢弃缓存重新解析
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerow(make_row(7))
+        assert follower_poll(storage) == legacy_poll(path), "截断后增量读取结果不一致"
+        print("结果一致，截断后重新读取正确")
+
+
+if __name__ == '__main__':
+    main()
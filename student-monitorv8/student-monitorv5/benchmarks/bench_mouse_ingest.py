@@ -0,0 +1,127 @@
+"""
+鼠标移动事件写入基准
+功能：
+1. 向 MouseMonitor.on_move 输入一百万次合成移动事件，每投递一批（聚合线程的批大小）
+   就在当前线程中 drain 事件通道，计时包含回调投递和聚合（apply_event：EventBuffer / MouseStats）
+2. 与旧版"每事件一个 dict + datetime"的列表存储对比，并对比仅使用在线统计（不保留原始事件）的情况
+3. 报告每事件耗时、每事件常驻内存、以及期间触发的垃圾回收次数：
+   旧版每个事件保留一个受 GC 跟踪的 dict，分配数不断超过第 0 代阈值而反复触发回收；
+   EventBuffer / MouseStats 只写入预分配的数组和标量，投递的元组处理后即释放，不应触发回收
+
+用法：python benchmarks/bench_mouse_ingest.py [事件数]
+"""
+
+import gc
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+# 无显示环境下使用 pynput 的 dummy 后端
+os.environ.setdefault('PYNPUT_BACKEND', 'dummy')
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monitoring.mouse_monitor import MouseMonitor  # noqa: E402
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+class LegacyMouseStore:
+    """旧版 on_move：每个事件保存一个包含 datetime 的 dict"""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.last_position = None
+        self.last_move_time = None
+
+    def on_move(self, x, y):
+        current_time = datetime.now()
+        distance = 0
+        speed = 0
+        if self.last_position and self.last_move_time:
+            dx = x - self.last_position[0]
+            dy = y - self.last_position[1]
+            distance = math.sqrt(dx**2 + dy**2)
+            time_diff = (current_time - self.last_move_time).total_seconds()
+            if time_diff > 0:
+                speed = distance / time_diff
+        event = {'timestamp': current_time, 'event_type': 'move', 'x': x, 'y': y,
+                 'distance': distance, 'speed': speed}
+        with self.lock:
+            self.events.append(event)
+        self.last_position = (x, y)
+        self.last_move_time = current_time
+        return True
+
+
+def feed(target, n):
+    """逐事件调用 on_move；监控器每投递一批事件就处理一次（与聚合线程相同的批处理路径）"""
+    on_move = target.on_move
+    pipe = getattr(target, 'pipe', None)
+    if pipe is None:
+        for i in range(n):
+            on_move(i % 1920, (i * 7) % 1080)
+        return
+    batch_size = pipe.batch_size
+    for start in range(0, n, batch_size):
+        for i in range(start, min(start + batch_size, n)):
+            on_move(i % 1920, (i * 7) % 1080)
+        pipe.drain()
+
+
+def measure(name, factory):
+    """返回 (名称, 每事件纳秒, 每事件常驻字节, GC次数)"""
+    collections = [0]
+
+    def on_gc(phase, info):
+        if phase == 'start':
+            collections[0] += 1
+
+    target = factory()
+    gc.callbacks.append(on_gc)
+    t0 = time.perf_counter_ns()
+    feed(target, EVENTS)
+    elapsed = time.perf_counter_ns() - t0
+    gc.callbacks.remove(on_gc)
+    del target
+    gc.collect()
+
+    # 单独测量内存（含预分配的缓冲区），避免 tracemalloc 的开销影响计时
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    target = factory()
+    feed(target, EVENTS)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del target
+    gc.collect()
+
+    return name, elapsed / EVENTS, (current - base) / EVENTS, collections[0]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'mouse_performance.csv')
+        rows = [
+            measure('legacy list[dict]', LegacyMouseStore),
+            measure('EventBuffer', lambda: MouseMonitor(output_file=output_file, buffer_capacity=EVENTS,
+                                                        keep_raw_events=True)),
+            measure('MouseStats only', lambda: MouseMonitor(output_file=output_file)),
+        ]
+
+    print(f"{EVENTS} 次 on_move")
+    print(f"{'store':>18} | {'ns/event':>9} | {'bytes/event':>11} | {'gc runs':>8}")
+    for name, ns, nbytes, collections in rows:
+        print(f"{name:>18} | {ns:>9.0f} | {nbytes:>11.1f} | {collections:>8}")
+    legacy_collections = rows[0][3]
+    for name, _, _, collections in rows[1:]:
+        assert collections < legacy_collections, f"{name}: 垃圾回收次数没有少于旧版"
+
+
+if __name__ == '__main__':
+    main()
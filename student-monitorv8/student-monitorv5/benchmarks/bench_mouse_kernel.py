@@ -0,0 +1,149 @@
+"""
+鼠标指标向量化内核基准与一致性校验
+功能：
+1. 生成 10k / 100k / 1M 条合成移动事件
+2. 对比旧版逐事件循环（dict + datetime）与 NumPy 单次遍历内核的结果与耗时
+   （旧版加速度用错位的时间间隔计算，加速度方差不参与对比，定义见 mouse_metrics）
+3. 校验在线累加器 MouseStats.result() 与 mouse_metrics 在同一组移动事件上的每个指标一致
+   （CSV 由 MouseStats 写入，mouse_metrics 是离线重算用的参考内核）
+
+用法：python benchmarks/bench_mouse_kernel.py
+"""
+
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monitoring.metrics import MouseStats, mouse_metrics  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000]
+LEGACY_COMPARED = ['move_entropy', 'effective_path_ratio', 'avg_speed', 'total_distance']
+
+
+def generate_moves(n, seed=0):
+    """生成带停顿、原地抖动和跳变的移动轨迹（时间戳为微秒精度，便于与 datetime 精确对应）"""
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(-6, 7, size=(n, 2))
+    steps[rng.random(n) < 0.1] = 0  # 原地不动的重复事件
+    xy = np.cumsum(steps, axis=0) + 1000
+    gaps_us = rng.integers(1, 3000, size=n)
+    gaps_us[rng.random(n) < 0.01] = 0  # 同一微秒内的多个事件
+    t_ns = np.cumsum(gaps_us) * 1000
+    return xy[:, 0].astype(np.int32), xy[:, 1].astype(np.int32), t_ns.astype(np.int64)
+
+
+def to_legacy_events(x, y, t_ns):
+    """转换为旧版 on_move 生成的事件字典"""
+    base = datetime(2025, 1, 1)
+    events = []
+    last = None
+    for xi, yi, ti in zip(x.tolist(), y.tolist(), t_ns.tolist()):
+        timestamp = base + timedelta(microseconds=ti // 1000)
+        distance = speed = 0
+        if last:
+            distance = math.sqrt((xi - last[0]) ** 2 + (yi - last[1]) ** 2)
+            time_diff = (timestamp - last[2]).total_seconds()
+            if time_diff > 0:
+                speed = distance / time_diff
+        events.append({'timestamp': timestamp, 'event_type': 'move', 'x': xi, 'y': yi,
+                       'distance': distance, 'speed': speed})
+        last = (xi, yi, timestamp)
+    return events
+
+
+def legacy_metrics(move_events):
+    """旧版 calculate_* 方法的逐事件循环实现"""
+    result = {'move_entropy': 0.0, 'effective_path_ratio': 0.0, 'avg_speed': 0.0,
+              'acceleration_variance': 0.0, 'total_distance': 0.0}
+    if len(move_events) < 2:
+        return result
+
+    angles = []
+    for i in range(1, len(move_events)):
+        dx = move_events[i]['x'] - move_events[i - 1]['x']
+        dy = move_events[i]['y'] - move_events[i - 1]['y']
+        if dx == 0 and dy == 0:
+            continue
+        angles.append(math.atan2(dy, dx))
+    if angles:
+        hist, _ = np.histogram(angles, bins=np.linspace(-np.pi, np.pi, 9))
+        probs = hist / hist.sum()
+        result['move_entropy'] = -np.sum([p * np.log2(p) for p in probs if p > 0])
+
+    total_distance = sum(event['distance'] for event in move_events[1:])
+    result['total_distance'] = total_distance
+    start, end = move_events[0], move_events[-1]
+    direct_distance = math.sqrt((end['x'] - start['x']) ** 2 + (end['y'] - start['y']) ** 2)
+    if total_distance != 0:
+        result['effective_path_ratio'] = direct_distance / total_distance
+
+    time_diff = (end['timestamp'] - start['timestamp']).total_seconds()
+    if time_diff != 0:
+        result['avg_speed'] = total_distance / time_diff
+
+    if len(move_events) >= 3:
+        speeds = [event['speed'] for event in move_events[1:] if event['speed'] > 0]
+        accelerations = []
+        for i in range(1, len(speeds)):
+            time_diff = (move_events[i + 1]['timestamp'] - move_events[i]['timestamp']).total_seconds()
+            if time_diff > 0:
+                accelerations.append((speeds[i] - speeds[i - 1]) / time_diff)
+        if accelerations:
+            result['acceleration_variance'] = np.var(accelerations)
+
+    return result
+
+
+def online_metrics(x, y, t_ns):
+    """逐事件送入在线累加器（与 MouseMonitor 聚合线程相同），返回窗口指标"""
+    stats = MouseStats()
+    for xi, yi, ti in zip(x.tolist(), y.tolist(), t_ns.tolist()):
+        stats.add_move(ti, xi, yi)
+    return stats.result()
+
+
+def check_online_parity(x, y, t_ns):
+    """MouseStats.result() 与 mouse_metrics 的每个指标一致（加速度方差为 Welford 与两遍算法，允许浮点误差）"""
+    expected = mouse_metrics(x, y, t_ns)
+    actual = online_metrics(x, y, t_ns)
+    for name in expected:
+        assert math.isclose(expected[name], actual[name], rel_tol=1e-9, abs_tol=1e-9), \
+            f"{name}: mouse_metrics={expected[name]!r} MouseStats={actual[name]!r}"
+
+
+def main():
+    # 在线累加器与参考内核：包含原地不动、同一时刻多个事件以及少于 3 个事件的边界情况
+    for size in (0, 1, 2, 3, 10, 1000, 100_000):
+        check_online_parity(*generate_moves(size, seed=size))
+    check_online_parity(np.array([5, 5, 5, 6]), np.array([5, 5, 5, 5]), np.array([0, 10, 10, 20]))
+    print("MouseStats.result() 与 mouse_metrics 全部指标一致\n")
+
+    print(f"{'moves':>9} | {'legacy ms':>10} | {'numpy ms':>9} | {'speedup':>7} | equivalent")
+    for size in SIZES:
+        x, y, t_ns = generate_moves(size)
+        events = to_legacy_events(x, y, t_ns)
+
+        t0 = time.perf_counter()
+        expected = legacy_metrics(events)
+        legacy_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        actual = mouse_metrics(x, y, t_ns)
+        numpy_ms = (time.perf_counter() - t0) * 1000
+
+        equivalent = all(math.isclose(expected[name], actual[name], rel_tol=1e-9, abs_tol=1e-9)
+                         for name in LEGACY_COMPARED)
+        print(f"{size:>9} | {legacy_ms:>10.1f} | {numpy_ms:>9.1f} | {legacy_ms / numpy_ms:>6.1f}x | {equivalent}")
+        if not equivalent:
+            for name in LEGACY_COMPARED:
+                print(f"    {name}: legacy={expected[name]!r} numpy={actual[name]!r}")
+
+
+if __name__ == '__main__':
+    main()
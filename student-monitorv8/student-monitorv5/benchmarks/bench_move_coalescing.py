@@ -0,0 +1,85 @@
+"""
+鼠标移动事件合并基准与一致性校验
+功能：
+1. 用 loadgen 生成 125 / 500 / 1000 Hz 回报率的鼠标负载，分别以不合并和合并（量子 8 ms, 2 像素）累加
+2. 校验合并后全部窗口指标（路径长度、方向直方图/移动熵、有效路径比、平均速度、加速度方差、点击/滚动次数）
+   与不合并时完全相等，合并只减少保留的采样点
+3. 报告合并比例、每秒采样点数（应随有效移动而不是回报率变化）、每事件累加耗时，
+   以及 MouseMonitor 保留原始事件时缓冲区中的移动事件数
+
+用法：python benchmarks/bench_move_coalescing.py [负载秒数]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import loadgen  # noqa: E402
+from monitoring.event_buffer import EVENT_MOVE  # noqa: E402
+from monitoring.metrics import MouseStats  # noqa: E402
+from monitoring.mouse_monitor import MouseMonitor  # noqa: E402
+
+SECONDS = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+RATES = [125, 500, 1000]
+QUANTUM = (8, 2)
+EXACT = ['total_distance', 'move_entropy', 'effective_path_ratio', 'avg_speed', 'acceleration_variance',
+         'click_count', 'scroll_count']
+
+
+def accumulate(events, move_quantum):
+    """返回 (MouseStats, 每事件耗时纳秒)"""
+    stats = MouseStats(move_quantum)
+    add_move, add_click, add_scroll = stats.add_move, stats.add_click, stats.add_scroll
+    start = time.perf_counter_ns()
+    for t, callback, args in events:
+        if callback == 'on_move':
+            add_move(t, *args)
+        elif callback == 'on_click':
+            add_click(t, args[3])
+        else:
+            add_scroll(t)
+    return stats, (time.perf_counter_ns() - start) / len(events)
+
+
+def buffered_moves(tmp, events, move_quantum):
+    """通过 MouseMonitor 的聚合路径处理事件，返回原始事件缓冲中的移动事件数"""
+    monitor = MouseMonitor(output_file=os.path.join(tmp, 'mouse_performance.csv'), keep_raw_events=True,
+                           buffer_capacity=len(events), move_quantum=move_quantum)
+    for t, callback, args in events:
+        if callback == 'on_move':
+            monitor.apply_event((t, EVENT_MOVE) + args)
+    return int((monitor.events.snapshot_and_swap().kind == EVENT_MOVE).sum())
+
+
+def main():
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    print(f"{SECONDS} 秒负载，合并量子 {QUANTUM[0]} ms / {QUANTUM[1]} 像素")
+    print(f"{'rate':>6} | {'moves':>7} | {'samples':>7} | {'reduction':>9} | {'samples/s':>9} | "
+          f"{'ns/event raw':>12} | {'ns/event coalesced':>18} | {'buffered moves':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rate in RATES:
+            events = loadgen.mouse_events(SECONDS, rate_hz=rate, seed=1)
+            raw, raw_ns = accumulate(events, None)
+            coalesced, coalesced_ns = accumulate(events, QUANTUM)
+
+            expected, actual = raw.result(), coalesced.result()
+            for name in EXACT:
+                assert actual[name] == expected[name], f"{rate} Hz: {name} 合并后不一致"
+            assert coalesced.direction_hist == raw.direction_hist, f"{rate} Hz: 方向直方图合并后不一致"
+
+            buffered = buffered_moves(tmp, events, QUANTUM)
+            assert buffered == coalesced.sample_count
+            print(f"{rate:>6} | {raw.move_count:>7} | {coalesced.sample_count:>7} | "
+                  f"{coalesced.reduction_ratio:>8.1%} | {coalesced.sample_count / SECONDS:>9.1f} | "
+                  f"{raw_ns:>12.0f} | {coalesced_ns:>18.0f} | {buffered:>14}")
+
+    print("全部窗口指标与不合并时完全一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+原始事件二进制记录基准
+功能：
+1. 一致性：回放生成的键盘/鼠标会话并开启原始事件记录，用内存映射读取分段文件，
+   按窗口边界切片重算指标，校验与监控器写入 CSV 的窗口结果一致
+   （鼠标校验 CSV 的全部字段，浮点指标按 CSV 的保留位数留出舍入误差；
+   开启移动事件合并时原始事件记录仍逐事件保存，重算结果同样一致）
+2. 写入：每条事件的追加耗时、每条记录的字节数
+3. 读取：内存映射打开全部分段并在整个会话上向量化计算指标的耗时
+
+用法：python benchmarks/bench_raw_events.py [写入/读取测试事件数]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monitoring.event_buffer import ClockAnchor, EVENT_CLICK, EVENT_MOVE, EVENT_SCROLL  # noqa: E402
+from monitoring.metrics import keyboard_metrics, mouse_metrics  # noqa: E402
+from monitoring.raw_events import (  # noqa: E402
+    FLAG_PRESSED, RECORD_SIZE, RawEventRecorder, RawSession, list_sessions
+)
+from monitoring.replay import replay_file  # noqa: E402
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+SESSION_EVENTS = 60000
+WINDOW_EVENTS = 6000
+# 鼠标 CSV 的浮点字段 -> 保留的小数位数（见 MouseMonitor.analyze_period）
+MOUSE_ROUNDED = {
+    'move_entropy': 4,
+    'effective_path_ratio': 4,
+    'avg_speed': 2,
+    'acceleration_variance': 4,
+    'total_distance': 2,
+    'duration_sec': 2,
+}
+
+
+def write_recording(path, device, events, seed=5):
+    """生成录制文件（格式见 monitoring.input_source），返回各窗口边界的时间戳"""
+    rng = random.Random(seed)
+    t = 10 ** 12
+    x = y = 500
+    marks = []
+    lines = [{'device': device, 'version': 1},
+             {'t': t, 'anchor': datetime(2024, 3, 1, 9, 0, 0).isoformat()}]
+    for i in range(events):
+        t += rng.randint(2_000_000, 40_000_000)
+        if device == 'keyboard':
+            key = {'char': rng.choice('abcdefg ')} if rng.random() < 0.9 else {'name': 'Key.backspace'}
+            lines.append({'t': t, 'e': 'on_press', 'a': [key]})
+            if rng.random() < 0.1:  # 按住不放时的自动重复
+                t += 30_000_000
+                lines.append({'t': t, 'e': 'on_press', 'a': [key]})
+            t += rng.randint(50_000_000, 150_000_000)
+            lines.append({'t': t, 'e': 'on_release', 'a': [key]})
+        else:
+            x += rng.randint(-8, 8)
+            y += rng.randint(-8, 8)
+            lines.append({'t': t, 'e': 'on_move', 'a': [x, y]})
+            if rng.random() < 0.02:
+                lines.append({'t': t, 'e': 'on_click', 'a': [x, y, {'name': 'Button.left'}, rng.random() < 0.5]})
+            if rng.random() < 0.005:
+                for _ in range(rng.randint(1, 5)):
+                    lines.append({'t': t, 'e': 'on_scroll', 'a': [x, y, 0, rng.choice((-1, 1))]})
+        if (i + 1) % WINDOW_EVENTS == 0:
+            lines.append({'t': t, 'm': 'window'})
+            marks.append(t)
+    lines.append({'t': t, 'm': 'stop'})
+    marks.append(t)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(line) + '\n' for line in lines)
+    return marks
+
+
+def check_parity(tmp, device, move_quantum=None):
+    """
+    :param move_quantum: 鼠标移动事件合并量子（见 MouseMonitor），None 表示键盘；(0, 0) 表示不合并
+    """
+    label = device if move_quantum is None else f"{device} {move_quantum[0]}ms/{move_quantum[1]}px"
+    name = label.replace(' ', '_').replace('/', '_')
+    recording = os.path.join(tmp, f'{device}.jsonl')
+    marks = write_recording(recording, device, SESSION_EVENTS)
+    raw_dir = os.path.join(tmp, f'raw_{name}')
+    options = {} if move_quantum is None else {'move_quantum': move_quantum}
+    monitor = replay_file(recording, os.path.join(tmp, f'{name}.csv'), raw_dir=raw_dir, **options)
+    session, = list_sessions(raw_dir, device)
+    if move_quantum and any(move_quantum):
+        assert monitor.move_reduction_ratio > 0, f"{label}: 没有移动事件被合并"
+
+    start = None
+    for result, end in zip(monitor.analysis_results, marks):
+        batch = session.events(start, end + 1)  # 窗口包含边界时刻的事件
+        start = end + 1
+        if device == 'keyboard':
+            metrics = keyboard_metrics(batch.kind, batch.code, batch.value,
+                                       session.lookup('backspace', '\x08'), session.lookup(' ', 'space'))
+            for name in ('total_keypresses', 'backspace_count', 'space_count'):
+                assert metrics[name] == result[name], f"{label}: {name} 不一致"
+            for name in ('median_ikd', 'p95_ikd', 'mad'):
+                assert round(metrics[name], 4) == result[name], f"{label}: {name} 不一致"
+        else:
+            moves = batch.select(EVENT_MOVE)
+            metrics = mouse_metrics(moves.x, moves.y, moves.t_ns)
+            metrics['duration_sec'] = (int(batch.t_ns[-1]) - int(batch.t_ns[0])) / 1e9
+            for name, digits in MOUSE_ROUNDED.items():
+                # CSV 值已舍入；加速度方差数值很大，另留出在线与两遍算法的相对误差
+                assert np.isclose(metrics[name], result[name], rtol=1e-9, atol=0.5 * 10 ** -digits + 1e-9), \
+                    f"{label}: {name} 不一致（重算 {metrics[name]!r}，CSV {result[name]!r}）"
+            clicks = batch.select(EVENT_CLICK)
+            assert int(np.count_nonzero(clicks.flags & FLAG_PRESSED)) == result['click_count'], \
+                f"{label}: click_count 不一致"
+            assert len(batch.select(EVENT_SCROLL)) == result['scroll_count'], f"{label}: scroll_count 不一致"
+            assert session.to_datetime(batch.t_ns[-1]).strftime('%Y-%m-%d %H:%M:%S') == result['end_time']
+        assert session.to_datetime(batch.t_ns[0]).strftime('%Y-%m-%d %H:%M:%S') == result['start_time']
+
+    print(f"{label:>16} | {len(session):>7} 条记录 | {len(monitor.analysis_results):>3} 窗口 | 按窗口重算与 CSV 一致")
+
+
+def measure_io(tmp):
+    rng = np.random.default_rng(3)
+    t_ns = 10 ** 12 + np.cumsum(rng.integers(2_000_000, 20_000_000, EVENTS))
+    x = np.cumsum(rng.integers(-8, 9, EVENTS)) + 500
+    y = np.cumsum(rng.integers(-8, 9, EVENTS)) + 500
+    items = list(zip(t_ns.tolist(), x.tolist(), y.tolist()))
+
+    directory = os.path.join(tmp, 'io')
+    recorder = RawEventRecorder(directory, 'mouse', ClockAnchor(), segment_records=1 << 20)
+    append = recorder.append
+    start = time.perf_counter()
+    for t, px, py in items:
+        append(t, EVENT_MOVE, x=px, y=py)
+    recorder.close()
+    write_seconds = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+    start = time.perf_counter()
+    session = RawSession(directory)
+    scanned = [mouse_metrics(batch.x, batch.y, batch.t_ns) for batch in session.batches()]
+    scan_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    whole = session.events()
+    metrics = mouse_metrics(whole.x, whole.y, whole.t_ns)
+    whole_seconds = time.perf_counter() - start
+    expected = mouse_metrics(x, y, t_ns)
+    assert all(np.isclose(metrics[name], expected[name]) for name in expected), "内存映射读取的指标与原始数组不一致"
+
+    print(f"写入: {EVENTS} 事件 | {write_seconds / EVENTS * 1e9:.0f} ns/事件 | "
+          f"{size / 1e6:.1f} MB（{RECORD_SIZE} 字节/条） | {len(session.segment_paths)} 个分段")
+    print(f"读取: 逐分段扫描 {len(scanned)} 段 {scan_seconds * 1000:.1f} ms | "
+          f"整个会话 {whole_seconds * 1000:.1f} ms | {EVENTS / whole_seconds / 1e6:.1f} M 事件/秒")
+
+
+def main():
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("一致性：原始事件按窗口重算 vs 监控器 CSV")
+        check_parity(tmp, 'keyboard')
+        check_parity(tmp, 'mouse', (0, 0))
+        check_parity(tmp, 'mouse', (8, 2))
+
+        print(f"\n写入与内存映射读取（{EVENTS} 条鼠标移动）")
+        measure_io(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+回放引擎一致性与吞吐基准
+功能：
+1. 一致性：用合成的实时输入（真实时钟、共享调度器按窗口触发分析）运行键盘/鼠标监控器并录制，
+   再全速回放和实时回放录制文件，校验三份 CSV 逐字节一致
+2. 吞吐：生成长时间会话的录制文件，全速回放，报告每秒处理的事件数和每个窗口的分析耗时
+
+用法：python benchmarks/bench_replay.py [吞吐测试事件数]
+"""
+
+import filecmp
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monitoring.event_buffer import SYSTEM_CLOCK  # noqa: E402
+from monitoring.input_source import RecordingInput  # noqa: E402
+from monitoring.keyboard_monitor import KeyboardMonitor  # noqa: E402
+from monitoring.mouse_monitor import MouseMonitor  # noqa: E402
+from monitoring.replay import ReplayInput, replay_file  # noqa: E402
+from monitoring.scheduler import get_scheduler  # noqa: E402
+
+THROUGHPUT_EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+LIVE_SECONDS = 1.5
+LIVE_INTERVAL = 0.25
+
+
+class FakeKey:
+    """模拟 pynput 的按键/按钮对象"""
+
+    def __init__(self, char=None, name=None):
+        self.char = char
+        self.name = name
+
+    def __str__(self):
+        return self.name if self.char is None else self.char
+
+
+KEYS = [FakeKey(c) for c in 'abcdefghij '] + [FakeKey(name='Key.backspace'), FakeKey(name='Key.space')]
+BUTTON = FakeKey(name='Button.left')
+
+
+class SyntheticListener(threading.Thread):
+    """按真实时间不断产生随机输入事件的监听线程"""
+
+    def __init__(self, device, callbacks, seed=7):
+        super().__init__(daemon=True)
+        self.device = device
+        self.callbacks = callbacks
+        self.rng = random.Random(seed)
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        x = y = 500
+        while self.running:
+            if self.device == 'keyboard':
+                key = self.rng.choice(KEYS)
+                self.callbacks['on_press'](key)
+                self.callbacks['on_release'](key)
+            else:
+                x += self.rng.randint(-8, 8)
+                y += self.rng.randint(-8, 8)
+                self.callbacks['on_move'](x, y)
+                if self.rng.random() < 0.02:
+                    self.callbacks['on_click'](x, y, BUTTON, True)
+                    self.callbacks['on_click'](x, y, BUTTON, False)
+                if self.rng.random() < 0.01:
+                    self.callbacks['on_scroll'](x, y, 0, -1)
+            time.sleep(0.0005)
+
+
+class SyntheticInput:
+    """与 LiveInput 接口相同的合成实时输入（真实时钟 + 共享调度器）"""
+
+    clock = SYSTEM_CLOCK
+    esc_key = FakeKey(name='Key.esc')
+
+    def __init__(self, device):
+        self.device = device
+
+    def listener(self, **callbacks):
+        return SyntheticListener(self.device, callbacks)
+
+    def call_every(self, interval, callback, name=None):
+        return get_scheduler().call_every(interval, callback, name=name)
+
+    def close(self):
+        pass
+
+
+def check_parity(tmp, device, monitor_cls):
+    recording = os.path.join(tmp, f'{device}.jsonl')
+    live_csv = os.path.join(tmp, f'live_{device}.csv')
+    monitor = monitor_cls(analysis_interval=LIVE_INTERVAL, output_file=live_csv,
+                          input_source=RecordingInput(SyntheticInput(device), recording))
+    monitor.start_listener()
+    time.sleep(LIVE_SECONDS)
+    monitor.stop_listener()
+
+    fast_csv = os.path.join(tmp, f'fast_{device}.csv')
+    realtime_csv = os.path.join(tmp, f'realtime_{device}.csv')
+    start = time.perf_counter()
+    replay_file(recording, fast_csv)
+    fast_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    replay_file(recording, realtime_csv, realtime=True)
+    realtime_seconds = time.perf_counter() - start
+
+    with open(recording, encoding='utf-8') as f:
+        events = sum(1 for line in f if '"e":' in line)
+    windows = len(monitor.analysis_results)
+    assert windows >= 2, "实时运行产生的窗口过少"
+    assert filecmp.cmp(live_csv, fast_csv, shallow=False), f"{device}: 全速回放结果与实时运行不一致"
+    assert filecmp.cmp(live_csv, realtime_csv, shallow=False), f"{device}: 实时回放结果与实时运行不一致"
+    print(f"{device:>8} | {events:>7} 事件 | {windows:>3} 窗口 | 实时运行 {LIVE_SECONDS:.2f}s | "
+          f"全速回放 {fast_seconds:.3f}s | 实时回放 {realtime_seconds:.2f}s | CSV 一致")
+
+
+def write_recording(path, device, events, window_events=2000, seed=11):
+    """生成长时间会话的录制文件：每秒 100 个事件，每 window_events 个事件一个窗口边界"""
+    rng = random.Random(seed)
+    wall = datetime(2024, 1, 1, 9, 0, 0)
+    t = 10 ** 12
+    x = y = 500
+
+    def anchor():
+        return {'t': t, 'anchor': (wall + timedelta(microseconds=(t - 10 ** 12) // 1000)).isoformat()}
+
+    with open(path, 'w', encoding='utf-8') as f:
+        lines = [{'device': device, 'version': 1}, anchor()]
+        for i in range(events):
+            t += 10_000_000
+            if device == 'keyboard':
+                key = rng.choice('abcdefghij ')
+                lines.append({'t': t, 'e': 'on_press' if i % 2 == 0 else 'on_release', 'a': [{'char': key}]})
+            else:
+                x += rng.randint(-8, 8)
+                y += rng.randint(-8, 8)
+                lines.append({'t': t, 'e': 'on_move', 'a': [x, y]})
+            if (i + 1) % window_events == 0:
+                lines.append({'t': t, 'm': 'window'})
+                lines.append(anchor())
+            if len(lines) >= 10000:
+                f.writelines(json.dumps(line) + '\n' for line in lines)
+                lines = []
+        lines.append({'t': t, 'm': 'stop'})
+        lines.append(anchor())
+        f.writelines(json.dumps(line) + '\n' for line in lines)
+
+
+def measure_throughput(tmp, device):
+    recording = os.path.join(tmp, f'long_{device}.jsonl')
+    write_recording(recording, device, THROUGHPUT_EVENTS)
+    source = ReplayInput(recording)  # 解析录制文件不计入回放耗时
+    from monitoring.replay import create_monitor
+
+    monitor = create_monitor(source, os.path.join(tmp, f'long_{device}.csv'))
+    analyze = monitor.analyze_period
+    analyze_times = []
+
+    def timed_analyze(*args):
+        start = time.perf_counter()
+        analyze(*args)
+        analyze_times.append(time.perf_counter() - start)
+
+    monitor.analyze_period = timed_analyze
+    start = time.perf_counter()
+    source.run(monitor)
+    elapsed = time.perf_counter() - start
+    print(f"{device:>8} | {THROUGHPUT_EVENTS:>8} 事件 | {len(monitor.analysis_results):>4} 窗口 | "
+          f"{THROUGHPUT_EVENTS / elapsed:>10.0f} 事件/秒 | 每窗口分析 {sum(analyze_times) / len(analyze_times) * 1000:.2f} ms")
+
+
+def main():
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("一致性：实时运行（录制） vs 回放")
+        check_parity(tmp, 'keyboard', KeyboardMonitor)
+        check_parity(tmp, 'mouse', MouseMonitor)
+
+        print("\n吞吐：全速回放")
+        measure_throughput(tmp, 'keyboard')
+        measure_throughput(tmp, 'mouse')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+冷启动导入耗时基准（基于 python -X importtime）
+功能：
+1. 在全新子进程中导入 Web 应用，报告 import app 的累计导入耗时和进程总耗时
+2. 校验导入 Web 应用不会加载 numpy / pynput / tkinter
+3. 报告第一次启动监控时按需导入的开销（监控器模块、pynput 输入后端）以及情绪监控器模块是否仍会加载 tkinter
+4. 列出导入耗时最多的模块，便于跟踪启动时间的变化
+
+用法：python benchmarks/bench_startup.py [重复次数]
+（无显示环境下可设置 PYNPUT_BACKEND=dummy）
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+HEAVY_MODULES = ('numpy', 'pynput', 'tkinter')
+TOP = 10
+
+
+def importtime(code):
+    """
+    在新进程中执行 code
+    :return: (进程耗时秒, {模块: (自身微秒, 累计微秒)}, 已加载的重量级模块)
+    """
+    probe = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe],
+                          cwd=SRC_DIR, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    loaded = [m for m in proc.stdout.strip().splitlines()[-1].split(',') if m] if proc.stdout.strip() else []
+    return elapsed, modules, loaded
+
+
+def cumulative_ms(modules, *names):
+    return sum(modules.get(name, (0, 0))[1] for name in names) / 1000
+
+
+def main():
+    print(f"冷启动：import app（{RUNS} 次取中位数）")
+    walls, imports = [], []
+    for _ in range(RUNS):
+        elapsed, modules, loaded = importtime("import app")
+        assert not loaded, f"导入 Web 应用时加载了 {loaded}"
+        walls.append(elapsed * 1000)
+        imports.append(cumulative_ms(modules, 'app'))
+    print(f"- 进程总耗时: {statistics.median(walls):.1f} ms")
+    print(f"- import app 累计导入耗时: {statistics.median(imports):.1f} ms")
+    print(f"- 未加载: {', '.join(HEAVY_MODULES)}")
+
+    print(f"\n导入耗时最多的 {TOP} 个模块（累计，微秒）")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][1])[:TOP]:
+        print(f"{cumulative_us:>10} | {self_us:>8} | {name}")
+
+    print("\n第一次启动监控时的按需导入（已导入 app 之后）")
+    # 与 registry.monitor_class 导入的模块相同；-X importtime 不记录 importlib.import_module 的顶层模块，这里用 import 语句
+    first_start = "import app\nimport monitoring.keyboard_monitor\nimport monitoring.mouse_monitor"
+    _, modules, loaded = importtime(first_start)
+    print(f"- 键盘/鼠标监控器模块: "
+          f"{cumulative_ms(modules, 'monitoring.keyboard_monitor', 'monitoring.mouse_monitor'):.1f} ms（已加载: {loaded}）")
+
+    try:
+        _, modules, _ = importtime(first_start + "\nimport pynput.keyboard\nimport pynput.mouse")
+        print(f"- pynput 输入后端（start_listener 时导入）: {cumulative_ms(modules, 'pynput'):.1f} ms")
+    except RuntimeError as e:
+        print(f"- pynput 输入后端不可用（可设置 PYNPUT_BACKEND=dummy）: {str(e).strip().splitlines()[-1]}")
+
+    _, modules, loaded = importtime("import monitoring.emotion_monitor")
+    assert 'tkinter' not in loaded, "导入情绪监控器模块时加载了 tkinter"
+    print(f"- 情绪监控器模块: {cumulative_ms(modules, 'monitoring.emotion_monitor'):.1f} ms（tkinter 未加载）")
+
+
+if __name__ == '__main__':
+    main()
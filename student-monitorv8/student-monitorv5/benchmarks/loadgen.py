@@ -0,0 +1,184 @@
+"""
+合成键鼠输入负载生成器
+功能：
+1. 键盘：按单词突发的打字（词内快、词间和句间停顿）、连续退格（退格风暴）、按住不放的自动重复
+2. 鼠标：1000 Hz 电竞鼠标的高频移动（大量亚像素抖动和零位移事件）、快速甩动、滚轮连续滚动、点击
+3. 事件流为按时间排序的 (时间戳纳秒, 回调名, 参数元组)，时间从 0 开始，
+   回调名与监控器回调（on_press / on_release / on_move / on_click / on_scroll）一致
+
+用法：被 benchmarks/run_suite.py 导入；也可单独运行查看各场景的事件数与速率
+    python benchmarks/loadgen.py
+"""
+
+import math
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monitoring.replay import ReplayKey  # noqa: E402
+
+MS = 1_000_000
+SECOND = 1_000_000_000
+
+LETTERS = 'etaoinshrdlucmfwypvbgkjqxz'
+BACKSPACE = ReplayKey(name='Key.backspace')
+SPACE = ReplayKey(name='Key.space')
+ENTER = ReplayKey(name='Key.enter')
+LEFT = ReplayKey(name='Button.left')
+RIGHT = ReplayKey(name='Button.right')
+_CHAR_KEYS = {}
+
+
+def char_key(char):
+    """同一字符返回同一按键对象（与 pynput 的 KeyCode 一样可用 == 比较）"""
+    key = _CHAR_KEYS.get(char)
+    if key is None:
+        key = _CHAR_KEYS[char] = ReplayKey(char=char)
+    return key
+
+
+class KeyboardLoad:
+    """键盘事件流构造器"""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.t = 0
+        self.events = []
+
+    def tap(self, key, hold_ms=None, gap_ms=None):
+        """按下并释放一次按键，随后等待 gap_ms"""
+        rng = self.rng
+        hold = hold_ms if hold_ms is not None else rng.lognormvariate(math.log(85), 0.3)
+        gap = gap_ms if gap_ms is not None else rng.lognormvariate(math.log(110), 0.45)
+        self.events.append((self.t, 'on_press', (key,)))
+        self.t += int(hold * MS)
+        self.events.append((self.t, 'on_release', (key,)))
+        self.t += int(gap * MS)
+
+    def word(self):
+        """一个单词的突发输入：词内按键间隔短，词尾空格"""
+        rng = self.rng
+        for _ in range(rng.randint(2, 9)):
+            self.tap(char_key(rng.choice(LETTERS)), gap_ms=rng.lognormvariate(math.log(60), 0.5))
+        self.tap(SPACE)
+
+    def backspace_storm(self):
+        """连续删除：退格键快速连按 3~25 次"""
+        rng = self.rng
+        for _ in range(rng.randint(3, 25)):
+            self.tap(BACKSPACE, hold_ms=rng.uniform(40, 70), gap_ms=rng.uniform(25, 60))
+
+    def auto_repeat(self, key=None):
+        """按住不放：系统在 500 ms 延迟后以约 30 Hz 重复触发按下事件，最后一次释放"""
+        rng = self.rng
+        key = key or rng.choice((BACKSPACE, char_key(rng.choice(LETTERS))))
+        self.events.append((self.t, 'on_press', (key,)))
+        self.t += 500 * MS
+        for _ in range(rng.randint(10, 90)):
+            self.events.append((self.t, 'on_press', (key,)))
+            self.t += 33 * MS
+        self.events.append((self.t, 'on_release', (key,)))
+        self.t += int(rng.uniform(150, 400) * MS)
+
+    def pause(self, low_s, high_s):
+        self.t += int(self.rng.uniform(low_s, high_s) * SECOND)
+
+
+def typing_events(seconds, seed=0, backspace_weight=0.08, repeat_weight=0.02):
+    """
+    连续编程输入：按单词突发，夹杂退格风暴、自动重复和思考停顿
+    :param seconds: 负载时长（秒）
+    :param backspace_weight: 每个单词后出现退格风暴的概率
+    :param repeat_weight: 每个单词后出现按住不放的概率
+    """
+    load = KeyboardLoad(seed)
+    rng = load.rng
+    end = seconds * SECOND
+    while load.t < end:
+        load.word()
+        r = rng.random()
+        if r < backspace_weight:
+            load.backspace_storm()
+        elif r < backspace_weight + repeat_weight:
+            load.auto_repeat()
+        if rng.random() < 0.08:  # 行尾
+            load.tap(ENTER)
+            load.pause(0.5, 4)
+        if rng.random() < 0.01:  # 长时间思考
+            load.pause(10, 40)
+    return [event for event in load.events if event[0] < end]
+
+
+def mouse_events(seconds, rate_hz=1000, seed=0, scroll_weight=0.002, click_weight=0.0005):
+    """
+    高回报率鼠标：每 1/rate_hz 秒一个移动事件
+    手静止时传感器抖动产生大量零位移和 1 像素来回的事件，移动时以甩动（快速加减速）为主
+    :param seconds: 负载时长（秒）
+    :param rate_hz: 回报率（每秒移动事件数）
+    :param scroll_weight: 每个采样周期开始一段连续滚动的概率
+    :param click_weight: 每个采样周期发生一次点击的概率
+    """
+    rng = random.Random(seed)
+    period = SECOND // rate_hz
+    x, y = 960.0, 540.0
+    vx = vy = 0.0
+    target = None
+    events = []
+    t = 0
+    end = seconds * SECOND
+    while t < end:
+        if target is None and rng.random() < 2.0 / rate_hz:  # 平均每 0.5 秒开始一次甩动
+            target = (rng.uniform(0, 1919), rng.uniform(0, 1079))
+        if target is not None:
+            dx, dy = target[0] - x, target[1] - y
+            distance = math.hypot(dx, dy)
+            if distance < 2:
+                target = None
+                vx = vy = 0.0
+            else:
+                speed = min(distance * 0.02, 40.0)  # 像素/采样周期，接近目标时减速
+                vx, vy = dx / distance * speed, dy / distance * speed
+        else:
+            vx = vy = 0.0
+        # 传感器抖动：静止时约一半的事件有 ±1 像素的来回
+        jx = rng.choice((-1, 0, 0, 1)) if rng.random() < 0.5 else 0
+        jy = rng.choice((-1, 0, 0, 1)) if rng.random() < 0.5 else 0
+        x = min(max(x + vx, 0), 1919)
+        y = min(max(y + vy, 0), 1079)
+        px, py = int(x) + jx, int(y) + jy
+        events.append((t, 'on_move', (px, py)))
+
+        if rng.random() < click_weight:
+            button = LEFT if rng.random() < 0.9 else RIGHT
+            events.append((t, 'on_click', (px, py, button, True)))
+            events.append((t + 90 * MS, 'on_click', (px, py, button, False)))
+        if rng.random() < scroll_weight:
+            for i in range(rng.randint(3, 30)):
+                events.append((t + i * 16 * MS, 'on_scroll', (px, py, 0, rng.choice((-1, 1)))))
+        t += period
+    events.sort(key=lambda event: event[0])
+    return [event for event in events if event[0] < end]
+
+
+# 场景名 -> (设备, 事件流生成函数(秒数, 随机种子))
+SCENARIOS = {
+    'typing': ('keyboard', lambda seconds, seed: typing_events(seconds, seed)),
+    'backspace_storm': ('keyboard', lambda seconds, seed: typing_events(seconds, seed, backspace_weight=0.6)),
+    'auto_repeat': ('keyboard', lambda seconds, seed: typing_events(seconds, seed, repeat_weight=0.5)),
+    'mouse_1000hz': ('mouse', lambda seconds, seed: mouse_events(seconds, 1000, seed)),
+    'mouse_scroll': ('mouse', lambda seconds, seed: mouse_events(seconds, 500, seed, scroll_weight=0.02)),
+}
+
+
+def generate(scenario, seconds, seed=0):
+    """返回 (设备, 事件流)"""
+    device, factory = SCENARIOS[scenario]
+    return device, factory(seconds, seed)
+
+
+if __name__ == '__main__':
+    for name in SCENARIOS:
+        device, events = generate(name, 60)
+        print(f"{name:>16} | {device:>8} | 60 秒 {len(events):>6} 事件 | {len(events) / 60:>7.1f} 事件/秒")
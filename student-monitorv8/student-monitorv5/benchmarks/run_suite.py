@@ -0,0 +1,276 @@
+"""
+监控流水线基准套件
+功能：
+1. 用 loadgen 生成的合成负载（突发打字、退格风暴、自动重复、1000 Hz 鼠标、连续滚动）
+   直接驱动 KeyboardMonitor / MouseMonitor 的回调，按窗口边界调用 analyze_period
+2. 时间来自虚拟时钟（与回放相同），窗口指标与真实会话一致，回调与分析则全速执行
+3. 每个场景在独立的子进程中运行，报告：
+   - events_per_sec：端到端吞吐（回调投递 + 聚合 + 全部窗口分析，直到最后一次分析完成）
+   - callback_latency_us：回调耗时分位数（p50 / p99 / p99.9 / 最大）
+   - analysis_ms：每个窗口 analyze_period 的耗时（不含等待聚合线程处理积压事件）
+   - peak_rss_mb / rss_growth_mb：子进程的峰值常驻内存，及驱动监控器期间的增量（Windows 上为空）
+4. 结果保存为 JSON（默认 benchmarks/results/<提交>.json，该目录不纳入版本控制），
+   --compare 与之前的结果对比，便于发现版本间的性能回退
+
+用法：
+    python benchmarks/run_suite.py [--scale 倍数] [--repeat 次数] [--scenario 名称 ...] [--output 文件] [--compare 基线.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), 'src'))
+
+import loadgen  # noqa: E402
+from monitoring.replay import VirtualClock, create_monitor  # noqa: E402
+
+RESULT_VERSION = 1
+WINDOW_SECONDS = 60
+
+# 场景 -> 合成负载时长（秒，乘以 --scale）
+DURATIONS = {
+    'typing': 4 * 3600,
+    'backspace_storm': 2 * 3600,
+    'auto_repeat': 2 * 3600,
+    'mouse_1000hz': 300,
+    'mouse_scroll': 300,
+    'mouse_1000hz_coalesced': 300,
+}
+
+# 场景 -> (loadgen 负载名, 监控器参数)；未列出的场景负载名与场景名相同
+SCENARIO_OPTIONS = {
+    'mouse_1000hz': ('mouse_1000hz', {'move_quantum': (0, 0)}),
+    'mouse_scroll': ('mouse_scroll', {'move_quantum': (0, 0)}),
+    'mouse_1000hz_coalesced': ('mouse_1000hz', {'move_quantum': (8, 2)}),
+}
+
+# 对比时报告的指标：(路径, 数值越大越好)
+COMPARED = [
+    (('events_per_sec',), True),
+    (('callback_latency_us', 'p99'), False),
+    (('analysis_ms', 'mean'), False),
+    (('peak_rss_mb',), False),
+]
+
+
+class BenchInput:
+    """基准用输入源：只提供虚拟时钟，回调与窗口分析由基准直接调用"""
+
+    def __init__(self, device, clock):
+        self.device = device
+        self.clock = clock
+
+    def close(self):
+        pass
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB）；不支持的平台返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024  # macOS 为字节，Linux 为 KB
+
+
+def percentiles(values, scale):
+    values = np.sort(np.asarray(values, dtype=np.float64)) / scale
+    if not len(values):
+        return {'p50': 0.0, 'p99': 0.0, 'p999': 0.0, 'max': 0.0}
+    return {
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p99': round(float(np.percentile(values, 99)), 3),
+        'p999': round(float(np.percentile(values, 99.9)), 3),
+        'max': round(float(values[-1]), 3),
+    }
+
+
+def run_scenario(name, seconds, seed=0):
+    """在当前进程中运行一个场景，返回结果字典"""
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    load, options = SCENARIO_OPTIONS.get(name, (name, {}))
+    device, events = loadgen.generate(load, seconds, seed)
+    rss_before = peak_rss_mb()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = VirtualClock([(datetime(2024, 1, 1, 9, 0, 0), 0)])
+        monitor = create_monitor(BenchInput(device, clock), os.path.join(tmp, f'{device}_performance.csv'),
+                                 analysis_interval=WINDOW_SECONDS, **options)
+
+        # 每个窗口先等待聚合线程处理完积压事件，再单独计时 analyze_period
+        analyze = monitor.analyze_period
+        analysis_ns = []
+        drain_ns = []
+
+        def timed_analyze(*args):
+            t0 = time.perf_counter_ns()
+            monitor.pipe.sync()
+            t1 = time.perf_counter_ns()
+            analyze(*args)
+            drain_ns.append(t1 - t0)
+            analysis_ns.append(time.perf_counter_ns() - t1)
+
+        monitor.analyze_period = timed_analyze
+        callbacks = {callback: getattr(monitor, callback) for callback in
+                     ('on_press', 'on_release', 'on_move', 'on_click', 'on_scroll') if hasattr(monitor, callback)}
+        latencies = array('q', bytes(8 * len(events)))
+        window_ns = WINDOW_SECONDS * loadgen.SECOND
+        next_window = window_ns
+        perf_ns = time.perf_counter_ns
+
+        # 与 start_listener 相同的初始状态，但不启动监听线程和调度任务
+        monitor.is_listening = True
+        monitor.last_analysis_time = clock.t
+        monitor.pipe.start()
+        start = time.perf_counter()
+        for i, (t, callback, args) in enumerate(events):
+            while t >= next_window:
+                clock.t = next_window
+                monitor.periodic_analysis()
+                next_window += window_ns
+            clock.t = t
+            t0 = perf_ns()
+            callbacks[callback](*args)
+            latencies[i] = perf_ns() - t0
+        monitor.stop_listener()  # 最后一次分析，等待聚合线程退出
+        elapsed = time.perf_counter() - start
+
+    rss_after = peak_rss_mb()
+    result = {
+        'device': device,
+        'synthetic_seconds': seconds,
+        'events': len(events),
+        'windows': len(monitor.analysis_results),
+        'elapsed_sec': round(elapsed, 4),
+        'events_per_sec': round(len(events) / elapsed, 1),
+        'callback_latency_us': percentiles(latencies, 1e3),
+        'analysis_ms': dict(percentiles(analysis_ns, 1e6), mean=round(float(np.mean(analysis_ns)) / 1e6, 4)),
+        'drain_ms': dict(percentiles(drain_ns, 1e6), mean=round(float(np.mean(drain_ns)) / 1e6, 4)),
+        'peak_rss_mb': None if rss_after is None else round(rss_after, 1),
+        'rss_growth_mb': None if rss_after is None else round(rss_after - rss_before, 1),
+    }
+    if device == 'mouse':
+        result['move_reduction_ratio'] = round(monitor.move_reduction_ratio, 4)
+    return result
+
+
+def _scenario_worker(name, seconds, queue):
+    queue.put(run_scenario(name, seconds))
+
+
+def run_isolated(name, seconds):
+    """在新的子进程中运行场景，峰值内存只包含该场景"""
+    import multiprocessing
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_scenario_worker, args=(name, seconds, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def lookup(result, path):
+    for key in path:
+        result = result.get(key) if isinstance(result, dict) else None
+    return result
+
+
+def compare(results, baseline):
+    """打印与基线结果的对比（旧值 -> 新值，百分比为正表示变好）"""
+    print(f"\n与基线对比: {baseline.get('label')}（{baseline.get('created')}）")
+    print(f"{'scenario':>22} | " + " | ".join(f"{'.'.join(path):>32}" for path, _ in COMPARED))
+    for name, result in results['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if old is None:
+            continue
+        cells = []
+        for path, higher_is_better in COMPARED:
+            new_value, old_value = lookup(result, path), lookup(old, path)
+            if not new_value or not old_value:
+                cells.append(f"{'-':>32}")
+                continue
+            change = (new_value / old_value - 1) * 100
+            if not higher_is_better:
+                change = -change
+            cells.append(f"{old_value:.1f} -> {new_value:.1f} ({change:+.1f}%)".rjust(32))
+        print(f"{name:>22} | " + " | ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="监控流水线基准套件")
+    parser.add_argument('--scale', type=float, default=1.0, help="合成负载时长的倍数")
+    parser.add_argument('--scenario', action='append', choices=sorted(DURATIONS), help="只运行指定场景（可重复）")
+    parser.add_argument('--output', help="结果 JSON 文件（默认 benchmarks/results/<提交>.json）")
+    parser.add_argument('--compare', help="与之前保存的结果 JSON 对比")
+    parser.add_argument('--repeat', type=int, default=3, help="每个场景运行次数，取吞吐为中位数的一次")
+    parser.add_argument('--inline', action='store_true', help="在当前进程中运行（峰值内存不再按场景隔离）")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    label = commit or datetime.now().strftime('%Y%m%d_%H%M%S')
+    results = {
+        'version': RESULT_VERSION,
+        'label': label,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'window_seconds': WINDOW_SECONDS,
+        'scenarios': {},
+    }
+
+    print(f"{'scenario':>22} | {'events':>8} | {'windows':>7} | {'events/s':>10} | {'p99 us':>8} | "
+          f"{'max us':>9} | {'analysis ms':>11} | {'peak RSS MB':>11}")
+    for name in args.scenario or DURATIONS:
+        seconds = max(1, int(DURATIONS[name] * args.scale))
+        runs = [run_scenario(name, seconds) if args.inline else run_isolated(name, seconds)
+                for _ in range(max(1, args.repeat))]
+        runs.sort(key=lambda run: run['events_per_sec'])
+        result = runs[len(runs) // 2]
+        result['events_per_sec_runs'] = [run['events_per_sec'] for run in runs]
+        results['scenarios'][name] = result
+        rss = result['peak_rss_mb']
+        print(f"{name:>22} | {result['events']:>8} | {result['windows']:>7} | {result['events_per_sec']:>10.0f} | "
+              f"{result['callback_latency_us']['p99']:>8.2f} | {result['callback_latency_us']['max']:>9.1f} | "
+              f"{result['analysis_ms']['mean']:>11.3f} | {'-' if rss is None else f'{rss:.1f}':>11}")
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f'{label}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,584 +1,688 @@
-"""
-Flask Web应用：提供监控系统的Web界面
-"""
-
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-import threading
-import time
-import os
-import csv
-import json
-from datetime import datetime
-import sys
-import logging
-from logging.handlers import RotatingFileHandler
-
-# 添加项目根目录到Python路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-# 获取项目根目录的绝对路径
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
-STATIC_DIR = os.path.join(BASE_DIR, 'static')
-
-app = Flask(__name__,
-            template_folder=TEMPLATE_DIR,
-            static_folder=STATIC_DIR)
-app.secret_key = 'your_secret_key_here_change_in_production'  # 请在生产环境中更改
-
-# 配置日志
-log_dir = os.path.join(BASE_DIR, 'logs')
-os.makedirs(log_dir, exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        RotatingFileHandler(
-            os.path.join(log_dir, 'app.log'),
-            maxBytes=1024 * 1024,  # 1MB
-            backupCount=5
-        ),
-        logging.StreamHandler()
-    ]
-)
-
-# 监控器实例
-monitors = {
-    'keyboard': None,
-    'mouse': None,
-    'emotion': None
-}
-
-stop_event = threading.Event()
-
-# 用户数据文件路径
-USERS_FILE = os.path.join(BASE_DIR, 'data', 'users.json')
-
-# 加载用户数据函数
-def load_users():
-    if os.path.exists(USERS_FILE):
-        try:
-            with open(USERS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logging.error(f"加载用户数据失败: {str(e)}")
-            return {}
-    return {}
-
-# 保存用户数据函数
-def save_users(users_data):
-    try:
-        # 确保数据目录存在
-        os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
-
-        with open(USERS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(users_data, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        logging.error(f"保存用户数据失败: {str(e)}")
-        return False
-
-# 初始化用户数据库
-users = load_users()
-# 如果没有用户，添加默认用户
-if not users:
-    users = {
-        'admin': {'password': 'admin123', 'role': 'admin'},
-        'student1': {'password': 'student123', 'role': 'student'},
-        'student2': {'password': 'student123', 'role': 'student'}
-    }
-    save_users(users)
-
-
-@app.route('/')
-def index():
-    if 'username' in session:
-        if session['role'] == 'admin':
-            return redirect(url_for('admin_dashboard'))
-        else:
-            return redirect(url_for('student_dashboard'))
-    return redirect(url_for('login'))
-
-
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    success = request.args.get('success')
-    if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
-
-        # 重新加载用户数据，确保获取最新
-        users = load_users()
-
-        if username in users and users[username]['password'] == password:
-            session['username'] = username
-            session['role'] = users[username]['role']
-            logging.info(f"用户 {username} 登录成功")
-            return redirect(url_for('index'))
-        else:
-            logging.warning(f"登录失败: 用户名 {username}")
-            return render_template('login.html', error='用户名或密码错误')
-
-    return render_template('login.html', success=success)
-
-
-@app.route('/register', methods=['GET', 'POST'])
-def register():
-    if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
-        confirm_password = request.form['confirm_password']
-        role = request.form.get('role', 'student')  # 默认角色为学生
-
-        # 验证输入
-        if not username or not password:
-            return render_template('register.html', error='用户名和密码不能为空')
-
-        if password != confirm_password:
-            return render_template('register.html', error='密码确认不匹配')
-
-        # 重新加载用户数据，确保获取最新
-        users = load_users()
-
-        if username in users:
-            return render_template('register.html', error='用户名已存在')
-
-        # 添加新用户
-        users[username] = {'password': password, 'role': role}
-        if save_users(users):
-            logging.info(f"新用户注册成功: {username}, 角色: {role}")
-            return redirect(url_for('login', success='注册成功，请登录'))
-        else:
-            return render_template('register.html', error='注册失败，请稍后重试')
-
-    return render_template('register.html')
-
-
-@app.route('/logout')
-def logout():
-    username = session.get('username', '未知用户')
-    session.pop('username', None)
-    session.pop('role', None)
-    logging.info(f"用户 {username} 退出登录")
-    return redirect(url_for('login'))
-
-
-@app.route('/admin')
-def admin_dashboard():
-    if 'username' not in session or session['role'] != 'admin':
-        return redirect(url_for('login'))
-
-    # 获取所有注册的学生用户
-    users_data = load_users()
-    students = []
-
-    for username, user_info in users_data.items():
-        if user_info.get('role') == 'student':
-            # 检查学生是否有监控数据文件
-            data_dir = os.path.join(BASE_DIR, 'data')
-            mouse_file = os.path.join(data_dir, f"{username}_mouse_performance.csv")
-            keyboard_file = os.path.join(data_dir, f"{username}_keyboard_performance.csv")
-
-            # 获取最后活动时间
-            last_active = "暂无活动"
-            if os.path.exists(mouse_file):
-                try:
-                    with open(mouse_file, 'r', newline='', encoding='utf-8') as f:
-                        reader = csv.DictReader(f)
-                        rows = list(reader)
-                        if rows:
-                            last_active = rows[-1].get('end_time', '暂无活动')
-                except:
-                    pass
-            elif os.path.exists(keyboard_file):
-                try:
-                    with open(keyboard_file, 'r', newline='', encoding='utf-8') as f:
-                        reader = csv.DictReader(f)
-                        rows = list(reader)
-                        if rows:
-                            last_active = rows[-1].get('end_time', '暂无活动')
-                except:
-                    pass
-
-            # 检查监控状态（这里简化处理，实际应该检查监控器运行状态）
-            monitoring = os.path.exists(mouse_file) or os.path.exists(keyboard_file)
-
-            students.append({
-                'name': username,
-                'monitoring': monitoring,
-                'last_active': last_active,
-                'data_files': {
-                    'mouse': os.path.exists(mouse_file),
-                    'keyboard': os.path.exists(keyboard_file),
-                    'emotion': os.path.exists(os.path.join(data_dir, f"{username}_emotion_performance.csv"))
-                }
-            })
-
-    return render_template('admin_dashboard.html', name=session['username'], students=students)
-
-
-@app.route('/student')
-def student_dashboard():
-    if 'username' not in session or session['role'] != 'student':
-        return redirect(url_for('login'))
-
-    # 获取监控状态
-    status = {
-        'mouse': monitors['mouse'] is not None and hasattr(monitors['mouse'], 'is_listening') and monitors[
-            'mouse'].is_listening,
-        'keyboard': monitors['keyboard'] is not None and hasattr(monitors['keyboard'], 'is_listening') and monitors[
-            'keyboard'].is_listening,
-        'emotion': monitors['emotion'] is not None and hasattr(monitors['emotion'], 'is_running') and monitors[
-            'emotion'].is_running,
-        'start_time': None
-    }
-
-    if status['mouse'] or status['keyboard'] or status['emotion']:
-        status['start_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-    return render_template('student_dashboard.html', name=session['username'], status=status)
-
-
-@app.route('/api/save_emotion_selected', methods=['POST'])
-def save_emotion_selected():
-    if 'username' not in session:
-        return jsonify({'success': False, 'message': '未登录'})
-
-    username = session['username']
-    data = request.get_json()
-    mood_type = data.get('mood_type', 'all')
-    emotions = {
-        "A": {"letter": "A", "name": "专注", "description": "流畅编码，完全投入"},
-        "B": {"letter": "B", "name": "无聊", "description": "简单重复，缺乏挑战"},
-        "C": {"letter": "C", "name": "沮丧", "description": "反复报错，难以解决"},
-        "D": {"letter": "D", "name": "困惑", "description": "思路卡壳，不知方向"}
-    }
-
-    from monitoring.emotion_monitor import EmotionMonitor
-    emotion_file = os.path.join(data_dir, f"{username}_emotion_performance.csv")
-
-    emotion = EmotionMonitor(
-        interval=120,
-        output_file=emotion_file,
-        stop_event=stop_event
-    )
-    monitors['emotion'] = emotion
-    emotion.on_emotion_selected(emotions[mood_type])
-
-    return jsonify({'success': True, 'message': f'success'})
-
-
-@app.route('/api/start_monitoring', methods=['POST'])
-def start_monitoring():
-    if 'username' not in session:
-        return jsonify({'success': False, 'message': '未登录'})
-
-    data = request.get_json()
-    monitor_type = data.get('type', 'all')
-
-    global stop_event
-    stop_event = threading.Event()
-
-    try:
-        # 确保数据目录存在
-        data_dir = os.path.join(BASE_DIR, 'data')
-        os.makedirs(data_dir, exist_ok=True)
-
-        username = session['username']
-        logging.info(f"用户 {username} 启动监控，类型: {monitor_type}")
-
-        # 启动键盘监控
-        if monitor_type in ['all', 'keyboard']:
-            from monitoring.keyboard_monitor import KeyboardMonitor
-            keyboard_file = os.path.join(data_dir, f"{username}_keyboard_performance.csv")
-
-            monitors['keyboard'] = KeyboardMonitor(
-                analysis_interval=60,  # 改为60秒，方便测试
-                output_file=keyboard_file,
-                stop_event=stop_event
-            )
-
-            keyboard_thread = threading.Thread(target=monitors['keyboard'].run)
-            keyboard_thread.daemon = True
-            keyboard_thread.start()
-            logging.info(f"键盘监控已启动，输出文件: {keyboard_file}")
-
-        # 启动鼠标监控
-        if monitor_type in ['all', 'mouse']:
-            from monitoring.mouse_monitor import MouseMonitor
-            mouse_file = os.path.join(data_dir, f"{username}_mouse_performance.csv")
-
-            monitors['mouse'] = MouseMonitor(
-                analysis_interval=60,  # 改为60秒，方便测试
-                output_file=mouse_file,
-                stop_event=stop_event
-            )
-
-            mouse_thread = threading.Thread(target=monitors['mouse'].run)
-            mouse_thread.daemon = True
-            mouse_thread.start()
-            logging.info(f"鼠标监控已启动，输出文件: {mouse_file}")
-
-        return jsonify({'success': True, 'message': '监控已启动'})
-
-    except Exception as e:
-        logging.error(f"启动监控失败: {str(e)}")
-        return jsonify({'success': False, 'message': f'启动监控失败: {str(e)}'})
-
-
-@app.route('/api/stop_monitoring', methods=['POST','GET'])
-def stop_monitoring():
-    if 'username' not in session:
-        return jsonify({'success': False, 'message': '未登录'})
-
-    username = session['username']
-    logging.info(f"用户 {username} 请求停止监控")
-
-    try:
-        stop_event.set()
-
-        # 停止所有监控器
-        stopped_count = 0
-        for monitor_type, monitor in monitors.items():
-            if monitor:
-                try:
-                    logging.info(f"正在停止 {monitor_type} 监控器...")
-
-                    if monitor_type in ['keyboard', 'mouse']:
-                        if hasattr(monitor, 'stop_listener') and callable(getattr(monitor, 'stop_listener')):
-                            monitor.stop_listener()
-                            stopped_count += 1
-                            logging.info(f"成功停止 {monitor_type} 监控器")
-                        else:
-                            logging.warning(f"{monitor_type} 监控器没有 stop_listener 方法")
-
-                    elif monitor_type == 'emotion':
-                        if hasattr(monitor, 'stop') and callable(getattr(monitor, 'stop')):
-                            monitor.stop()
-                            stopped_count += 1
-                            logging.info(f"成功停止 {monitor_type} 监控器")
-                        else:
-                            logging.warning(f"{monitor_type} 监控器没有 stop  方法")
-
-                except Exception as e:
-                    logging.error(f"停止 {monitor_type} 监控器时出错: {str(e)}")
-                finally:
-                    monitors[monitor_type] = None
-
-        # 给线程一些时间来完成停止操作
-        time.sleep(1)
-
-        # 重置停止事件，以便下次使用
-        stop_event.clear()
-
-        logging.info(f"用户 {username} 的监控停止完成，共停止了 {stopped_count} 个监控器")
-        return jsonify({'success': 1, 'message': f'成功停止了 {stopped_count} 个监控器'})
-
-    except Exception as e:
-        logging.error(f"停止监控时发生未知错误: {str(e)}")
-        return jsonify({'success': 0, 'message': f'停止监控时发生错误: {str(e)}'})
-
-
-@app.route('/api/monitoring_data')
-def get_monitoring_data():
-    if 'username' not in session:
-        return jsonify({'error': '未登录'})
-
-    data_type = request.args.get('type', 'mouse')
-    student = request.args.get('student', session['username'])
-
-    try:
-        data_dir = os.path.join(BASE_DIR, 'data')
-        file_path = os.path.join(data_dir, f"{student}_{data_type}_performance.csv")
-
-        if not os.path.exists(file_path):
-            return jsonify({'data': []})
-
-        data = []
-        with open(file_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # 根据数据类型格式化返回结果
-                if data_type == 'mouse':
-                    data.append({
-                        'time': row.get('start_time', ''),
-                        'action': f"移动 (距离: {row.get('total_distance', 0)}px)",
-                        'position': f"熵: {row.get('move_entropy', 0)}"
-                    })
-                elif data_type == 'keyboard':
-                    data.append({
-                        'time': row.get('start_time', ''),
-                        'key': f"按键次数: {row.get('total_keypresses', 0)}",
-                        'duration': f"IKD中位数: {row.get('median_ikd', 0)}s"
-                    })
-
-        # 返回最近10条记录
-        return jsonify({'data': data[-10:]})
-    except Exception as e:
-        logging.error(f"获取监控数据失败: {str(e)}")
-        return jsonify({'error': str(e)})
-
-
-@app.route('/api/student_monitoring_data')
-def get_student_monitoring_data():
-    if 'username' not in session or session['role'] != 'admin':
-        return jsonify({'error': '未登录或权限不足'})
-
-    student = request.args.get('student')
-    data_type = request.args.get('type', 'mouse')
-
-    if not student:
-        return jsonify({'error': '未指定学生'})
-
-    try:
-        data_dir = os.path.join(BASE_DIR, 'data')
-        file_path = os.path.join(data_dir, f"{student}_{data_type}_performance.csv")
-
-        if not os.path.exists(file_path):
-            return jsonify({'data': [], 'student': student, 'type': data_type})
-
-        data = []
-        with open(file_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if data_type == 'mouse':
-                    data.append({
-                        'time': row.get('start_time', ''),
-                        'action': f"移动 (距离: {row.get('total_distance', 0)}px)",
-                        'position': f"熵: {row.get('move_entropy', 0)}",
-                        'duration': row.get('duration_sec', '0'),
-                        'clicks': row.get('click_count', '0')
-                    })
-                elif data_type == 'keyboard':
-                    data.append({
-                        'time': row.get('start_time', ''),
-                        'key': f"按键次数: {row.get('total_keypresses', 0)}",
-                        'duration': f"IKD中位数: {row.get('median_ikd', 0)}s",
-                        'backspace_rate': f"{float(row.get('auto_correction_rate', 0)) * 100:.1f}%"
-                    })
-                elif data_type == 'emotion':
-                    data.append({
-                        'time': row.get('timestamp', ''),
-                        'emotion': row.get('emotion', ''),
-                        'description': row.get('description', '')
-                    })
-
-        # 返回所有记录
-        return jsonify({'data': data, 'student': student, 'type': data_type})
-    except Exception as e:
-        logging.error(f"获取学生监控数据失败: {str(e)}")
-        return jsonify({'error': str(e)})
-
-
-@app.route('/api/students')
-def get_students():
-    if 'username' not in session or session['role'] != 'admin':
-        return jsonify({'error': '未登录或权限不足'})
-
-    users_data = load_users()
-    students = []
-
-    for username, user_info in users_data.items():
-        if user_info.get('role') == 'student':
-            students.append({
-                'name': username,
-                'registered_time': user_info.get('registered_time', '未知')
-            })
-
-    return jsonify({'students': students})
-
-
-@app.route('/api/status')
-def get_status():
-    """获取监控器状态"""
-    if 'username' not in session:
-        return jsonify({'error': '未登录'})
-
-    status = {
-        'keyboard': {
-            'running': monitors['keyboard'] is not None,
-            'listening': monitors['keyboard'].is_listening if monitors['keyboard'] and hasattr(monitors['keyboard'],
-                                                                                               'is_listening') else False
-        },
-        'mouse': {
-            'running': monitors['mouse'] is not None,
-            'listening': monitors['mouse'].is_listening if monitors['mouse'] and hasattr(monitors['mouse'],
-                                                                                         'is_listening') else False
-        },
-        'emotion': {
-            'running': monitors['emotion'] is not None,
-            'listening': monitors['emotion'].is_running if monitors['emotion'] and hasattr(monitors['emotion'],
-                                                                                           'is_running') else False
-        }
-    }
-
-    return jsonify(status)
-
-
-@app.route('/api/debug')
-def debug_info():
-    """调试信息"""
-    if 'username' not in session:
-        return jsonify({'error': '未登录'})
-
-    username = session['username']
-    data_dir = os.path.join(BASE_DIR, 'data')
-
-    debug_info = {
-        'user': username,
-        'keyboard_monitor': {
-            'exists': monitors['keyboard'] is not None,
-            'is_listening': monitors['keyboard'].is_listening if monitors['keyboard'] else False,
-            'events_count': len(monitors['keyboard'].events) if monitors['keyboard'] and hasattr(monitors['keyboard'],
-                                                                                                 'events') else 0
-        },
-        'keyboard_file': os.path.join(data_dir, f"{username}_keyboard_performance.csv"),
-        'keyboard_file_exists': os.path.exists(os.path.join(data_dir, f"{username}_keyboard_performance.csv")),
-        'mouse_file': os.path.join(data_dir, f"{username}_mouse_performance.csv"),
-        'mouse_file_exists': os.path.exists(os.path.join(data_dir, f"{username}_mouse_performance.csv")),
-        'emotion_file': os.path.join(data_dir, f"{username}_emotion_performance.csv"),
-        'emotion_file_exists': os.path.exists(os.path.join(data_dir, f"{username}_emotion_performance.csv"))
-    }
-
-    return jsonify(debug_info)
-
-
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({'error': '页面不存在'}), 404
-
-
-@app.errorhandler(500)
-def internal_error(error):
-    logging.error(f"服务器内部错误: {str(error)}")
-    return jsonify({'error': '服务器内部错误'}), 500
-
-
-if __name__ == '__main__':
-    # 确保数据目录和日志目录存在
-    data_dir = os.path.join(BASE_DIR, 'data')
-    logs_dir = os.path.join(BASE_DIR, 'logs')
-    os.makedirs(data_dir, exist_ok=True)
-    os.makedirs(logs_dir, exist_ok=True)
-
-    print(f"项目根目录: {BASE_DIR}")
-    print(f"模板目录: {TEMPLATE_DIR}")
-    print(f"静态文件目录: {STATIC_DIR}")
-    print(f"数据目录: {data_dir}")
-    print(f"日志目录: {logs_dir}")
-
-    # 检查模板目录
-    if os.path.exists(TEMPLATE_DIR):
-        print(f"模板文件: {os.listdir(TEMPLATE_DIR)}")
-    else:
-        print("警告: 模板目录不存在")
-
-    # 检查静态文件目录
-    if os.path.exists(STATIC_DIR):
-        print(f"静态文件: {os.listdir(STATIC_DIR)}")
-    else:
-        print("警告: 静态文件目录不存在")
-
-    print("启动Flask应用...")
+"""
+Flask Web应用：提供监控系统的Web界面
+"""
+
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for
+import os
+import threading
+import json
+from datetime import datetime, timedelta
+import hashlib
+import sys
+import logging
+from logging.handlers import RotatingFileHandler
+
+from monitoring.csv_writer import add_append_listener
+from monitoring.emotion_recorder import EMOTIONS, TIME_FORMAT as EMOTION_TIME_FORMAT, TimestampOrderError, get_recorder
+from monitoring.registry import MonitorRegistry, monitor_class, preload
+from storage.backend import get_storage
+from storage.broker import EventBroker, format_sse
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 获取项目根目录的绝对路径
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+
+app = Flask(__name__,
+            template_folder=TEMPLATE_DIR,
+            static_folder=STATIC_DIR)
+app.secret_key = 'your_secret_key_here_change_in_production'  # 请在生产环境中更改
+
+# 配置日志
+log_dir = os.path.join(BASE_DIR, 'logs')
+os.makedirs(log_dir, exist_ok=True)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        RotatingFileHandler(
+            os.path.join(log_dir, 'app.log'),
+            maxBytes=1024 * 1024,  # 1MB
+            backupCount=5
+        ),
+        logging.StreamHandler()
+    ]
+)
+
+# 监控器注册表：每个用户独立的监控器和停止事件
+registry = MonitorRegistry()
+STOP_TIMEOUT = 2  # 停止监控时等待每个监控器线程退出的上限（秒）
+
+# 监控器模块（numpy、pynput）默认在第一次启动监控时导入；MONITOR_PRELOAD=1 时启动后在后台预加载
+if os.environ.get('MONITOR_PRELOAD', '0') == '1':
+    threading.Thread(target=preload, name='monitor-preload', daemon=True).start()
+
+# 设置 MONITOR_RAW_DIR 时，键鼠原始事件以二进制分段文件记录到 <目录>/<用户名>/（见 monitoring.raw_events）
+RAW_EVENT_DIR = os.environ.get('MONITOR_RAW_DIR')
+
+# 批量保存情绪接口单次最多接受的响应数
+MAX_EMOTION_BATCH = 100
+# 情绪响应时间戳最多允许超前服务器当前时间的秒数（容忍客户端时钟偏差）
+MAX_EMOTION_CLOCK_SKEW = 60
+
+# 存储后端（环境变量 MONITOR_STORAGE=csv/sqlite，默认 csv），监控数据每次写入文件后同步更新
+storage = get_storage(os.path.join(BASE_DIR, 'data'))
+storage.attach()
+
+# 分页接口单页最多返回的记录数
+MAX_PAGE_SIZE = 1000
+
+# 实时推送：监控器每写入一行分析结果，立即通过 /api/stream 推送给订阅的页面
+broker = EventBroker()
+add_append_listener(broker.on_append)
+STREAM_KEEPALIVE = 15  # 无事件时发送保活注释的间隔（秒）
+
+# 用户数据文件路径
+USERS_FILE = os.path.join(BASE_DIR, 'data', 'users.json')
+
+# 用户目录（csv 后端在文件修改时间或大小变化时才重新解析）
+user_store = storage.users
+
+# 加载用户数据函数（返回只读快照）
+def load_users():
+    return user_store.all()
+
+# 保存用户数据函数
+def save_users(users_data):
+    try:
+        user_store.save(users_data)
+        return True
+    except Exception as e:
+        logging.error(f"保存用户数据失败: {str(e)}")
+        return False
+
+# 初始化用户数据库
+users = load_users()
+# 如果没有用户，添加默认用户
+if not users:
+    users = {
+        'admin': {'password': 'admin123', 'role': 'admin'},
+        'student1': {'password': 'student123', 'role': 'student'},
+        'student2': {'password': 'student123', 'role': 'student'}
+    }
+    save_users(users)
+
+
+@app.route('/')
+def index():
+    if 'username' in session:
+        if session['role'] == 'admin':
+            return redirect(url_for('admin_dashboard'))
+        else:
+            return redirect(url_for('student_dashboard'))
+    return redirect(url_for('login'))
+
+
+@app.route('/login', methods=['GET', 'POST'])
+def login():
+    success = request.args.get('success')
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+
+        # 用户数据文件变化时会自动重新加载
+        user = user_store.get(username)
+
+        if user and user['password'] == password:
+            session['username'] = username
+            session['role'] = user['role']
+            logging.info(f"用户 {username} 登录成功")
+            return redirect(url_for('index'))
+        else:
+            logging.warning(f"登录失败: 用户名 {username}")
+            return render_template('login.html', error='用户名或密码错误')
+
+    return render_template('login.html', success=success)
+
+
+@app.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        confirm_password = request.form['confirm_password']
+        role = request.form.get('role', 'student')  # 默认角色为学生
+
+        # 验证输入
+        if not username or not password:
+            return render_template('register.html', error='用户名和密码不能为空')
+
+        if password != confirm_password:
+            return render_template('register.html', error='密码确认不匹配')
+
+        # 添加新用户（检查用户名与写入在同一把锁内完成）
+        try:
+            added = user_store.add(username, {'password': password, 'role': role})
+        except Exception as e:
+            logging.error(f"保存用户数据失败: {str(e)}")
+            return render_template('register.html', error='注册失败，请稍后重试')
+
+        if not added:
+            return render_template('register.html', error='用户名已存在')
+
+        logging.info(f"新用户注册成功: {username}, 角色: {role}")
+        return redirect(url_for('login', success='注册成功，请登录'))
+
+    return render_template('register.html')
+
+
+@app.route('/logout')
+def logout():
+    username = session.get('username', '未知用户')
+    session.pop('username', None)
+    session.pop('role', None)
+    logging.info(f"用户 {username} 退出登录")
+    return redirect(url_for('login'))
+
+
+@app.route('/admin')
+def admin_dashboard():
+    if 'username' not in session or session['role'] != 'admin':
+        return redirect(url_for('login'))
+
+    # 获取所有注册的学生用户
+    users_data = load_users()
+    students = []
+
+    for username, user_info in users_data.items():
+        if user_info.get('role') == 'student':
+            # 检查学生是否有监控数据
+            mouse_exists = storage.has_data(username, 'mouse')
+            keyboard_exists = storage.has_data(username, 'keyboard')
+
+            # 获取最后活动时间
+            last_active = "暂无活动"
+            if mouse_exists or keyboard_exists:
+                try:
+                    last_active = storage.last_active(username) or last_active
+                except Exception as e:
+                    logging.error(f"读取最后活动时间失败: {str(e)}")
+
+            # 检查监控状态（这里简化处理，实际应该检查监控器运行状态）
+            monitoring = mouse_exists or keyboard_exists
+
+            students.append({
+                'name': username,
+                'monitoring': monitoring,
+                'last_active': last_active,
+                'data_files': {
+                    'mouse': mouse_exists,
+                    'keyboard': keyboard_exists,
+                    'emotion': storage.has_data(username, 'emotion')
+                }
+            })
+
+    return render_template('admin_dashboard.html', name=session['username'], students=students)
+
+
+@app.route('/student')
+def student_dashboard():
+    if 'username' not in session or session['role'] != 'student':
+        return redirect(url_for('login'))
+
+    # 获取当前用户的监控状态
+    status = {monitor_type: state['listening'] for monitor_type, state in registry.status(session['username']).items()}
+    status['start_time'] = None
+
+    if status['mouse'] or status['keyboard'] or status['emotion']:
+        status['start_time'] = registry.get(session['username']).start_time
+
+    return render_template('student_dashboard.html', name=session['username'], status=status)
+
+
+def emotion_recorder(username):
+    """用户的情绪记录器（按文件缓存，记录一条响应只是一次缓冲追加）"""
+    return get_recorder(os.path.join(BASE_DIR, 'data', f"{username}_emotion_performance.csv"))
+
+
+@app.route('/api/save_emotion_selected', methods=['POST'])
+def save_emotion_selected():
+    if 'username' not in session:
+        return jsonify({'success': False, 'message': '未登录'})
+
+    data = request.get_json(silent=True) or {}
+    emotion = EMOTIONS.get(data.get('mood_type'))
+    if emotion is None:
+        return jsonify({'success': False, 'message': '无效的情绪选项'})
+
+    try:
+        emotion_recorder(session['username']).record(emotion)
+        return jsonify({'success': True, 'message': 'success'})
+    except Exception as e:
+        logging.error(f"保存情绪失败: {str(e)}")
+        return jsonify({'success': False, 'message': f'保存情绪失败: {str(e)}'})
+
+
+@app.route('/api/save_emotions_batch', methods=['POST'])
+def save_emotions_batch():
+    """
+    批量保存情绪响应
+    请求体：{"responses": [{"mood_type": "A", "timestamp": "2024-01-01 10:00:00"}, ...]}，timestamp 可省略（当前时间）
+    数据文件按时间顺序追加：
+    - 早于该用户已记录最后一条响应的条目不写入（如离线排队期间界面已记录了更新的响应），
+      其序号（从 0 开始）在响应的 skipped 中返回，客户端应将其丢弃而不是重试
+    - 请求不合法（情绪选项、时间格式、条数超限、时间超前当前时间 MAX_EMOTION_CLOCK_SKEW 秒以上）时
+      整批不写入，返回 400，index 为出错条目的序号
+    成功时返回 200：{"success": true, "count": 写入条数, "skipped": [跳过的序号, ...]}
+    """
+    if 'username' not in session:
+        return jsonify({'success': False, 'message': '未登录'}), 401
+
+    data = request.get_json(silent=True) or {}
+    items = data.get('responses')
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'message': '未提供情绪响应'}), 400
+    if len(items) > MAX_EMOTION_BATCH:
+        return jsonify({'success': False, 'message': f'单次最多提交 {MAX_EMOTION_BATCH} 条情绪响应'}), 400
+
+    latest = (datetime.now() + timedelta(seconds=MAX_EMOTION_CLOCK_SKEW)).strftime(EMOTION_TIME_FORMAT)
+    responses = []
+    for index, item in enumerate(items):
+        emotion = EMOTIONS.get(item.get('mood_type')) if isinstance(item, dict) else None
+        if emotion is None:
+            return jsonify({'success': False, 'message': f'第 {index + 1} 条: 无效的情绪选项', 'index': index}), 400
+        timestamp = item.get('timestamp') or None
+        if timestamp is not None:
+            try:
+                # 统一为补零的标准格式，文件中按字符串比较即按时间比较
+                timestamp = datetime.strptime(timestamp, EMOTION_TIME_FORMAT).strftime(EMOTION_TIME_FORMAT)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'message': f'第 {index + 1} 条: 时间格式应为 {EMOTION_TIME_FORMAT}',
+                                'index': index}), 400
+        responses.append((emotion, timestamp))
+
+    try:
+        count, skipped = emotion_recorder(session['username']).record_many(responses, latest=latest)
+    except TimestampOrderError as e:
+        return jsonify({'success': False, 'message': f'第 {e.index + 1} 条: {str(e)}', 'index': e.index}), 400
+    except Exception as e:
+        logging.error(f"批量保存情绪失败: {str(e)}")
+        return jsonify({'success': False, 'message': f'批量保存情绪失败: {str(e)}'}), 500
+
+    message = f'已保存 {count} 条情绪响应'
+    if skipped:
+        message += f'，{len(skipped)} 条早于已记录的最后一条响应，未保存'
+    return jsonify({'success': True, 'message': message, 'count': count, 'skipped': skipped})
+
+
+@app.route('/api/start_monitoring', methods=['POST'])
+def start_monitoring():
+    if 'username' not in session:
+        return jsonify({'success': False, 'message': '未登录'})
+
+    data = request.get_json()
+    monitor_type = data.get('type', 'all')
+
+    try:
+        # 确保数据目录存在
+        data_dir = os.path.join(BASE_DIR, 'data')
+        os.makedirs(data_dir, exist_ok=True)
+
+        # 设置 MONITOR_RECORD_DIR 时录制输入，可用 monitoring.replay 离线回放
+        from monitoring.input_source import open_input
+
+        username = session['username']
+        logging.info(f"用户 {username} 启动监控，类型: {monitor_type}")
+        monitor_session = registry.session(username)
+        raw_dir = os.path.join(RAW_EVENT_DIR, username) if RAW_EVENT_DIR else None
+
+        # 启动键盘监控
+        if monitor_type in ['all', 'keyboard']:
+            keyboard_file = os.path.join(data_dir, f"{username}_keyboard_performance.csv")
+
+            monitor_session.add('keyboard', monitor_class('keyboard')(
+                analysis_interval=60,  # 改为60秒，方便测试
+                output_file=keyboard_file,
+                stop_event=monitor_session.stop_event,
+                input_source=open_input('keyboard', name=username),
+                raw_dir=raw_dir
+            ))
+            logging.info(f"键盘监控已启动，输出文件: {keyboard_file}")
+
+        # 启动鼠标监控
+        if monitor_type in ['all', 'mouse']:
+            mouse_file = os.path.join(data_dir, f"{username}_mouse_performance.csv")
+
+            monitor_session.add('mouse', monitor_class('mouse')(
+                analysis_interval=60,  # 改为60秒，方便测试
+                output_file=mouse_file,
+                stop_event=monitor_session.stop_event,
+                input_source=open_input('mouse', name=username),
+                raw_dir=raw_dir
+            ))
+            logging.info(f"鼠标监控已启动，输出文件: {mouse_file}")
+
+        return jsonify({'success': True, 'message': '监控已启动'})
+
+    except Exception as e:
+        logging.error(f"启动监控失败: {str(e)}")
+        return jsonify({'success': False, 'message': f'启动监控失败: {str(e)}'})
+
+
+@app.route('/api/stop_monitoring', methods=['POST','GET'])
+def stop_monitoring():
+    if 'username' not in session:
+        return jsonify({'success': False, 'message': '未登录'})
+
+    username = session['username']
+    logging.info(f"用户 {username} 请求停止监控")
+
+    try:
+        # 只停止当前用户的监控器，等待各监控线程退出（每个最多 STOP_TIMEOUT 秒）
+        latencies = registry.stop(username, timeout=STOP_TIMEOUT)
+        stopped_count = sum(1 for latency in latencies.values() if latency is not None)
+
+        logging.info(f"用户 {username} 的监控停止完成，共停止了 {stopped_count} 个监控器")
+        return jsonify({
+            'success': 1,
+            'message': f'成功停止了 {stopped_count} 个监控器',
+            # 各监控器的实际停止耗时（毫秒），停止失败的为 null
+            'latency_ms': {t: None if latency is None else round(latency * 1000, 1) for t, latency in latencies.items()}
+        })
+
+    except Exception as e:
+        logging.error(f"停止监控时发生未知错误: {str(e)}")
+        return jsonify({'success': 0, 'message': f'停止监控时发生错误: {str(e)}'})
+
+
+def format_activity_row(data_type, row):
+    """学生端活动表格的一行（情绪数据不在学生端展示，返回 None）"""
+    if data_type == 'mouse':
+        return {
+            'time': row.get('start_time', ''),
+            'action': f"移动 (距离: {row.get('total_distance', 0)}px)",
+            'position': f"熵: {row.get('move_entropy', 0)}"
+        }
+    elif data_type == 'keyboard':
+        return {
+            'time': row.get('start_time', ''),
+            'key': f"按键次数: {row.get('total_keypresses', 0)}",
+            'duration': f"IKD中位数: {row.get('median_ikd', 0)}s"
+        }
+    return None
+
+
+def format_student_row(data_type, row):
+    """管理端学生数据表格的一行"""
+    if data_type == 'mouse':
+        return {
+            'time': row.get('start_time', ''),
+            'action': f"移动 (距离: {row.get('total_distance', 0)}px)",
+            'position': f"熵: {row.get('move_entropy', 0)}",
+            'duration': row.get('duration_sec', '0'),
+            'clicks': row.get('click_count', '0')
+        }
+    elif data_type == 'keyboard':
+        return {
+            'time': row.get('start_time', ''),
+            'key': f"按键次数: {row.get('total_keypresses', 0)}",
+            'duration': f"IKD中位数: {row.get('median_ikd', 0)}s",
+            'backspace_rate': f"{float(row.get('auto_correction_rate', 0)) * 100:.1f}%"
+        }
+    elif data_type == 'emotion':
+        return {
+            'time': row.get('timestamp', ''),
+            'emotion': row.get('emotion', ''),
+            'description': row.get('description', '')
+        }
+    return None
+
+
+def conditional_json(version, build):
+    """
+    带强 ETag 的 JSON 响应：ETag 由 version 计算，与请求的 If-None-Match 匹配时直接返回 304，
+    不调用 build，也不发送响应体
+    :param version: 决定响应内容的版本标记（可 JSON 序列化）
+    :param build: 返回响应数据的函数
+    """
+    etag = hashlib.sha1(json.dumps(version, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    # 浏览器每次都带 If-None-Match 重新验证，数据未变化时由 304 复用缓存
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/api/monitoring_data')
+def get_monitoring_data():
+    if 'username' not in session:
+        return jsonify({'error': '未登录'})
+
+    data_type = request.args.get('type', 'mouse')
+    student = request.args.get('student', session['username'])
+
+    def build():
+        data = []
+        # 只取最近10条记录
+        for row in storage.fetch_rows(student, data_type, limit=10):
+            item = format_activity_row(data_type, row)
+            if item is not None:
+                data.append(item)
+        return {'data': data}
+
+    try:
+        # 数据文件（或数据库中该学生的记录）未变化时返回 304，不读取数据
+        return conditional_json([student, data_type, storage.version(student, data_type)], build)
+    except Exception as e:
+        logging.error(f"获取监控数据失败: {str(e)}")
+        return jsonify({'error': str(e)})
+
+
+@app.route('/api/student_monitoring_data')
+def get_student_monitoring_data():
+    if 'username' not in session or session['role'] != 'admin':
+        return jsonify({'error': '未登录或权限不足'})
+
+    student = request.args.get('student')
+    data_type = request.args.get('type', 'mouse')
+    # 时间范围（含两端，格式 '%Y-%m-%d %H:%M:%S'）与分页参数；不传 limit 时返回全部记录
+    since = request.args.get('since')
+    until = request.args.get('until')
+    cursor = request.args.get('cursor')
+
+    if not student:
+        return jsonify({'error': '未指定学生'})
+
+    try:
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        def build():
+            rows, next_cursor = storage.fetch_page(student, data_type, since=since, until=until,
+                                                   limit=limit, cursor=cursor)
+
+            data = []
+            for row in rows:
+                item = format_student_row(data_type, row)
+                if item is not None:
+                    data.append(item)
+
+            # 按时间顺序返回本页记录；next_cursor 指向更早的一页（没有更多记录时为 null）
+            return {'data': data, 'student': student, 'type': data_type, 'next_cursor': next_cursor}
+
+        version = [student, data_type, since, until, limit, cursor, storage.version(student, data_type)]
+        return conditional_json(version, build)
+    except Exception as e:
+        logging.error(f"获取学生监控数据失败: {str(e)}")
+        return jsonify({'error': str(e)})
+
+
+@app.route('/api/stream')
+def stream():
+    """
+    Server-Sent Events：新的分析窗口或情绪记录写入后立即推送 window 事件
+    学生只能订阅自己的数据；管理员可用 student 参数指定学生，不指定时接收所有学生
+    事件数据：{student, type, row（原始字段）, item（与数据接口相同格式的表格行）}
+    """
+    if 'username' not in session:
+        return jsonify({'error': '未登录'}), 401
+
+    is_admin = session['role'] == 'admin'
+    student = request.args.get('student') if is_admin else session['username']
+    formatter = format_student_row if is_admin else format_activity_row
+
+    # 浏览器断线重连时带上最后收到的事件 id，补发错过的事件
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = broker.subscribe(student=student, last_event_id=last_event_id)
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while not subscription.closed:
+                event = subscription.get(timeout=STREAM_KEEPALIVE)
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                data = dict(event['data'])
+                data['item'] = formatter(data['type'], data['row'])
+                yield format_sse(event, data)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@app.route('/api/ikd_percentiles')
+def get_ikd_percentiles():
+    """合并时间范围内各窗口的按键时长草图，返回任意时间范围的分位数"""
+    if 'username' not in session:
+        return jsonify({'error': '未登录'})
+
+    student = request.args.get('student', session['username'])
+    if student != session['username'] and session['role'] != 'admin':
+        return jsonify({'error': '权限不足'})
+
+    since = request.args.get('since')
+    until = request.args.get('until')
+
+    try:
+        qs = [float(q) for q in request.args.get('q', '0.5,0.95').split(',')]
+
+        from monitoring.quantile_sketch import load_merged_sketch, sketch_file_for
+        data_dir = os.path.join(BASE_DIR, 'data')
+        keyboard_file = os.path.join(data_dir, f"{student}_keyboard_performance.csv")
+        sketch, windows = load_merged_sketch(sketch_file_for(keyboard_file), since, until)
+
+        return jsonify({
+            'student': student,
+            'windows': windows,
+            'count': sketch.n,
+            'quantiles': {str(q): round(value, 4) for q, value in zip(qs, sketch.quantiles(qs))}
+        })
+    except Exception as e:
+        logging.error(f"获取按键时长分位数失败: {str(e)}")
+        return jsonify({'error': str(e)})
+
+
+@app.route('/api/students')
+def get_students():
+    if 'username' not in session or session['role'] != 'admin':
+        return jsonify({'error': '未登录或权限不足'})
+
+    users_data = load_users()
+    students = []
+
+    for username, user_info in users_data.items():
+        if user_info.get('role') == 'student':
+            students.append({
+                'name': username,
+                'registered_time': user_info.get('registered_time', '未知')
+            })
+
+    # 学生列表很小，直接以内容作为版本，未变化时省去传输
+    return conditional_json(students, lambda: {'students': students})
+
+
+@app.route('/api/status')
+def get_status():
+    """获取监控器状态"""
+    if 'username' not in session:
+        return jsonify({'error': '未登录'})
+
+    # 按用户名直接查找当前用户的监控会话
+    status = registry.status(session['username'])
+
+    return conditional_json(status, lambda: status)
+
+
+@app.route('/api/debug')
+def debug_info():
+    """调试信息"""
+    if 'username' not in session:
+        return jsonify({'error': '未登录'})
+
+    username = session['username']
+    data_dir = os.path.join(BASE_DIR, 'data')
+
+    monitor_session = registry.get(username)
+    keyboard_monitor = monitor_session.get('keyboard') if monitor_session else None
+
+    debug_info = {
+        'user': username,
+        'active_sessions': len(registry),
+        'keyboard_monitor': {
+            'exists': keyboard_monitor is not None,
+            'is_listening': keyboard_monitor.is_listening if keyboard_monitor else False,
+            'events_count': len(keyboard_monitor.events) if keyboard_monitor and hasattr(keyboard_monitor,
+                                                                                        'events') else 0
+        },
+        'keyboard_file': os.path.join(data_dir, f"{username}_keyboard_performance.csv"),
+        'keyboard_file_exists': os.path.exists(os.path.join(data_dir, f"{username}_keyboard_performance.csv")),
+        'mouse_file': os.path.join(data_dir, f"{username}_mouse_performance.csv"),
+        'mouse_file_exists': os.path.exists(os.path.join(data_dir, f"{username}_mouse_performance.csv")),
+        'emotion_file': os.path.join(data_dir, f"{username}_emotion_performance.csv"),
+        'emotion_file_exists': os.path.exists(os.path.join(data_dir, f"{username}_emotion_performance.csv"))
+    }
+
+    return jsonify(debug_info)
+
+
+@app.errorhandler(404)
+def not_found(error):
+    return jsonify({'error': '页面不存在'}), 404
+
+
+@app.errorhandler(500)
+def internal_error(error):
+    logging.error(f"服务器内部错误: {str(error)}")
+    return jsonify({'error': '服务器内部错误'}), 500
+
+
+if __name__ == '__main__':
+    # 确保数据目录和日志目录存在
+    data_dir = os.path.join(BASE_DIR, 'data')
+    logs_dir = os.path.join(BASE_DIR, 'logs')
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
+
+    print(f"项目根目录: {BASE_DIR}")
+    print(f"模板目录: {TEMPLATE_DIR}")
+    print(f"静态文件目录: {STATIC_DIR}")
+    print(f"数据目录: {data_dir}")
+    print(f"日志目录: {logs_dir}")
+
+    # 检查模板目录
+    if os.path.exists(TEMPLATE_DIR):
+        print(f"模板文件: {os.listdir(TEMPLATE_DIR)}")
+    else:
+        print("警告: 模板目录不存在")
+
+    # 检查静态文件目录
+    if os.path.exists(STATIC_DIR):
+        print(f"静态文件: {os.listdir(STATIC_DIR)}")
+    else:
+        print("警告: 静态文件目录不存在")
+
+    print("启动Flask应用...")
     app.run(debug=True, port=5000, use_reloader=False)
\ No newline at end of file
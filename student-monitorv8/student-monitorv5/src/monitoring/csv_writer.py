@@ -0,0 +1,214 @@
+"""
+监控器共享的缓冲追加写入器
+功能：
+1. 每个输出文件一个追加器（进程内注册表共享），文件句柄保持打开
+2. 行先写入内存缓冲，按行数、按时间（共享调度器）或在停止时批量刷新
+3. 可选 fsync 策略：never（默认）、flush（每次刷新后同步）、always（每行刷新并同步）
+4. 刷新监听器：每批行写入文件后通知（如最后活动索引）
+5. 追加监听器：每行进入缓冲后立即通知（如实时推送），不等待刷新
+"""
+
+import atexit
+import csv
+import io
+import logging
+import os
+import threading
+
+from monitoring.scheduler import get_scheduler
+
+FSYNC_POLICIES = ('never', 'flush', 'always')
+DEFAULT_FSYNC = os.environ.get('MONITOR_CSV_FSYNC', 'never')
+
+_flush_listeners = []
+_append_listeners = []
+
+
+def add_flush_listener(listener):
+    """注册刷新监听器 listener(appender, rows)，rows 为本批写入文件的 CSV 行"""
+    if listener not in _flush_listeners:
+        _flush_listeners.append(listener)
+
+
+def remove_flush_listener(listener):
+    if listener in _flush_listeners:
+        _flush_listeners.remove(listener)
+
+
+def add_append_listener(listener):
+    """注册追加监听器 listener(appender, row)，在追加线程中调用"""
+    if listener not in _append_listeners:
+        _append_listeners.append(listener)
+
+
+def remove_append_listener(listener):
+    if listener in _append_listeners:
+        _append_listeners.remove(listener)
+
+
+class BufferedAppender:
+    def __init__(self, path, header=None, encoding='utf-8', max_rows=64, flush_interval=2.0, fsync=None):
+        """
+        :param path: 输出文件路径
+        :param header: CSV 表头，文件不存在或为空时写入
+        :param encoding: 文件编码
+        :param max_rows: 缓冲达到该行数时立即刷新
+        :param flush_interval: 缓冲中最早一行最多等待的秒数
+        :param fsync: fsync 策略，取值见 FSYNC_POLICIES
+        """
+        fsync = fsync or DEFAULT_FSYNC
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"未知的 fsync 策略: {fsync}")
+
+        self.path = path
+        self.header = header
+        self.encoding = encoding
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.pending = []  # 已格式化但未写入的行
+        self.pending_rows = []  # 未写入的 CSV 行（原始值），刷新后交给监听器
+        self.flush_job = None
+        self.file = None
+        self.rows_written = 0
+        self.flush_count = 0
+
+        # CSV 行格式化器，与直接使用 csv.writer 写文件的输出逐字节一致
+        self._line = io.StringIO()
+        self._writer = csv.writer(self._line)
+
+        with self.lock:
+            self._open()
+
+    def _open(self):
+        """打开文件（需在持有锁时调用），新文件写入表头"""
+        if self.file is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.file = open(self.path, 'a', newline='', encoding=self.encoding)
+        if self.header and self.file.tell() == 0:
+            self.file.write(self._format(self.header))
+            self.file.flush()
+            logging.info(f"创建新的输出文件: {self.path}")
+
+    def _format(self, row):
+        self._line.seek(0)
+        self._line.truncate()
+        self._writer.writerow(row)
+        return self._line.getvalue()
+
+    def append(self, row):
+        """追加一行 CSV"""
+        with self.lock:
+            self.pending.append(self._format(row))
+            self.pending_rows.append(row)
+            self._schedule_flush()
+
+        for listener in list(_append_listeners):
+            try:
+                listener(self, row)
+            except Exception as e:
+                logging.error(f"追加监听器处理 {self.path} 失败: {str(e)}")
+
+    def append_line(self, line):
+        """追加一行已格式化的文本（如 JSON Lines），line 不含换行符"""
+        with self.lock:
+            self.pending.append(line + '\n')
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        """按策略决定立即刷新或定时刷新（需在持有锁时调用）"""
+        if self.fsync == 'always' or len(self.pending) >= self.max_rows:
+            self._flush()
+        elif self.flush_job is None:
+            self.flush_job = get_scheduler().call_later(
+                self.flush_interval, self._timed_flush, name="csv-flush"
+            )
+
+    def _timed_flush(self):
+        with self.lock:
+            self.flush_job = None
+            self._flush()
+
+    def flush(self):
+        """立即写出缓冲中的所有行"""
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        """写出缓冲（需在持有锁时调用）"""
+        if self.flush_job is not None:
+            self.flush_job.cancel()
+            self.flush_job = None
+        if not self.pending:
+            return
+
+        self._open()
+        self.file.write(''.join(self.pending))
+        self.file.flush()
+        if self.fsync != 'never':
+            os.fsync(self.file.fileno())
+
+        self.rows_written += len(self.pending)
+        self.flush_count += 1
+        self.pending = []
+        rows, self.pending_rows = self.pending_rows, []
+
+        if rows:
+            for listener in list(_flush_listeners):
+                try:
+                    listener(self, rows)
+                except Exception as e:
+                    logging.error(f"刷新监听器处理 {self.path} 失败: {str(e)}")
+
+    def close(self):
+        """刷新并关闭文件句柄；之后再次追加时会重新打开"""
+        with self.lock:
+            try:
+                self._flush()
+            finally:
+                if self.file is not None:
+                    self.file.close()
+                    self.file = None
+
+
+_appenders = {}
+_appenders_lock = threading.Lock()
+
+
+def get_appender(path, header=None, **kwargs):
+    """返回 path 对应的共享追加器（不存在时创建）"""
+    key = os.path.abspath(path)
+    with _appenders_lock:
+        appender = _appenders.get(key)
+        if appender is None:
+            appender = BufferedAppender(path, header=header, **kwargs)
+            _appenders[key] = appender
+        return appender
+
+
+def flush_all():
+    """刷新所有追加器"""
+    with _appenders_lock:
+        appenders = list(_appenders.values())
+    for appender in appenders:
+        try:
+            appender.flush()
+        except Exception as e:
+            logging.error(f"刷新输出文件 {appender.path} 失败: {str(e)}")
+
+
+def close_all():
+    """刷新并关闭所有追加器"""
+    with _appenders_lock:
+        appenders = list(_appenders.values())
+    for appender in appenders:
+        try:
+            appender.close()
+        except Exception as e:
+            logging.error(f"关闭输出文件 {appender.path} 失败: {str(e)}")
+
+
+# 进程退出时写出尚未刷新的行
+atexit.register(close_all)
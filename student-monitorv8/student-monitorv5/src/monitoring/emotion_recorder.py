@@ -0,0 +1,126 @@
+"""
+情绪响应记录器（不依赖 Tkinter）
+功能：
+1. 情绪量表选项与情绪数据文件格式的唯一定义，GUI 量表和 Web 端共用
+2. 每个输出文件缓存一个记录器，记录一条响应只是一次共享追加器的缓冲追加
+3. 支持批量记录带时间戳的多条响应
+4. 文件按时间顺序追加（存储后端按时间二分查找、按最新一行生成版本）：
+   批量记录时早于已记录最后一条的响应被跳过并报告序号，晚于允许上限的时间戳被拒绝
+"""
+
+import os
+import threading
+from datetime import datetime
+
+from monitoring.csv_writer import get_appender
+from storage.tail import read_last_row
+
+EMOTION_HEADER = ['timestamp', 'emotion', 'description']
+
+# 情绪量表选项：字母 -> 选项
+EMOTIONS = {
+    "A": {"letter": "A", "name": "专注", "description": "流畅编码，完全投入"},
+    "B": {"letter": "B", "name": "无聊", "description": "简单重复，缺乏挑战"},
+    "C": {"letter": "C", "name": "沮丧", "description": "反复报错，难以解决"},
+    "D": {"letter": "D", "name": "困惑", "description": "思路卡壳，不知方向"}
+}
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def option_text(emotion):
+    """量表选项的完整描述，写入 description 列"""
+    return f"{emotion['letter']}.{emotion['name']}（{emotion['description']}）"
+
+
+class TimestampOrderError(ValueError):
+    """时间戳早于已记录的最后一条响应或晚于允许的上限"""
+
+    def __init__(self, index, message):
+        super().__init__(message)
+        self.index = index  # 出错的响应在提交顺序中的序号（从 0 开始）
+
+
+class EmotionRecorder:
+    def __init__(self, output_file):
+        """
+        :param output_file: 情绪数据文件路径
+        """
+        self.output_file = output_file
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        self.writer = get_appender(output_file, header=EMOTION_HEADER)
+        self.lock = threading.Lock()
+        # 已记录的最后一条时间戳（TIME_FORMAT 的字符串顺序即时间顺序）
+        last_row = read_last_row(output_file)
+        self.last_timestamp = (last_row or {}).get('timestamp') or ''
+
+    def _check(self, index, timestamp, latest):
+        if timestamp < self.last_timestamp:
+            raise TimestampOrderError(index, f"时间 {timestamp} 早于已记录的最后一条响应 {self.last_timestamp}")
+        if latest is not None and timestamp > latest:
+            raise TimestampOrderError(index, f"时间 {timestamp} 晚于允许的上限 {latest}")
+
+    def _append(self, emotion, timestamp):
+        self.writer.append([timestamp, emotion['name'], option_text(emotion)])
+        self.last_timestamp = timestamp
+
+    def record(self, emotion, timestamp=None, latest=None):
+        """
+        记录一条情绪响应
+        :param emotion: EMOTIONS 中的选项
+        :param timestamp: 响应时间（TIME_FORMAT 格式字符串），默认当前时间（不早于已记录的最后一条）
+        :param latest: 允许的最晚时间戳（TIME_FORMAT 格式字符串），None 表示不限制
+        :raises TimestampOrderError: 时间戳早于已记录的最后一条或晚于 latest
+        """
+        with self.lock:
+            if timestamp is None:
+                timestamp = max(datetime.now().strftime(TIME_FORMAT), self.last_timestamp)
+            self._check(0, timestamp, latest)
+            self._append(emotion, timestamp)
+        return timestamp
+
+    def record_many(self, responses, latest=None):
+        """
+        按时间顺序批量记录
+        早于已记录最后一条响应的条目（如离线排队期间界面已记录了更新的响应）不写入，以保持文件的时间顺序，
+        其序号随返回值报告
+        :param responses: [(选项, 时间戳), ...]，时间戳为 None 表示当前时间（不早于已记录的最后一条）
+        :param latest: 允许的最晚时间戳（TIME_FORMAT 格式字符串），None 表示不限制
+        :return: (记录的条数, 跳过的条目在 responses 中的序号列表)
+        :raises TimestampOrderError: 时间戳晚于 latest（整批不写入，index 为其在 responses 中的序号）
+        """
+        with self.lock:
+            now = max(datetime.now().strftime(TIME_FORMAT), self.last_timestamp)
+            entries = []
+            for index, (emotion, timestamp) in enumerate(responses):
+                timestamp = timestamp or now
+                if latest is not None and timestamp > latest:
+                    raise TimestampOrderError(index, f"时间 {timestamp} 晚于允许的上限 {latest}")
+                entries.append((timestamp, index, emotion))
+
+            skipped = []
+            for timestamp, index, emotion in sorted(entries, key=lambda entry: entry[:2]):
+                if timestamp < self.last_timestamp:
+                    skipped.append(index)
+                else:
+                    self._append(emotion, timestamp)
+        return len(entries) - len(skipped), sorted(skipped)
+
+    def close(self):
+        self.writer.close()
+
+
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder(output_file):
+    """返回该文件的记录器（同一文件复用同一个实例）"""
+    key = os.path.abspath(output_file)
+    recorder = _recorders.get(key)
+    if recorder is None:
+        with _recorders_lock:
+            recorder = _recorders.get(key)
+            if recorder is None:
+                recorder = _recorders[key] = EmotionRecorder(output_file)
+    return recorder
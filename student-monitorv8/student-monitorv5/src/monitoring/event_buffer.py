@@ -0,0 +1,188 @@
+"""
+键鼠原始事件的列式环形缓冲区
+功能：
+1. 以预分配的定长类型数组（列式）保存原始事件，替代每事件一个 dict + datetime 的列表
+2. 容量固定，写满后覆盖最旧的事件并计数
+3. 分析时通过"快照并交换"一次性取走当前窗口的全部事件，不复制、不逐条构造对象
+
+各列含义：
+    t_ns   int64  单调时钟纳秒时间戳（now_ns，即 time.perf_counter_ns）
+    kind   uint8  事件类型编码（EVENT_*）
+    code   int16  按键/按钮编码（见 CodeTable），滚动事件为水平滚动量 dx
+    x, y   int32  鼠标坐标
+    value  int64  附加值：按键释放为按住时长（纳秒），点击为是否按下（1/0），滚动为垂直滚动量 dy
+"""
+
+import time
+from array import array
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# 所有监听回调使用的时钟：单调、纳秒整数，不受系统校时影响；
+# 在 Windows 上 perf_counter 的分辨率远高于 monotonic（约15ms）
+now_ns = time.perf_counter_ns
+
+# 事件类型编码
+EVENT_MOVE = 1
+EVENT_CLICK = 2
+EVENT_SCROLL = 3
+EVENT_KEY_DOWN = 4
+EVENT_KEY_RELEASE = 5
+
+# 列名 -> (array 类型码, numpy 类型)
+COLUMNS = {
+    't_ns': ('q', np.int64),
+    'kind': ('B', np.uint8),
+    'code': ('h', np.int16),
+    'x': ('i', np.int32),
+    'y': ('i', np.int32),
+    'value': ('q', np.int64),
+}
+
+
+class CodeTable:
+    """把按键名、按钮名等字符串映射为小整数编码"""
+
+    def __init__(self):
+        self.codes = {}
+        self.names = []
+
+    def encode(self, name):
+        """返回名称对应的编码，首次出现时分配新编码"""
+        code = self.codes.get(name)
+        if code is None:
+            code = len(self.names)
+            self.codes[name] = code
+            self.names.append(name)
+        return code
+
+    def lookup(self, *names):
+        """返回已分配编码的名称对应的编码列表（未出现过的名称被忽略）"""
+        return [self.codes[name] for name in names if name in self.codes]
+
+    def decode(self, code):
+        return self.names[code]
+
+
+class SystemClock:
+    """
+    监控器读取时间的唯一入口（实时运行）；回放时替换为虚拟时钟（见 monitoring.replay）
+    - now_ns()：回调打时间戳用的单调时钟
+    - anchor()：同时读取墙上时钟与单调时钟，建立 ClockAnchor
+    - mark(kind, cut)：窗口边界（window）或停止（stop）时刻，分析代码以此作为"当前时间"；
+      cut 为监控器事件通道的 EventPipe.cut，在同一时刻把边界放入事件流
+    """
+
+    now_ns = staticmethod(now_ns)
+
+    def anchor(self):
+        return datetime.now(), now_ns()
+
+    def mark(self, kind, cut=None):
+        if cut is not None:
+            cut()
+        return now_ns()
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+class ClockAnchor:
+    """
+    单调时钟与墙上时钟的对应关系，仅用于把 t_ns 格式化为日期时间
+    监控器每个窗口建立一次锚点，窗口内的时长与速度只使用单调时钟计算
+    """
+
+    def __init__(self, clock=None):
+        self.wall, self.mono_ns = (clock or SYSTEM_CLOCK).anchor()
+
+    def to_datetime(self, t_ns):
+        return self.wall + timedelta(microseconds=(int(t_ns) - self.mono_ns) // 1000)
+
+
+class EventBatch:
+    """一次快照得到的事件集合，各列为 numpy 数组视图"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        for name, values in columns.items():
+            setattr(self, name, values)
+
+    def __len__(self):
+        return len(self.t_ns)
+
+    def select(self, kind):
+        """返回指定类型事件组成的新批次"""
+        mask = self.kind == kind
+        return EventBatch({name: values[mask] for name, values in self.columns.items()})
+
+
+class EventBuffer:
+    """预分配、定长的列式环形事件缓冲区（非线程安全，由调用方加锁）"""
+
+    def __init__(self, capacity=65536):
+        """
+        :param capacity: 最多保存的事件数，写满后覆盖最旧的事件
+        """
+        self.capacity = capacity
+        self._active = self._allocate()
+        self._spare = self._allocate()
+        self._head = 0  # 最旧事件的位置
+        self._size = 0
+        self.dropped = 0  # 因容量不足被覆盖的事件数
+
+    def _allocate(self):
+        return {name: array(typecode, bytes(np.dtype(dtype).itemsize * self.capacity))
+                for name, (typecode, dtype) in COLUMNS.items()}
+
+    def __len__(self):
+        return self._size
+
+    def append(self, t_ns, kind, code=0, x=0, y=0, value=0):
+        """追加一条事件"""
+        if self._size == self.capacity:
+            i = self._head
+            self._head = (self._head + 1) % self.capacity
+            self.dropped += 1
+        else:
+            i = (self._head + self._size) % self.capacity
+            self._size += 1
+
+        columns = self._active
+        columns['t_ns'][i] = t_ns
+        columns['kind'][i] = kind
+        columns['code'][i] = code
+        columns['x'][i] = int(x)
+        columns['y'][i] = int(y)
+        columns['value'][i] = value
+
+    def snapshot_and_swap(self, keep_since_ns=None):
+        """
+        取走当前全部事件并切换到备用缓冲区
+        返回的批次直接引用被换下的缓冲区，在下一次交换前有效
+        :param keep_since_ns: 若指定，时间戳不早于该值的事件会同时保留在新的缓冲区中
+        """
+        head, size = self._head, self._size
+        columns = {}
+        for name, (_, dtype) in COLUMNS.items():
+            values = np.frombuffer(self._active[name], dtype=dtype)
+            if head + size <= self.capacity:
+                columns[name] = values[head:head + size]
+            else:
+                # 环形缓冲区发生了回绕，按时间顺序拼接两段
+                columns[name] = np.concatenate((values[head:], values[:head + size - self.capacity]))
+        batch = EventBatch(columns)
+
+        self._active, self._spare = self._spare, self._active
+        self._head = 0
+        self._size = 0
+
+        if keep_since_ns is not None and size:
+            start = int(np.searchsorted(batch.t_ns, keep_since_ns))
+            kept = len(batch) - start
+            for name, values in columns.items():
+                self._active[name][:kept] = array(self._active[name].typecode, values[start:].tobytes())
+            self._size = kept
+
+        return batch
@@ -0,0 +1,158 @@
+"""
+监听回调到聚合线程的事件通道
+功能：
+1. pynput 回调只把紧凑元组放入 queue.SimpleQueue，不获取任何锁，避免阻塞系统输入钩子
+2. 专用聚合线程批量取出事件，在监控器锁内按顺序更新缓冲区和统计
+3. 分析前通过 sync() 等待此前投递的事件全部处理完毕
+4. 窗口边界：cut() 在事件流中放入边界标记，聚合线程处理到该标记时暂停，
+   分析在 paused() 块内取走当前窗口后再继续，边界之后投递的事件精确地计入下一个窗口，
+   期间回调照常投递，不等待分析
+"""
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+_STOP = object()
+
+
+class _Barrier:
+    """同步标记：聚合线程处理到该标记时通知等待方；窗口边界标记（hold）还会让聚合线程暂停到 resume"""
+
+    def __init__(self, hold=False):
+        self.done = threading.Event()
+        self.resume = threading.Event() if hold else None
+
+
+class EventPipe:
+    def __init__(self, apply, lock, name="event-aggregator", batch_size=512, hold_timeout=2):
+        """
+        :param apply: 处理单个事件元组的函数（在持有 lock 时调用）
+        :param lock: 监控器的锁，与分析线程共享
+        :param name: 聚合线程名称
+        :param batch_size: 每次持有锁时最多处理的事件数
+        :param hold_timeout: 聚合线程在窗口边界最多暂停的秒数（分析异常未恢复时不会一直停住）
+        """
+        self.apply = apply
+        self.lock = lock
+        self.name = name
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self.put = self.queue.put  # 回调直接调用，无锁
+        self.thread = None
+        self.hold_timeout = hold_timeout
+        # 本线程已放入、尚未被 paused() 取走的窗口边界（定期分析与停止时的最后一次分析在不同线程中，各自配对）
+        self.local = threading.local()
+        self.held = []  # 未启动聚合线程时，窗口边界之后暂不处理的事件
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """启动聚合线程"""
+        if not self.is_alive():
+            self.thread = threading.Thread(target=self.run, name=self.name)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self, timeout=2):
+        """处理完已投递的事件后停止聚合线程"""
+        if self.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join(timeout=timeout)
+        else:
+            self.drain()
+
+    def run(self):
+        """聚合线程主循环"""
+        while True:
+            items = [self.queue.get()]
+            try:
+                while len(items) < self.batch_size:
+                    items.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if self._apply_items(items):
+                return
+
+    def _apply_items(self, items, wait=True):
+        """
+        在锁内依次处理事件，遇到停止标记时返回 True
+        遇到窗口边界时释放锁并暂停到分析结束（wait=False 时把边界之后的事件留到下次处理）
+        """
+        while items:
+            held = None
+            with self.lock:
+                for i, item in enumerate(items):
+                    if item is _STOP:
+                        return True
+                    if isinstance(item, _Barrier):
+                        item.done.set()
+                        if item.resume is not None:
+                            held, items = item, items[i + 1:]
+                            break
+                        continue
+                    try:
+                        self.apply(item)
+                    except Exception as e:
+                        logging.error(f"处理输入事件时出错: {str(e)}")
+            if held is None:
+                return False
+            if not wait:
+                self.held = items
+                return False
+            if not held.resume.wait(self.hold_timeout):
+                logging.warning(f"{self.name} 在窗口边界等待分析超时，继续处理事件")
+        return False
+
+    def drain(self):
+        """在当前线程中处理所有已投递的事件（聚合线程未运行时使用），遇到未结束的窗口边界时停止"""
+        items, self.held = self.held, []
+        try:
+            while True:
+                items.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        if items:
+            self._apply_items(items, wait=False)
+
+    def cut(self):
+        """
+        在事件流的当前位置放入窗口边界，之后由 paused() 取走
+        录制输入时在写入窗口边界记录的同一临界区内调用（见 input_source.RecordingClock），
+        窗口内的事件与录制文件中边界之前的事件完全一致
+        """
+        self.local.barrier = _Barrier(hold=True)
+        self.queue.put(self.local.barrier)
+
+    def sync(self, timeout=2):
+        """
+        等待此前投递的事件全部处理完毕（不可在持有 lock 时调用）
+        已放入窗口边界时只等待到边界为止，边界之后的事件属于下一个窗口
+        """
+        barrier = getattr(self.local, 'barrier', None)
+        if not self.is_alive():
+            self.drain()
+            return True
+        if barrier is None:
+            barrier = _Barrier()
+            self.queue.put(barrier)
+        return barrier.done.wait(timeout)
+
+    @contextmanager
+    def paused(self, timeout=2):
+        """
+        等待窗口边界（未调用 cut() 时为当前位置）之前的事件全部处理完毕，
+        with 块内聚合线程暂停，块结束后继续处理边界之后的事件（不可在持有 lock 时调用）
+        """
+        if getattr(self.local, 'barrier', None) is None:
+            self.cut()
+        barrier = self.local.barrier
+        try:
+            self.sync(timeout)
+            yield
+        finally:
+            self.local.barrier = None
+            barrier.resume.set()
@@ -0,0 +1,189 @@
+"""
+监控器的输入源
+功能：
+1. LiveInput：pynput 实时监听 + 共享调度器按窗口边界触发分析（默认）
+2. RecordingInput：包装任意输入源，把回调参数、时间戳、窗口边界和时钟锚点录制为 JSON Lines，
+   可用 monitoring.replay 离线回放，得到与实时运行逐字节一致的 CSV
+3. open_input：设置环境变量 MONITOR_RECORD_DIR 时，实时监控同时录制输入
+
+输入源接口（监控器只通过这些成员与输入交互）：
+- clock：监控器使用的时钟（now_ns / anchor / mark，见 event_buffer.SystemClock）
+- listener(**callbacks)：返回监听线程（threading.Thread 子类，支持 start / stop / is_alive）
+- call_every(interval, callback, name)：按窗口边界周期调用 callback，返回可 cancel() 的任务
+- esc_key：停止热键（仅键盘）
+- close()：监控器停止后调用
+
+录制文件格式（每行一个 JSON 对象）：
+    {"device": "keyboard", "version": 1}                       文件头
+    {"t": 时间戳, "e": 回调名, "a": [参数...]}                     输入事件（按键/按钮编码为 {"char"} 或 {"name"}）
+    {"t": 时间戳, "m": "window" | "stop"}                        窗口边界 / 停止
+    {"t": 时间戳, "anchor": "ISO 墙上时间"}                        时钟锚点
+"""
+
+import inspect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from monitoring.csv_writer import get_appender
+from monitoring.event_buffer import SYSTEM_CLOCK
+from monitoring.scheduler import get_scheduler
+
+RECORDING_VERSION = 1
+
+# 设备 -> pynput 子模块
+DEVICES = ('keyboard', 'mouse')
+
+
+class LiveInput:
+    """pynput 实时输入"""
+
+    clock = SYSTEM_CLOCK
+
+    def __init__(self, device):
+        """
+        :param device: keyboard / mouse
+        """
+        if device not in DEVICES:
+            raise ValueError(f"未知的输入设备: {device}")
+        self.device = device
+
+    def listener(self, **callbacks):
+        # pynput 在首次启动监听时才导入，导入 Web 应用和监控器模块不加载输入后端
+        if self.device == 'keyboard':
+            from pynput.keyboard import Listener
+        else:
+            from pynput.mouse import Listener
+        return Listener(**callbacks)
+
+    def call_every(self, interval, callback, name=None):
+        return get_scheduler().call_every(interval, callback, name=name)
+
+    @property
+    def esc_key(self):
+        from pynput.keyboard import Key
+        return Key.esc
+
+    def close(self):
+        pass
+
+
+def encode_arg(value):
+    """回调参数编码为 JSON：数字/布尔/字符串原样保留，按键和按钮对象记录字符或名称"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    char = getattr(value, 'char', None)
+    if char is not None:
+        return {'char': char}
+    return {'name': str(value)}
+
+
+class RecordingClock:
+    """
+    录制用时钟：回调执行期间 now_ns() 返回录制包装器记下的时间戳，
+    锚点与窗口/停止时刻在读取的同时写入录制文件
+    """
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.local = threading.local()
+
+    def now_ns(self):
+        t = getattr(self.local, 't', None)
+        return time.perf_counter_ns() if t is None else t
+
+    def anchor(self):
+        with self.recording.lock:
+            wall, mono_ns = SYSTEM_CLOCK.anchor()
+            self.recording.write({'t': mono_ns, 'anchor': wall.isoformat()})
+        return wall, mono_ns
+
+    def mark(self, kind, cut=None):
+        # 边界记录与事件流中的边界在同一临界区内写入，两者之前的事件完全相同
+        with self.recording.lock:
+            t = self.now_ns()
+            self.recording.write({'t': t, 'm': kind})
+            if cut is not None:
+                cut()
+            if kind == 'stop':
+                self.recording.stopped = True
+        return t
+
+
+class RecordingInput:
+    """
+    包装输入源并录制
+    录制锁只保护写入录制文件和回调投递（回调只把元组放入事件通道），不与监控器锁或窗口分析共用；
+    窗口边界与事件在同一把锁内写入并放入事件通道，文件中的顺序即监控器处理事件的顺序
+    """
+
+    def __init__(self, source, path):
+        """
+        :param source: 被包装的输入源（通常为 LiveInput）
+        :param path: 录制文件路径（JSON Lines）
+        """
+        self.source = source
+        self.path = path
+        self.lock = threading.RLock()  # 录制锁（可重入：ESC 回调内会停止监控并写入停止时刻）
+        self.clock = RecordingClock(self)
+        self.stopped = False  # 停止时刻已录制；之后仍在途的回调不再送入监控器（回放同样不会重放它们）
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.writer = get_appender(path)
+        self.write({'device': source.device, 'version': RECORDING_VERSION})
+
+    @property
+    def device(self):
+        return self.source.device
+
+    def write(self, record):
+        self.writer.append_line(json.dumps(record, ensure_ascii=False))
+
+    def _wrap(self, name, callback):
+        # 只传回调声明的参数个数（pynput 会按包装函数的签名决定是否追加 injected 参数）
+        arity = len(inspect.signature(callback).parameters)
+        local = self.clock.local
+
+        def recorded(*args):
+            args = args[:arity]
+            t = time.perf_counter_ns()
+            with self.lock:
+                if self.stopped:
+                    return None
+                self.write({'t': t, 'e': name, 'a': [encode_arg(arg) for arg in args]})
+                local.t = t
+                try:
+                    return callback(*args)
+                finally:
+                    local.t = None
+
+        return recorded
+
+    def listener(self, **callbacks):
+        return self.source.listener(**{name: self._wrap(name, callback) for name, callback in callbacks.items()})
+
+    def call_every(self, interval, callback, name=None):
+        return self.source.call_every(interval, callback, name=name)
+
+    @property
+    def esc_key(self):
+        return self.source.esc_key
+
+    def close(self):
+        self.source.close()
+        self.writer.close()
+
+
+def open_input(device, name=None):
+    """
+    实时输入源；设置环境变量 MONITOR_RECORD_DIR 时同时录制到
+    <目录>/<name>_<device>_<时间>.jsonl
+    """
+    record_dir = os.environ.get('MONITOR_RECORD_DIR')
+    source = LiveInput(device)
+    if not record_dir:
+        return source
+    prefix = f"{name}_" if name else ''
+    path = os.path.join(record_dir, f"{prefix}{device}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    return RecordingInput(source, path)
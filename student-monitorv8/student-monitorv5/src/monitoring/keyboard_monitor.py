@@ -1,345 +1,403 @@
-"""
-键盘行为实时监控与分析系统
-功能：
-1. 持续监控键盘输入
-2. 每2分钟自动分析一次键盘使用情况
-3. 将分析结果保存到CSV文件
-4. 按ESC键停止整个系统
-"""
-
-import csv
-import time
-import os
-import numpy as np
-import pandas as pd
-import threading
-from datetime import datetime, timedelta
-from pynput import keyboard
-from pynput.keyboard import Key, Listener
-import logging
-
-
-class KeyboardMonitor:
-    def __init__(self, analysis_interval=120, output_file="keyboard_performance.csv", stop_event=None):
-        """
-        初始化键盘监控器
-        :param analysis_interval: 分析间隔（秒）
-        :param output_file: 输出文件路径
-        :param stop_event: 停止事件
-        """
-        self.analysis_interval = analysis_interval
-        self.output_file = output_file
-        self.events = []  # 存储键盘事件
-        self.analysis_results = []  # 存储分析结果
-        self.is_listening = False
-        self.listener = None
-        self.analysis_thread = None
-        self.start_time = None
-        self.last_analysis_time = None
-        self.lock = threading.Lock()
-        self.stop_event = stop_event or threading.Event()
-        self.last_key_press_time = None
-
-        # 确保输出目录存在
-        os.makedirs(os.path.dirname(self.output_file), exist_ok=True)
-
-        # 初始化分析结果文件
-        self.init_analysis_file()
-
-        logging.info(f"键盘监控器初始化完成，输出文件: {self.output_file}")
-
-    def init_analysis_file(self):
-        """初始化分析结果文件"""
-        if not os.path.exists(self.output_file):
-            with open(self.output_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'start_time', 'end_time', 'duration_sec', 'total_keypresses',
-                    'median_ikd', 'p95_ikd', 'mad', 'auto_correction_rate',
-                    'space_rate', 'backspace_count', 'space_count'
-                ])
-            logging.info(f"创建新的输出文件: {self.output_file}")
-
-    def on_press(self, key):
-        """处理按键按下事件"""
-        try:
-            # 处理特殊按键
-            if hasattr(key, 'char') and key.char is not None:
-                key_name = key.char
-            else:
-                key_name = str(key)
-                # 简化特殊按键名称
-                if key_name.startswith('Key.'):
-                    key_name = key_name[4:]  # 移除 'Key.' 前缀
-
-            event = {
-                'timestamp': datetime.now(),
-                'event_type': 'key_down',
-                'key': key_name,
-                'duration': 0.0
-            }
-
-            with self.lock:
-                self.events.append(event)
-                logging.debug(f"按键按下: {key_name}")
-
-            return True
-        except Exception as e:
-            logging.error(f"处理按键按下事件时出错: {str(e)}")
-            return True
-
-    def on_release(self, key):
-        """处理按键释放事件"""
-        try:
-            # 处理特殊按键
-            if hasattr(key, 'char') and key.char is not None:
-                key_name = key.char
-            else:
-                key_name = str(key)
-                if key_name.startswith('Key.'):
-                    key_name = key_name[4:]  # 移除 'Key.' 前缀
-
-            # 查找对应的按下事件
-            press_event = None
-            with self.lock:
-                for event in reversed(self.events):
-                    if event['event_type'] == 'key_down' and event['key'] == key_name:
-                        press_event = event
-                        break
-
-            if press_event:
-                duration = (datetime.now() - press_event['timestamp']).total_seconds()
-                event = {
-                    'timestamp': datetime.now(),
-                    'event_type': 'key_release',
-                    'key': key_name,
-                    'duration': round(duration, 3)
-                }
-
-                with self.lock:
-                    self.events.append(event)
-                logging.debug(f"按键释放: {key_name}, 时长: {duration:.3f}s")
-
-            # 停止监听的热键（ESC键）
-            if key == Key.esc:
-                logging.info("检测到ESC键，停止整个系统...")
-                self.stop_event.set()  # 设置停止事件
-                self.stop_listener()
-                return False
-
-            return True
-        except Exception as e:
-            logging.error(f"处理按键释放事件时出错: {str(e)}")
-            return True
-
-    def start_listener(self):
-        """启动键盘监听器"""
-        if not self.is_listening:
-            logging.info("键盘监听已启动... 按ESC键停止")
-            self.is_listening = True
-            self.start_time = datetime.now()
-            self.last_analysis_time = self.start_time
-
-            # 启动监听线程
-            try:
-                self.listener = Listener(
-                    on_press=self.on_press,
-                    on_release=self.on_release
-                )
-                self.listener.start()
-                logging.info("键盘监听器线程已启动")
-            except Exception as e:
-                logging.error(f"启动键盘监听器失败: {str(e)}")
-                self.is_listening = False
-                return
-
-            # 启动分析线程
-            self.analysis_thread = threading.Thread(target=self.periodic_analysis)
-            self.analysis_thread.daemon = True
-            self.analysis_thread.start()
-            logging.info("分析线程已启动")
-
-    def stop_listener(self):
-        """停止键盘监听器"""
-        if self.is_listening:
-            logging.info("停止键盘监听...")
-            self.is_listening = False
-
-            if self.listener and self.listener.is_alive():
-                try:
-                    self.listener.stop()
-                    logging.info("键盘监听器已停止")
-                except Exception as e:
-                    logging.error(f"停止键盘监听器时出错: {str(e)}")
-
-            # 执行最后一次分析
-            try:
-                self.analyze_period()
-            except Exception as e:
-                logging.error(f"最后一次分析失败: {str(e)}")
-
-    def periodic_analysis(self):
-        """定期执行分析"""
-        logging.info(f"分析线程启动，间隔: {self.analysis_interval}秒")
-
-        while self.is_listening and not self.stop_event.is_set():
-            try:
-                current_time = datetime.now()
-                elapsed = (current_time - self.last_analysis_time).total_seconds()
-
-                if elapsed >= self.analysis_interval:
-                    logging.info(f"执行定期分析，已过去 {elapsed:.1f} 秒")
-                    self.analyze_period()
-                    self.last_analysis_time = current_time
-
-                time.sleep(1)
-            except Exception as e:
-                logging.error(f"分析线程出错: {str(e)}")
-                time.sleep(1)
-
-    def analyze_period(self):
-        """分析当前时间段的数据"""
-        with self.lock:
-            if not self.events:
-                logging.info("没有可分析的事件数据")
-                return
-
-            if self.stop_event.is_set():
-                logging.info("系统已停止，跳过分析")
-                return
-
-            # 创建当前时间段的数据副本
-            events_copy = self.events.copy()
-            self.events = []  # 清空事件列表
-
-        # 计算时间段
-        if not events_copy:
-            logging.info("没有可分析的事件数据")
-            return
-
-        start_time = min(e['timestamp'] for e in events_copy)
-        end_time = max(e['timestamp'] for e in events_copy)
-        duration = (end_time - start_time).total_seconds()
-
-        logging.info(f"分析时间段: {start_time} 到 {end_time}, 时长: {duration:.2f}秒, 事件数: {len(events_copy)}")
-
-        # 转换为DataFrame
-        df = pd.DataFrame(events_copy)
-
-        # 分离按键事件
-        key_down_events = df[df['event_type'] == 'key_down']
-        key_release_events = df[df['event_type'] == 'key_release']
-
-        # 1. 按键总次数
-        total_keypresses = len(key_down_events) if not key_down_events.empty else 0
-
-        # 2. 键盘延迟指标
-        durations = key_release_events['duration'].values if not key_release_events.empty else []
-        if len(durations) > 0:
-            median_ikd = np.median(durations)
-            p95_ikd = np.percentile(durations, 95)
-            deviations = np.abs(durations - median_ikd)
-            mad = np.median(deviations)
-        else:
-            median_ikd = 0
-            p95_ikd = 0
-            mad = 0
-
-        # 3. 自动更正率（退格键使用率）
-        backspace_count = 0
-        if not key_down_events.empty:
-            backspace_events = key_down_events[
-                (key_down_events['key'] == 'backspace') |
-                (key_down_events['key'] == '\x08')
-                ]
-            backspace_count = len(backspace_events)
-
-        auto_correction_rate = backspace_count / total_keypresses if total_keypresses > 0 else 0
-
-        # 4. 空格率
-        space_count = 0
-        if not key_down_events.empty:
-            space_events = key_down_events[
-                (key_down_events['key'] == ' ') |
-                (key_down_events['key'] == 'space')
-                ]
-            space_count = len(space_events)
-
-        space_rate = space_count / total_keypresses if total_keypresses > 0 else 0
-
-        # 保存分析结果
-        result = {
-            'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'end_time': end_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'duration_sec': round(duration, 2),
-            'total_keypresses': total_keypresses,
-            'median_ikd': round(median_ikd, 4),
-            'p95_ikd': round(p95_ikd, 4),
-            'mad': round(mad, 4),
-            'auto_correction_rate': round(auto_correction_rate, 4),
-            'space_rate': round(space_rate, 4),
-            'backspace_count': backspace_count,
-            'space_count': space_count
-        }
-
-        # 保存到内存和文件
-        self.analysis_results.append(result)
-        self.save_analysis_result(result)
-
-        logging.info(f"分析完成: 按键次数: {total_keypresses}, 时长: {duration:.2f}秒")
-        logging.info(f"- IKD中位数: {median_ikd:.4f}s, IKD95%: {p95_ikd:.4f}s")
-        logging.info(f"- 空格率: {space_rate:.2%}, 退格率: {auto_correction_rate:.2%}")
-
-    def save_analysis_result(self, result):
-        """保存分析结果到CSV文件"""
-        try:
-            file_exists = os.path.exists(self.output_file)
-
-            with open(self.output_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                # 如果文件不存在，写入表头
-                if not file_exists:
-                    writer.writerow([
-                        'start_time', 'end_time', 'duration_sec', 'total_keypresses',
-                        'median_ikd', 'p95_ikd', 'mad', 'auto_correction_rate',
-                        'space_rate', 'backspace_count', 'space_count'
-                    ])
-
-                writer.writerow([
-                    result['start_time'],
-                    result['end_time'],
-                    result['duration_sec'],
-                    result['total_keypresses'],
-                    result['median_ikd'],
-                    result['p95_ikd'],
-                    result['mad'],
-                    result['auto_correction_rate'],
-                    result['space_rate'],
-                    result['backspace_count'],
-                    result['space_count']
-                ])
-            logging.info(f"分析结果已保存到 {self.output_file}")
-        except Exception as e:
-            logging.error(f"保存分析结果失败: {str(e)}")
-
-    def run(self):
-        """启动监控系统"""
-        logging.info("键盘监控系统启动")
-        logging.info(f"分析间隔: {self.analysis_interval}秒")
-        logging.info(f"数据文件: {self.output_file}")
-
-        try:
-            self.start_listener()
-
-            # 保持主线程运行
-            while self.is_listening and not self.stop_event.is_set():
-                time.sleep(1)
-
-        except KeyboardInterrupt:
-            logging.info("用户中断...")
-            self.stop_listener()
-        except Exception as e:
-            logging.error(f"发生未预期错误: {str(e)}")
-            self.stop_listener()
-        finally:
+"""
+键盘行为实时监控与分析系统
+功能：
+1. 持续监控键盘输入
+2. 每2分钟自动分析一次键盘使用情况
+3. 将分析结果保存到CSV文件
+4. 按ESC键停止整个系统
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import logging
+
+from monitoring.csv_writer import get_appender
+from monitoring.event_buffer import (
+    EventBuffer, CodeTable, ClockAnchor, EVENT_KEY_DOWN, EVENT_KEY_RELEASE
+)
+from monitoring.handoff import EventPipe
+from monitoring.input_source import LiveInput
+from monitoring.metrics import keyboard_metrics
+from monitoring.raw_events import RawEventRecorder, FLAG_REPEAT, new_session_dir
+from monitoring.quantile_sketch import KLLSketch, sketch_file_for
+
+
+class KeyboardMonitor:
+    def __init__(self, analysis_interval=120, output_file="keyboard_performance.csv", stop_event=None,
+                 max_hold_seconds=10, buffer_capacity=16384, input_source=None, raw_dir=None):
+        """
+        初始化键盘监控器
+        :param analysis_interval: 分析间隔（秒）
+        :param output_file: 输出文件路径
+        :param stop_event: 停止事件
+        :param max_hold_seconds: 按下后超过该时长仍未释放的按键视为孤立按键并丢弃（秒）
+        :param buffer_capacity: 事件缓冲区容量（条）
+        :param input_source: 输入源，默认 pynput 实时监听（见 monitoring.input_source；回放见 monitoring.replay）
+        :param raw_dir: 若指定，每次监听会话的原始事件以二进制分段文件记录到该目录（见 monitoring.raw_events）
+        """
+        self.analysis_interval = analysis_interval
+        self.output_file = output_file
+        self.input_source = input_source or LiveInput('keyboard')
+        self.clock = self.input_source.clock
+        self.now_ns = self.clock.now_ns  # 回调打时间戳用的时钟
+        self.events = EventBuffer(buffer_capacity)  # 存储键盘事件
+        self.key_table = CodeTable()  # 按键名 -> 编码
+        self.raw_dir = raw_dir
+        self.raw_recorder = None  # 当前会话的原始事件记录器
+        self.window_anchor = ClockAnchor(self.clock)  # 当前窗口的墙上时钟锚点，仅用于格式化时间
+        self.analysis_results = []  # 存储分析结果
+        self.is_listening = False
+        self.listener = None
+        self.esc_key = None  # 停止热键，启动监听时从输入源取得
+        self.analysis_job = None  # 共享调度器中的窗口分析任务
+        self.start_time = None
+        self.last_analysis_time = None
+        self.lock = threading.Lock()
+        self.stop_event = stop_event or threading.Event()
+        self.stopped = threading.Event()  # 监听器停止时置位，唤醒 run()
+        self.last_key_press_time = None
+        self.max_hold_ns = int(max_hold_seconds * 1e9)
+        self.pending_presses = {}  # 未释放的按键：按键编码 -> 按下时间（纳秒），用于O(1)配对释放事件
+        self.ikd_sketch = KLLSketch()  # 当前窗口按键时长的分位数草图
+        self.sketch_file = sketch_file_for(self.output_file)  # 每个窗口的草图，与CSV行一一对应
+        self.pipe = EventPipe(self.apply_event, self.lock, name="keyboard-aggregator")  # 回调 -> 聚合线程
+
+        # 确保输出目录存在
+        os.makedirs(os.path.dirname(self.output_file), exist_ok=True)
+
+        # 初始化分析结果文件
+        self.init_analysis_file()
+
+        logging.info(f"键盘监控器初始化完成，输出文件: {self.output_file}")
+
+    def init_analysis_file(self):
+        """初始化分析结果文件（共享追加器在新文件中写入表头）"""
+        self.writer = get_appender(self.output_file, header=[
+            'start_time', 'end_time', 'duration_sec', 'total_keypresses',
+            'median_ikd', 'p95_ikd', 'mad', 'auto_correction_rate',
+            'space_rate', 'backspace_count', 'space_count'
+        ])
+        self.sketch_writer = get_appender(self.sketch_file)
+
+    def on_press(self, key):
+        """处理按键按下事件"""
+        try:
+            # 处理特殊按键
+            if hasattr(key, 'char') and key.char is not None:
+                key_name = key.char
+            else:
+                key_name = str(key)
+                # 简化特殊按键名称
+                if key_name.startswith('Key.'):
+                    key_name = key_name[4:]  # 移除 'Key.' 前缀
+
+            self.pipe.put((self.now_ns(), EVENT_KEY_DOWN, key_name))
+            return True
+        except Exception as e:
+            logging.error(f"处理按键按下事件时出错: {str(e)}")
+            return True
+
+    def on_release(self, key):
+        """处理按键释放事件"""
+        try:
+            # 处理特殊按键
+            if hasattr(key, 'char') and key.char is not None:
+                key_name = key.char
+            else:
+                key_name = str(key)
+                if key_name.startswith('Key.'):
+                    key_name = key_name[4:]  # 移除 'Key.' 前缀
+
+            self.pipe.put((self.now_ns(), EVENT_KEY_RELEASE, key_name))
+
+            # 停止监听的热键（ESC键）
+            if key == self.esc_key:
+                logging.info("检测到ESC键，停止整个系统...")
+                self.stop_event.set()  # 设置停止事件
+                self.stop_listener()
+                return False
+
+            return True
+        except Exception as e:
+            logging.error(f"处理按键释放事件时出错: {str(e)}")
+            return True
+
+    def apply_event(self, item):
+        """在聚合线程中处理回调投递的事件（持有锁时调用）"""
+        now, kind, key_name = item
+        code = self.key_table.encode(key_name)
+
+        if kind == EVENT_KEY_DOWN:
+            self.events.append(now, EVENT_KEY_DOWN, code)
+            # 按住不放时系统会自动重复触发按下事件，保留首次按下的时间；
+            # 若已有记录超过最长按键时长，说明其释放事件已丢失，用本次按下替换
+            pressed_at = self.pending_presses.get(code)
+            if pressed_at is None or now - pressed_at > self.max_hold_ns:
+                self.pending_presses[code] = now
+                if self.raw_recorder is not None:
+                    self.raw_recorder.append(now, EVENT_KEY_DOWN, code)
+            elif self.raw_recorder is not None:
+                self.raw_recorder.append(now, EVENT_KEY_DOWN, code, flags=FLAG_REPEAT)
+            return
+
+        # 从未释放按键表中取出对应的按下时间
+        press_time = self.pending_presses.pop(code, None)
+        if press_time is not None:
+            self.events.append(now, EVENT_KEY_RELEASE, code, value=now - press_time)
+            if self.raw_recorder is not None:
+                self.raw_recorder.append(now, EVENT_KEY_RELEASE, code, value=now - press_time)
+            self.ikd_sketch.update(round((now - press_time) / 1e9, 3))
+
+    def start_listener(self):
+        """启动键盘监听器"""
+        if not self.is_listening:
+            logging.info("键盘监听已启动... 按ESC键停止")
+            self.is_listening = True
+            self.stopped.clear()
+            self.start_time = datetime.now()
+            self.last_analysis_time = self.now_ns()
+
+            # 按固定窗口边界执行分析（实时运行由共享调度器触发，回放时由录制的窗口边界触发），
+            # 先于监听线程登记，回放开始时已能收到窗口边界
+            self.analysis_job = self.input_source.call_every(
+                self.analysis_interval, self.periodic_analysis, name="keyboard-analysis"
+            )
+            logging.info(f"分析任务已调度，间隔: {self.analysis_interval}秒")
+
+            if self.raw_dir:
+                self.raw_recorder = RawEventRecorder(new_session_dir(self.raw_dir, 'keyboard'), 'keyboard',
+                                                     self.window_anchor, code_table=self.key_table)
+
+            # 先启动聚合线程，再启动监听线程
+            self.pipe.start()
+            try:
+                self.esc_key = self.input_source.esc_key
+                self.listener = self.input_source.listener(
+                    on_press=self.on_press,
+                    on_release=self.on_release
+                )
+                self.listener.start()
+                logging.info("键盘监听器线程已启动")
+            except Exception as e:
+                logging.error(f"启动键盘监听器失败: {str(e)}")
+                self.is_listening = False
+                self.analysis_job.cancel()
+                self.pipe.stop()
+                self.close_raw_recorder()
+                self.stopped.set()
+                return
+
+    def stop_listener(self, timeout=2):
+        """停止键盘监听器"""
+        if self.is_listening:
+            logging.info("停止键盘监听...")
+            self.is_listening = False
+            if self.analysis_job:
+                self.analysis_job.cancel()
+
+            if self.listener and self.listener.is_alive():
+                try:
+                    self.listener.stop()
+                    logging.info("键盘监听器已停止")
+                except Exception as e:
+                    logging.error(f"停止键盘监听器时出错: {str(e)}")
+
+            # 执行最后一次分析
+            try:
+                self.analyze_period(self.clock.mark('stop', self.pipe.cut))
+            except Exception as e:
+                logging.error(f"最后一次分析失败: {str(e)}")
+
+            self.pipe.stop(timeout=timeout)
+            self.close_raw_recorder()
+            self.writer.close()
+            self.sketch_writer.close()
+            self.input_source.close()
+            self.stopped.set()
+
+    def close_raw_recorder(self):
+        """写出并关闭当前会话的原始事件记录"""
+        with self.lock:
+            if self.raw_recorder is not None:
+                try:
+                    self.raw_recorder.close()
+                except Exception as e:
+                    logging.error(f"保存原始事件失败: {str(e)}")
+                self.raw_recorder = None
+
+    def stop(self, timeout=2):
+        """
+        停止监听并等待监听线程和聚合线程退出（最多 timeout 秒）
+        :return: 实际停止耗时（秒）
+        """
+        start = time.perf_counter()
+        self.stop_listener(timeout)
+        if self.listener is not None and self.listener is not threading.current_thread():
+            # pynput 的 join 在线程退出后还会等待异常队列直到超时，这里只等待线程本身
+            threading.Thread.join(self.listener, timeout=max(0.0, timeout - (time.perf_counter() - start)))
+            if self.listener.is_alive():
+                logging.warning(f"监听线程未在 {timeout} 秒内退出")
+        return time.perf_counter() - start
+
+    def periodic_analysis(self):
+        """定期执行分析（由共享调度器在每个窗口边界调用）"""
+        if not self.is_listening or self.stop_event.is_set():
+            self.analysis_job.cancel()
+            self.stopped.set()
+            return
+
+        try:
+            current_time = self.clock.mark('window', self.pipe.cut)
+            elapsed = (current_time - self.last_analysis_time) / 1e9
+            logging.info(f"执行定期分析，已过去 {elapsed:.1f} 秒")
+            self.analyze_period(current_time)
+            self.last_analysis_time = current_time
+        except Exception as e:
+            logging.error(f"定期分析出错: {str(e)}")
+
+    def prune_pending_presses(self, now=None):
+        """丢弃长时间未释放的孤立按键（如焦点切换导致释放事件丢失），需在持有锁时调用"""
+        now = now or self.now_ns()
+        cutoff = now - self.max_hold_ns
+        orphaned = [k for k, t in self.pending_presses.items() if t < cutoff]
+        for code in orphaned:
+            del self.pending_presses[code]
+        if orphaned:
+            logging.debug(f"丢弃孤立按键: {orphaned}")
+        return len(orphaned)
+
+    def analyze_period(self, now=None):
+        """
+        分析当前时间段的数据
+        :param now: 窗口边界或停止时刻（时钟 mark 的返回值），默认当前时间
+        """
+        # 等待窗口边界之前投递的事件处理完毕；分析期间聚合线程停在边界（回调照常投递），
+        # 边界之后的事件计入下一个窗口，各窗口按边界的顺序依次分析和写入
+        with self.pipe.paused():
+            self._analyze_window(now)
+
+    def _analyze_window(self, now):
+        """取走当前窗口的事件，计算并保存指标"""
+        with self.lock:
+            self.prune_pending_presses(now)
+            self.flush_raw_events()
+
+            if not len(self.events):
+                logging.info("没有可分析的事件数据")
+                return
+
+            if self.stop_event.is_set():
+                logging.info("系统已停止，跳过分析")
+                return
+
+            # 取走当前时间段的事件并切换缓冲区
+            batch = self.events.snapshot_and_swap()
+            anchor = self.window_anchor
+            self.window_anchor = ClockAnchor(self.clock)
+            sketch = self.ikd_sketch
+            self.ikd_sketch = KLLSketch()
+            backspace_codes = self.key_table.lookup('backspace', '\x08')
+            space_codes = self.key_table.lookup(' ', 'space')
+
+        # 计算时间段
+        if not len(batch):
+            logging.info("没有可分析的事件数据")
+            return
+
+        first_ns, last_ns = int(batch.t_ns.min()), int(batch.t_ns.max())
+        start_time = anchor.to_datetime(first_ns)
+        end_time = anchor.to_datetime(last_ns)
+        duration = (last_ns - first_ns) / 1e9
+
+        logging.info(f"分析时间段: {start_time} 到 {end_time}, 时长: {duration:.2f}秒, 事件数: {len(batch)}")
+
+        # 计算窗口指标
+        metrics = keyboard_metrics(batch.kind, batch.code, batch.value, backspace_codes, space_codes)
+
+        # 保存分析结果
+        result = {
+            'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'end_time': end_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration_sec': round(duration, 2),
+            'total_keypresses': metrics['total_keypresses'],
+            'median_ikd': round(metrics['median_ikd'], 4),
+            'p95_ikd': round(metrics['p95_ikd'], 4),
+            'mad': round(metrics['mad'], 4),
+            'auto_correction_rate': round(metrics['auto_correction_rate'], 4),
+            'space_rate': round(metrics['space_rate'], 4),
+            'backspace_count': metrics['backspace_count'],
+            'space_count': metrics['space_count']
+        }
+
+        # 保存到内存和文件
+        self.analysis_results.append(result)
+        self.save_analysis_result(result)
+        self.save_sketch(result, sketch)
+
+        logging.info(f"分析完成: 按键次数: {metrics['total_keypresses']}, 时长: {duration:.2f}秒")
+        logging.info(f"- IKD中位数: {metrics['median_ikd']:.4f}s, IKD95%: {metrics['p95_ikd']:.4f}s")
+        logging.info(f"- 空格率: {metrics['space_rate']:.2%}, 退格率: {metrics['auto_correction_rate']:.2%}")
+
+    def flush_raw_events(self):
+        """每个窗口把原始事件写入分段文件（持有锁时调用）"""
+        if self.raw_recorder is not None:
+            try:
+                self.raw_recorder.flush()
+            except Exception as e:
+                logging.error(f"保存原始事件失败: {str(e)}")
+
+    def save_analysis_result(self, result):
+        """保存分析结果到CSV文件"""
+        try:
+            self.writer.append([
+                result['start_time'],
+                result['end_time'],
+                result['duration_sec'],
+                result['total_keypresses'],
+                result['median_ikd'],
+                result['p95_ikd'],
+                result['mad'],
+                result['auto_correction_rate'],
+                result['space_rate'],
+                result['backspace_count'],
+                result['space_count']
+            ])
+            logging.info(f"分析结果已保存到 {self.output_file}")
+        except Exception as e:
+            logging.error(f"保存分析结果失败: {str(e)}")
+
+    def save_sketch(self, result, sketch):
+        """保存窗口的按键时长草图（JSON Lines），供任意时间范围的分位数合并计算"""
+        try:
+            record = {
+                'start_time': result['start_time'],
+                'end_time': result['end_time'],
+                'sketch': sketch.to_dict()
+            }
+            self.sketch_writer.append_line(json.dumps(record))
+        except Exception as e:
+            logging.error(f"保存按键时长草图失败: {str(e)}")
+
+    def run(self):
+        """启动监控系统"""
+        logging.info("键盘监控系统启动")
+        logging.info(f"分析间隔: {self.analysis_interval}秒")
+        logging.info(f"数据文件: {self.output_file}")
+
+        try:
+            self.start_listener()
+
+            # 保持主线程运行，直到监听器停止
+            self.stopped.wait()
+
+        except KeyboardInterrupt:
+            logging.info("用户中断...")
+            self.stop_listener()
+        except Exception as e:
+            logging.error(f"发生未预期错误: {str(e)}")
+            self.stop_listener()
+        finally:
             logging.info("键盘监控系统已停止")
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+键鼠行为指标计算内核
+功能：
+1. 直接在事件缓冲区的列式数组上计算窗口指标（仅依赖 NumPy）
+2. 不依赖监听器与监控器状态，可用于实时分析、离线重算和基准测试
+3. 提供在线累加器，在事件到达时增量更新指标，窗口结束时 O(1) 出结果
+"""
+
+import math
+from bisect import bisect_right
+
+import numpy as np
+
+from monitoring.event_buffer import EVENT_KEY_DOWN, EVENT_KEY_RELEASE
+
+
+def keyboard_metrics(kind, code, value, backspace_codes=(), space_codes=()):
+    """
+    计算键盘窗口指标（未取整）
+    :param kind: 事件类型数组
+    :param code: 按键编码数组
+    :param value: 附加值数组（按键释放事件为按住时长，纳秒）
+    :param backspace_codes: 退格键对应的编码
+    :param space_codes: 空格键对应的编码
+    :return: 与 CSV 列同名的指标字典
+    """
+    key_down = kind == EVENT_KEY_DOWN
+    down_codes = code[key_down]
+
+    # 1. 按键总次数
+    total_keypresses = len(down_codes)
+
+    # 2. 键盘延迟指标（按住时长按毫秒精度取整后统计）
+    durations = np.round(value[kind == EVENT_KEY_RELEASE] / 1e9, 3)
+    if len(durations) > 0:
+        median_ikd = np.median(durations)
+        p95_ikd = np.percentile(durations, 95)
+        mad = np.median(np.abs(durations - median_ikd))
+    else:
+        median_ikd = 0
+        p95_ikd = 0
+        mad = 0
+
+    # 3. 自动更正率（退格键使用率）与空格率
+    backspace_count = int(np.count_nonzero(np.isin(down_codes, backspace_codes)))
+    space_count = int(np.count_nonzero(np.isin(down_codes, space_codes)))
+
+    return {
+        'total_keypresses': total_keypresses,
+        'median_ikd': median_ikd,
+        'p95_ikd': p95_ikd,
+        'mad': mad,
+        'auto_correction_rate': backspace_count / total_keypresses if total_keypresses > 0 else 0,
+        'space_rate': space_count / total_keypresses if total_keypresses > 0 else 0,
+        'backspace_count': backspace_count,
+        'space_count': space_count
+    }
+
+
+def mouse_metrics(x, y, t_ns):
+    """
+    一次向量化遍历计算鼠标移动指标
+    :param x: 移动事件的横坐标数组
+    :param y: 移动事件的纵坐标数组
+    :param t_ns: 移动事件的时间戳数组（纳秒）
+    :return: 包含 move_entropy、effective_path_ratio、avg_speed、acceleration_variance、total_distance 的字典
+    """
+    result = {
+        'move_entropy': 0.0,
+        'effective_path_ratio': 0.0,
+        'avg_speed': 0.0,
+        'acceleration_variance': 0.0,
+        'total_distance': 0.0
+    }
+    if len(x) < 2:
+        return result
+
+    # 相邻移动事件之间的位移、距离和时间间隔
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    dx = np.diff(x)
+    dy = np.diff(y)
+    dt = np.diff(t_ns) / 1e9
+    distances = np.sqrt(dx ** 2 + dy ** 2)
+    total_distance = float(distances.sum())
+    result['total_distance'] = total_distance
+
+    # 移动熵：非零位移的方向角分为8个区间
+    moved = (dx != 0) | (dy != 0)
+    if moved.any():
+        hist, _ = np.histogram(np.arctan2(dy[moved], dx[moved]), bins=np.linspace(-np.pi, np.pi, 9))
+        probs = hist[hist > 0] / hist.sum()
+        result['move_entropy'] = float(-np.sum(probs * np.log2(probs)))
+
+    # 有效路径比：起点到终点的直线距离 / 总移动距离
+    if total_distance != 0:
+        direct_distance = np.sqrt((x[-1] - x[0]) ** 2 + (y[-1] - y[0]) ** 2)
+        result['effective_path_ratio'] = float(direct_distance / total_distance)
+
+    # 平均速度（像素/秒）
+    time_span = (t_ns[-1] - t_ns[0]) / 1e9
+    if time_span != 0:
+        result['avg_speed'] = float(total_distance / time_span)
+
+    # 加速度方差：只取位移和时间间隔都非零的移动，相邻两个速度之差除以后一个速度的时间间隔
+    # （与 MouseStats.add_move 的在线计算定义相同）
+    valid = (distances > 0) & (dt > 0)
+    if np.count_nonzero(valid) >= 2:
+        step_dt = dt[valid]
+        speeds = distances[valid] / step_dt
+        accelerations = np.diff(speeds) / step_dt[1:]
+        result['acceleration_variance'] = float(np.var(accelerations))
+
+    return result
+
+
+# 移动方向直方图的区间边界（与 mouse_metrics 中 np.histogram 的分箱一致）
+DIRECTION_BINS = np.linspace(-np.pi, np.pi, 9).tolist()
+
+
+class MouseStats:
+    """
+    鼠标窗口指标的在线累加器
+    维护8区间方向直方图、路径长度、加速度的 Welford 方差以及点击/滚动计数，
+    不需要保存原始事件即可得到窗口指标
+
+    移动事件合并（move_quantum）：与上一个采样点相隔不足 interval_ms 或距离不足 distance 像素的移动事件
+    不保留为采样点（add_move 返回 False，监控器不把它放入原始事件缓冲），采样频率取决于有效移动而不是鼠标回报率。
+    所有指标（包括速度与加速度）仍逐事件精确累加，与不合并时完全相同
+    """
+
+    def __init__(self, move_quantum=None):
+        """
+        :param move_quantum: (interval_ms, distance) 移动事件合并的时间/距离量子，None 表示不合并
+        """
+        self.direction_hist = [0] * 8
+        self.path_length = 0.0
+        self.move_count = 0
+        self.sample_count = 0  # 作为采样点保留的移动事件数（不合并时等于 move_count）
+        self.click_count = 0
+        self.scroll_count = 0
+        self.first_time = None  # 窗口内最早事件的时间戳（纳秒）
+        self.last_time = None  # 窗口内最晚事件的时间戳（纳秒）
+        self.first_move = None  # 首个移动事件 (t_ns, x, y)
+        self.last_move = None  # 最近移动事件 (t_ns, x, y)
+        self.last_speed = 0.0  # 最近一次非零速度
+        self.acc_count = 0
+        self.acc_mean = 0.0
+        self.acc_m2 = 0.0
+        self.coalescing = bool(move_quantum and any(move_quantum))
+        if self.coalescing:
+            interval_ms, distance = move_quantum
+            self.sample_interval_ns = int(interval_ms * 1e6)
+            self.sample_distance_sq = distance * distance
+            self.sample = None  # 最近采样点 (t_ns, x, y)
+
+    def __len__(self):
+        return self.move_count + self.click_count + self.scroll_count
+
+    def _touch(self, t_ns):
+        if self.first_time is None:
+            self.first_time = t_ns
+        self.last_time = t_ns
+
+    def add_move(self, t_ns, x, y):
+        """
+        累加一个移动事件
+        :return: 该事件是否作为采样点保留（未启用合并时总是 True）
+        """
+        self._touch(t_ns)
+        self.move_count += 1
+        if self.last_move is None:
+            self.first_move = self.last_move = (t_ns, x, y)
+            self.sample_count += 1
+            if self.coalescing:
+                self.sample = (t_ns, x, y)
+            return True
+
+        last_t, last_x, last_y = self.last_move
+        self.last_move = (t_ns, x, y)
+        dx = x - last_x
+        dy = y - last_y
+        if dx or dy:
+            distance = math.sqrt(dx * dx + dy * dy)
+            self.path_length += distance
+            bin_index = bisect_right(DIRECTION_BINS, math.atan2(dy, dx)) - 1
+            self.direction_hist[min(bin_index, 7)] += 1
+
+            time_diff = (t_ns - last_t) / 1e9
+            if time_diff > 0:
+                speed = distance / time_diff
+                if self.last_speed > 0:
+                    # Welford 在线方差
+                    acceleration = (speed - self.last_speed) / time_diff
+                    self.acc_count += 1
+                    delta = acceleration - self.acc_mean
+                    self.acc_mean += delta / self.acc_count
+                    self.acc_m2 += delta * (acceleration - self.acc_mean)
+                self.last_speed = speed
+
+        if self.coalescing:
+            return self._keep_sample(t_ns, x, y)
+        self.sample_count += 1
+        return True
+
+    def _keep_sample(self, t_ns, x, y):
+        """合并模式：离开上一个采样点的时间和距离量子时保留为新采样点"""
+        sample_t, sample_x, sample_y = self.sample
+        dx = x - sample_x
+        dy = y - sample_y
+        if t_ns - sample_t < self.sample_interval_ns or dx * dx + dy * dy < self.sample_distance_sq:
+            return False
+        self.sample = (t_ns, x, y)
+        self.sample_count += 1
+        return True
+
+    @property
+    def reduction_ratio(self):
+        """合并掉的移动事件比例（0 表示没有合并）"""
+        return 1 - self.sample_count / self.move_count if self.move_count else 0.0
+
+    def add_click(self, t_ns, pressed):
+        """累加一个点击事件（只统计按下）"""
+        self._touch(t_ns)
+        if pressed:
+            self.click_count += 1
+
+    def add_scroll(self, t_ns):
+        """累加一个滚动事件"""
+        self._touch(t_ns)
+        self.scroll_count += 1
+
+    def result(self):
+        """返回与 mouse_metrics 同名的指标，以及点击和滚动次数"""
+        result = {
+            'move_entropy': 0.0,
+            'effective_path_ratio': 0.0,
+            'avg_speed': 0.0,
+            'acceleration_variance': 0.0,
+            'total_distance': self.path_length,
+            'click_count': self.click_count,
+            'scroll_count': self.scroll_count
+        }
+
+        total = sum(self.direction_hist)
+        if total:
+            result['move_entropy'] = -sum(n / total * math.log2(n / total) for n in self.direction_hist if n)
+
+        if self.move_count >= 2 and self.path_length != 0:
+            (first_t, first_x, first_y), (last_t, last_x, last_y) = self.first_move, self.last_move
+            direct_distance = math.sqrt((last_x - first_x) ** 2 + (last_y - first_y) ** 2)
+            result['effective_path_ratio'] = direct_distance / self.path_length
+            if last_t != first_t:
+                result['avg_speed'] = self.path_length / ((last_t - first_t) / 1e9)
+
+        if self.acc_count:
+            result['acceleration_variance'] = self.acc_m2 / self.acc_count
+
+        return result
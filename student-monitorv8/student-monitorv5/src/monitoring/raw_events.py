@@ -0,0 +1,253 @@
+"""
+原始键鼠事件的二进制记录与内存映射读取
+功能：
+1. RawEventRecorder：把进入监控器窗口分析的每条原始事件追加为定长二进制记录，
+   按会话（每次启动监听）分目录、按记录数滚动分段文件
+2. 读取端用 np.memmap 直接映射分段文件，各列是零拷贝的 NumPy 视图，
+   可直接交给 monitoring.metrics 在数周的原始数据上向量化重算任意指标，无需重新采集
+3. 监控器通过 raw_dir 参数启用（Web 应用和 run_monitors 读取环境变量 MONITOR_RAW_DIR）
+
+目录结构：
+    <raw_dir>/<device>_<启动时间>/session.json        设备、格式版本、按键/按钮编码表
+    <raw_dir>/<device>_<启动时间>/segment_000000.bin  定长文件头 + 定长记录
+
+记录格式（小端，RECORD_SIZE 字节，各列含义与 event_buffer.EventBuffer 相同）：
+    t_ns   int64  单调时钟纳秒时间戳
+    kind   uint8  事件类型编码（EVENT_*）
+    flags  uint8  标志位（FLAG_*）
+    code   int16  按键/按钮编码（见 session.json 的 codes），滚动事件为水平滚动量 dx
+    x, y   int32  鼠标坐标
+    value  int64  按键释放为按住时长（纳秒），点击为是否按下（1/0），滚动为垂直滚动量 dy
+"""
+
+import json
+import os
+import struct
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from monitoring.event_buffer import EventBatch
+
+FORMAT_VERSION = 1
+MAGIC = b'SMRAWEV\x00'
+
+RECORD_DTYPE = np.dtype([
+    ('t_ns', '<i8'),
+    ('kind', 'u1'),
+    ('flags', 'u1'),
+    ('code', '<i2'),
+    ('x', '<i4'),
+    ('y', '<i4'),
+    ('value', '<i8'),
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+_RECORD = struct.Struct('<qBBhiiq')
+assert _RECORD.size == RECORD_SIZE
+
+# 文件头：魔数、格式版本、记录长度、分段序号、锚点墙上时间（1970-01-01 起的本地微秒数）、锚点单调时钟纳秒
+_HEADER = struct.Struct('<8sHHiqq')
+HEADER_SIZE = 64
+
+# 标志位
+FLAG_PRESSED = 0x01  # 鼠标点击：按下
+FLAG_REPEAT = 0x02  # 键盘按下：按住不放时系统自动重复触发
+
+SESSION_FILE = 'session.json'
+SEGMENT_PATTERN = 'segment_{:06d}.bin'
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def new_session_dir(raw_dir, device):
+    """返回本次会话的目录 <raw_dir>/<device>_<启动时间>（同一秒内重复启动时追加序号）"""
+    base = os.path.join(raw_dir, f"{device}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    path, n = base, 1
+    while os.path.exists(path):
+        path = f"{base}_{n}"
+        n += 1
+    return path
+
+
+class RawEventRecorder:
+    """定长二进制原始事件记录器（非线程安全，由调用方加锁）"""
+
+    def __init__(self, directory, device, anchor, code_table=None,
+                 segment_records=1 << 20, buffer_records=4096):
+        """
+        :param directory: 会话目录（见 new_session_dir）
+        :param device: keyboard / mouse
+        :param anchor: 监控器的时钟锚点（ClockAnchor），写入每个分段的文件头，用于把 t_ns 换算为墙上时间
+        :param code_table: 监控器的 CodeTable，编码表随刷新写入 session.json
+        :param segment_records: 每个分段文件最多的记录数
+        :param buffer_records: 内存缓冲的记录数，写满或窗口分析时刷新到文件
+        """
+        self.directory = directory
+        self.device = device
+        self.wall_us = (anchor.wall - _EPOCH) // timedelta(microseconds=1)
+        self.mono_ns = anchor.mono_ns
+        self.code_table = code_table
+        self.segment_records = segment_records
+        self.buffer_records = buffer_records
+        self.buffer = bytearray(buffer_records * RECORD_SIZE)
+        self.count = 0  # 缓冲中的记录数
+        self.file = None
+        self.segment_index = -1
+        self.segment_count = 0  # 当前分段已写入的记录数
+        self.records_written = 0
+        self.saved_codes = -1  # 已写入 session.json 的编码数
+
+        os.makedirs(directory, exist_ok=True)
+        self._save_session()
+
+    def append(self, t_ns, kind, code=0, x=0, y=0, value=0, flags=0):
+        """追加一条事件"""
+        _RECORD.pack_into(self.buffer, self.count * RECORD_SIZE, t_ns, kind, flags, code, int(x), int(y), value)
+        self.count += 1
+        if self.count == self.buffer_records:
+            self.flush()
+
+    def _open_segment(self):
+        if self.file is not None:
+            self.file.close()
+        self.segment_index += 1
+        self.segment_count = 0
+        self.file = open(os.path.join(self.directory, SEGMENT_PATTERN.format(self.segment_index)), 'wb')
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, RECORD_SIZE, self.segment_index, self.wall_us, self.mono_ns)
+        self.file.write(header.ljust(HEADER_SIZE, b'\x00'))
+
+    def flush(self):
+        """把缓冲中的记录写入分段文件（写满的分段自动滚动到下一个文件）"""
+        if self.count:
+            data = memoryview(self.buffer)[:self.count * RECORD_SIZE]
+            offset = 0
+            while offset < len(data):
+                if self.file is None or self.segment_count >= self.segment_records:
+                    self._open_segment()
+                n = min(self.segment_records - self.segment_count, (len(data) - offset) // RECORD_SIZE)
+                self.file.write(data[offset:offset + n * RECORD_SIZE])
+                offset += n * RECORD_SIZE
+                self.segment_count += n
+            self.file.flush()
+            self.records_written += self.count
+            self.count = 0
+        self._save_session()
+
+    def _save_session(self):
+        codes = self.code_table.names if self.code_table is not None else []
+        if len(codes) == self.saved_codes:
+            return
+        path = os.path.join(self.directory, SESSION_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'device': self.device, 'version': FORMAT_VERSION, 'codes': codes}, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+        self.saved_codes = len(codes)
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_header(path):
+    """读取分段文件头：返回 (分段序号, 锚点墙上时间, 锚点单调时钟纳秒)"""
+    with open(path, 'rb') as f:
+        magic, version, record_size, index, wall_us, mono_ns = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC or record_size != RECORD_SIZE:
+        raise ValueError(f"不是有效的原始事件分段文件: {path}")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"不支持的原始事件格式版本 {version}: {path}")
+    return index, _EPOCH + timedelta(microseconds=wall_us), mono_ns
+
+
+def open_segment(path):
+    """
+    以只读内存映射打开分段文件，返回结构化数组（dtype 为 RECORD_DTYPE）
+    文件末尾不完整的记录（写入中途崩溃）被忽略；没有记录时返回空数组
+    """
+    records = (os.path.getsize(path) - HEADER_SIZE) // RECORD_SIZE
+    if records <= 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(records,))
+
+
+def as_batch(records):
+    """结构化记录数组 -> EventBatch（各列为零拷贝视图，可直接交给 monitoring.metrics）"""
+    return EventBatch({name: records[name] for name in RECORD_DTYPE.names})
+
+
+class RawSession:
+    """一个会话目录的只读视图"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, SESSION_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.device = meta['device']
+        self.codes = meta['codes']
+        self.segment_paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.startswith('segment_') and name.endswith('.bin')
+        )
+        if self.segment_paths:
+            _, self.wall, self.mono_ns = read_header(self.segment_paths[0])
+        else:
+            self.wall, self.mono_ns = None, 0
+
+    def __len__(self):
+        return sum(len(open_segment(path)) for path in self.segment_paths)
+
+    def lookup(self, *names):
+        """返回名称对应的编码列表（与 CodeTable.lookup 相同）"""
+        return [self.codes.index(name) for name in names if name in self.codes]
+
+    def to_datetime(self, t_ns):
+        return self.wall + timedelta(microseconds=(int(t_ns) - self.mono_ns) // 1000)
+
+    def segments(self):
+        """逐个分段返回内存映射的结构化数组（零拷贝）"""
+        for path in self.segment_paths:
+            records = open_segment(path)
+            if len(records):
+                yield records
+
+    def batches(self):
+        """逐个分段返回 EventBatch（零拷贝）"""
+        for records in self.segments():
+            yield as_batch(records)
+
+    def records(self):
+        """整个会话的结构化数组：只有一个分段时为零拷贝映射，多个分段时拼接"""
+        segments = list(self.segments())
+        if len(segments) == 1:
+            return segments[0]
+        return np.concatenate(segments) if segments else np.empty(0, dtype=RECORD_DTYPE)
+
+    def events(self, start_ns=None, end_ns=None):
+        """
+        整个会话（或 [start_ns, end_ns) 时间段）的 EventBatch
+        时间戳按记录顺序单调递增，时间段用二分查找定位
+        """
+        records = self.records()
+        if start_ns is not None or end_ns is not None:
+            t_ns = records['t_ns']
+            lo = 0 if start_ns is None else int(np.searchsorted(t_ns, start_ns))
+            hi = len(records) if end_ns is None else int(np.searchsorted(t_ns, end_ns))
+            records = records[lo:hi]
+        return as_batch(records)
+
+
+def list_sessions(raw_dir, device=None):
+    """按启动时间顺序列出 raw_dir 下的会话（可按设备筛选）"""
+    if not os.path.isdir(raw_dir):
+        return []
+    sessions = []
+    for name in sorted(os.listdir(raw_dir), key=lambda name: name.partition('_')[2]):
+        directory = os.path.join(raw_dir, name)
+        if not os.path.isfile(os.path.join(directory, SESSION_FILE)):
+            continue
+        if device is not None and not name.startswith(f"{device}_"):
+            continue
+        sessions.append(RawSession(directory))
+    return sessions
@@ -0,0 +1,205 @@
+"""
+按用户管理的监控器注册表
+功能：
+1. 每个用户一个监控会话：独立的停止事件、独立的键盘/鼠标/情绪监控器
+2. 一个用户启动或停止监控不影响其他用户，同一进程可并行运行多个学生的监控
+3. 按用户名直接查找会话，状态查询不随在线用户数增长
+4. 停止时通知各监控器并等待其线程退出（有上限），返回每个监控器的实际停止耗时
+5. 监控器模块（numpy、pynput、tkinter）按需导入；可在启动时于后台预加载
+"""
+
+import importlib
+import logging
+import threading
+import time
+from datetime import datetime
+
+MONITOR_TYPES = ('keyboard', 'mouse', 'emotion')
+
+# 监控器类型 -> (模块, 类名)，首次使用时才导入
+MONITOR_CLASSES = {
+    'keyboard': ('monitoring.keyboard_monitor', 'KeyboardMonitor'),
+    'mouse': ('monitoring.mouse_monitor', 'MouseMonitor'),
+    'emotion': ('monitoring.emotion_monitor', 'EmotionMonitor')
+}
+
+# 启动时预加载的模块：键盘/鼠标监控器（含 numpy）和 pynput 输入后端；tkinter 只有弹出量表时才需要，不预加载
+PRELOAD_MODULES = (
+    'monitoring.keyboard_monitor',
+    'monitoring.mouse_monitor',
+    'pynput.keyboard',
+    'pynput.mouse'
+)
+
+
+def monitor_class(monitor_type):
+    """按需导入并返回监控器类"""
+    module_name, class_name = MONITOR_CLASSES[monitor_type]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def preload(modules=PRELOAD_MODULES):
+    """
+    预先导入监控器依赖，使第一次启动监控不必等待导入
+    :return: 模块名 -> 导入耗时（秒），导入失败的为 None
+    """
+    timings = {}
+    for module_name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module_name)
+            timings[module_name] = time.perf_counter() - start
+        except Exception as e:
+            logging.error(f"预加载 {module_name} 失败: {str(e)}")
+            timings[module_name] = None
+    logging.info(f"监控器模块预加载完成: {timings}")
+    return timings
+
+
+# 监控器类型 -> 表示正在监听的属性
+LISTENING_ATTRS = {
+    'keyboard': 'is_listening',
+    'mouse': 'is_listening',
+    'emotion': 'is_running'
+}
+
+
+class MonitorSession:
+    """单个用户的监控会话"""
+
+    def __init__(self, username):
+        self.username = username
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.monitors = dict.fromkeys(MONITOR_TYPES)
+        self.threads = {}  # 监控器类型 -> 运行 monitor.run() 的线程
+        self.start_time = None
+
+    def get(self, monitor_type):
+        return self.monitors.get(monitor_type)
+
+    def add(self, monitor_type, monitor, run=True):
+        """
+        登记监控器，同类型的旧监控器先停止
+        :param run: 是否在后台线程中运行 monitor.run()
+        """
+        with self.lock:
+            previous = self.monitors[monitor_type]
+            previous_thread = self.threads.pop(monitor_type, None)
+            self.monitors[monitor_type] = monitor
+            if self.start_time is None:
+                self.start_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        if previous is not None and previous is not monitor:
+            self._stop_monitor(monitor_type, previous, previous_thread)
+
+        if run:
+            thread = threading.Thread(target=monitor.run, name=f"{monitor_type}-{self.username}")
+            thread.daemon = True
+            thread.start()
+            with self.lock:
+                self.threads[monitor_type] = thread
+        return monitor
+
+    def is_active(self, monitor_type):
+        monitor = self.monitors.get(monitor_type)
+        return monitor is not None and bool(getattr(monitor, LISTENING_ATTRS[monitor_type], False))
+
+    def status(self):
+        """各监控器的运行状态（与 /api/status 返回格式一致）"""
+        return {
+            monitor_type: {
+                'running': self.monitors[monitor_type] is not None,
+                'listening': self.is_active(monitor_type)
+            }
+            for monitor_type in MONITOR_TYPES
+        }
+
+    def _stop_monitor(self, monitor_type, monitor, thread=None, timeout=2):
+        """
+        停止单个监控器并等待其运行线程退出
+        :return: 停止耗时（秒），失败时返回 None
+        """
+        stop = getattr(monitor, 'stop', None)
+        if not callable(stop):
+            logging.warning(f"{monitor_type} 监控器没有 stop 方法")
+            return None
+        start = time.perf_counter()
+        try:
+            logging.info(f"正在停止用户 {self.username} 的 {monitor_type} 监控器...")
+            stop(timeout)
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=max(0.0, timeout - (time.perf_counter() - start)))
+                if thread.is_alive():
+                    logging.warning(f"{monitor_type} 监控线程未在 {timeout} 秒内退出")
+        except Exception as e:
+            logging.error(f"停止 {monitor_type} 监控器时出错: {str(e)}")
+            return None
+        elapsed = time.perf_counter() - start
+        logging.info(f"成功停止 {monitor_type} 监控器，耗时 {elapsed * 1000:.1f} 毫秒")
+        return elapsed
+
+    def stop(self, timeout=2):
+        """
+        停止该用户的全部监控器（各监控器最多等待 timeout 秒）
+        :return: 监控器类型 -> 停止耗时（秒），停止失败的为 None
+        """
+        with self.lock:
+            stop_event = self.stop_event
+            monitors = [(t, m, self.threads.get(t)) for t, m in self.monitors.items() if m is not None]
+            self.monitors = dict.fromkeys(MONITOR_TYPES)
+            self.threads = {}
+            self.start_time = None
+            # 换用新的停止事件：尚未退出的旧线程仍能看到已置位的事件，下次启动不受影响
+            self.stop_event = threading.Event()
+
+        stop_event.set()
+        return {
+            monitor_type: self._stop_monitor(monitor_type, monitor, thread, timeout)
+            for monitor_type, monitor, thread in monitors
+        }
+
+
+class MonitorRegistry:
+    """用户名 -> 监控会话"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+
+    def get(self, username):
+        """返回用户的监控会话，没有时返回 None"""
+        return self.sessions.get(username)
+
+    def session(self, username):
+        """返回用户的监控会话，没有时新建"""
+        with self.lock:
+            monitor_session = self.sessions.get(username)
+            if monitor_session is None:
+                monitor_session = self.sessions[username] = MonitorSession(username)
+            return monitor_session
+
+    def status(self, username):
+        monitor_session = self.get(username)
+        if monitor_session is None:
+            return {monitor_type: {'running': False, 'listening': False} for monitor_type in MONITOR_TYPES}
+        return monitor_session.status()
+
+    def stop(self, username, timeout=2):
+        """
+        停止并移除用户的监控会话
+        :return: 监控器类型 -> 停止耗时（秒），停止失败的为 None
+        """
+        with self.lock:
+            monitor_session = self.sessions.pop(username, None)
+        if monitor_session is None:
+            return {}
+        return monitor_session.stop(timeout)
+
+    def stop_all(self, timeout=2):
+        with self.lock:
+            usernames = list(self.sessions)
+        return {username: self.stop(username, timeout) for username in usernames}
+
+    def __len__(self):
+        return len(self.sessions)
@@ -0,0 +1,219 @@
+"""
+无界面回放：把录制的输入事件离线送入监控器
+功能：
+1. ReplayInput 实现与 LiveInput 相同的输入源接口，读取 RecordingInput 录制的 JSON Lines 文件
+2. 事件经由监控器自己的回调（on_press / on_move ...）、聚合线程和 analyze_period 处理，
+   时间来自虚拟时钟：回调时间戳、窗口边界、停止时刻和时钟锚点都取自录制文件，
+   因此输出的 CSV 与录制时的实时运行逐字节一致
+3. 可全速回放（性能测试、服务器上重新分析），也可按录制时的节奏实时回放
+
+用法（在 src 目录下）：
+    python -m monitoring.replay 录制文件.jsonl 输出.csv [--realtime] [--speed 倍数]
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class VirtualClock:
+    """回放时钟：当前时间由回放线程按录制的时间戳推进，锚点按录制顺序依次返回"""
+
+    def __init__(self, anchors):
+        """
+        :param anchors: 录制的锚点 [(墙上时间, 单调时钟纳秒), ...]，按录制顺序
+        """
+        self.t = anchors[0][1] if anchors else 0
+        self.anchors = list(anchors)
+        self.next_anchor = 0
+        self.last_anchor = self.anchors[0] if self.anchors else (datetime.now(), self.t)
+
+    def now_ns(self):
+        return self.t
+
+    def anchor(self):
+        if self.next_anchor < len(self.anchors):
+            self.last_anchor = self.anchors[self.next_anchor]
+            self.next_anchor += 1
+            return self.last_anchor
+        # 录制中没有更多锚点（例如用不同参数回放），按上一个锚点推算
+        wall, mono_ns = self.last_anchor
+        return wall + timedelta(microseconds=(self.t - mono_ns) // 1000), self.t
+
+    def mark(self, kind, cut=None):
+        if cut is not None:
+            cut()
+        return self.t
+
+
+class ReplayKey:
+    """回放的按键/按钮：与 pynput 对象一样提供 char 属性和 str()"""
+
+    __slots__ = ('char', 'name')
+
+    def __init__(self, char=None, name=None):
+        self.char = char
+        self.name = name
+
+    def __str__(self):
+        return self.name if self.char is None else self.char
+
+    __repr__ = __str__
+
+
+class ReplayJob:
+    """回放中的窗口分析任务，由录制的窗口边界触发"""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class ReplayListener(threading.Thread):
+    """按录制顺序调用回调的监听线程（接口与 pynput 监听器相同）"""
+
+    def __init__(self, source, callbacks):
+        super().__init__(name=f"replay-{source.device}", daemon=True)
+        self.source = source
+        self.callbacks = callbacks
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        source = self.source
+        clock = source.clock
+        first_t = None
+        started = time.perf_counter()
+
+        for record in source.records:
+            if not self.running:
+                break
+            if 'anchor' in record:
+                continue
+
+            clock.t = record['t']
+            if source.realtime:
+                if first_t is None:
+                    first_t = record['t']
+                delay = (record['t'] - first_t) / 1e9 / source.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+            if 'e' in record:
+                callback = self.callbacks.get(record['e'])
+                if callback is not None and callback(*map(source.decode_arg, record['a'])) is False:
+                    break  # 与 pynput 相同：回调返回 False 时停止监听
+            elif record.get('m') == 'window':
+                for job in list(source.jobs):
+                    if not job.cancelled:
+                        job.callback()
+            elif record.get('m') == 'stop':
+                break
+
+        self.running = False
+
+
+class ReplayInput:
+    """录制文件输入源"""
+
+    def __init__(self, path, realtime=False, speed=1.0):
+        """
+        :param path: RecordingInput 录制的 JSON Lines 文件
+        :param realtime: 是否按录制时的节奏回放（默认全速）
+        :param speed: 实时回放的倍速
+        """
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.keys = {}
+        self.jobs = []
+        self.listener_thread = None
+
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        if not lines or 'device' not in lines[0]:
+            raise ValueError(f"不是有效的录制文件: {path}")
+        self.device = lines[0]['device']
+        self.records = lines[1:]
+        self.clock = VirtualClock([
+            (datetime.fromisoformat(record['anchor']), record['t']) for record in self.records if 'anchor' in record
+        ])
+
+    def decode_arg(self, value):
+        """录制的参数还原为回调参数；同名按键/按钮返回同一对象，可用 == 比较"""
+        if not isinstance(value, dict):
+            return value
+        key = (value.get('char'), value.get('name'))
+        replay_key = self.keys.get(key)
+        if replay_key is None:
+            replay_key = self.keys[key] = ReplayKey(*key)
+        return replay_key
+
+    def listener(self, **callbacks):
+        self.listener_thread = ReplayListener(self, callbacks)
+        return self.listener_thread
+
+    def call_every(self, interval, callback, name=None):
+        job = ReplayJob(callback)
+        self.jobs.append(job)
+        return job
+
+    @property
+    def esc_key(self):
+        return self.decode_arg({'name': 'Key.esc'})
+
+    def close(self):
+        pass
+
+    def run(self, monitor):
+        """
+        用本输入源驱动监控器直到录制结束，然后在录制的停止时刻停止监控器（执行最后一次分析）
+        :param monitor: 以 input_source=self 创建的 KeyboardMonitor / MouseMonitor
+        """
+        monitor.start_listener()
+        if self.listener_thread is not None:
+            self.listener_thread.join()
+        if monitor.is_listening:
+            monitor.stop_listener()
+        return monitor
+
+
+def create_monitor(source, output_file, **kwargs):
+    """按录制文件的设备类型创建以 source 为输入的监控器"""
+    if source.device == 'keyboard':
+        from monitoring.keyboard_monitor import KeyboardMonitor
+        return KeyboardMonitor(output_file=output_file, input_source=source, **kwargs)
+    from monitoring.mouse_monitor import MouseMonitor
+    return MouseMonitor(output_file=output_file, input_source=source, **kwargs)
+
+
+def replay_file(path, output_file, realtime=False, speed=1.0, **kwargs):
+    """
+    回放录制文件，分析结果写入 output_file
+    :param kwargs: 传给监控器的其他参数（应与录制时一致，例如 max_hold_seconds）
+    :return: 回放后的监控器（analysis_results 为各窗口的分析结果）
+    """
+    source = ReplayInput(path, realtime=realtime, speed=speed)
+    return source.run(create_monitor(source, output_file, **kwargs))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="回放录制的键鼠输入并重新分析")
+    parser.add_argument('recording', help="录制文件（JSON Lines）")
+    parser.add_argument('output', help="分析结果 CSV 文件")
+    parser.add_argument('--realtime', action='store_true', help="按录制时的节奏回放（默认全速）")
+    parser.add_argument('--speed', type=float, default=1.0, help="实时回放的倍速")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    monitor = replay_file(args.recording, args.output, realtime=args.realtime, speed=args.speed)
+    print(f"回放完成: {len(monitor.analysis_results)} 个窗口，耗时 {time.perf_counter() - start:.2f} 秒 -> {args.output}")
@@ -0,0 +1,153 @@
+"""
+监控器共享的事件驱动调度器
+功能：
+1. 用一个最小堆保存所有监控器的定时任务（窗口分析、情绪量表弹出等）
+2. 单个调度线程通过 Event.wait(timeout) 睡眠到最近的截止时间，空闲时不轮询
+3. 到期任务交给小型线程池执行，周期任务按固定截止时间推进，窗口边界不漂移
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ScheduledJob:
+    """调度器中的一个任务，可随时取消"""
+
+    def __init__(self, scheduler, callback, deadline, interval=None, name=None):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.deadline = deadline  # time.monotonic() 截止时间
+        self.interval = interval  # 周期（秒），None 表示一次性任务
+        self.name = name or getattr(callback, '__qualname__', repr(callback))
+        self.cancelled = False
+        self.running = False
+
+    def cancel(self):
+        """取消任务（已在执行中的本次调用不受影响）"""
+        if not self.cancelled:
+            self.cancelled = True
+            self.scheduler.wakeup()
+
+    def run(self):
+        try:
+            self.callback()
+        except Exception as e:
+            logging.error(f"调度任务 {self.name} 执行出错: {str(e)}")
+        finally:
+            self.running = False
+
+
+class Scheduler:
+    def __init__(self, max_workers=4, name="monitor-scheduler"):
+        """
+        :param max_workers: 执行到期任务的线程数
+        :param name: 调度线程名称
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+                self._thread = threading.Thread(target=self.run, name=self.name)
+                self._thread.daemon = True
+                self._thread.start()
+        return self
+
+    def shutdown(self, timeout=2):
+        """停止调度线程，等待正在执行的任务结束"""
+        self._stop_event.set()
+        self.wakeup()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def wakeup(self):
+        self._wakeup.set()
+
+    def __len__(self):
+        with self._lock:
+            return sum(1 for _, _, job in self._heap if not job.cancelled)
+
+    def _push(self, job):
+        with self._lock:
+            heapq.heappush(self._heap, (job.deadline, next(self._counter), job))
+        self.wakeup()
+        return job
+
+    def call_later(self, delay, callback, name=None):
+        """delay 秒后执行一次 callback"""
+        return self._push(ScheduledJob(self, callback, time.monotonic() + delay, name=name))
+
+    def call_every(self, interval, callback, first_delay=None, name=None):
+        """
+        每 interval 秒执行一次 callback
+        :param first_delay: 首次执行前的延迟（秒），默认等于 interval
+        """
+        delay = interval if first_delay is None else first_delay
+        return self._push(ScheduledJob(self, callback, time.monotonic() + delay, interval=interval, name=name))
+
+    def run(self):
+        """调度线程主循环：睡眠到最近的截止时间，取出到期任务交给线程池"""
+        while not self._stop_event.is_set():
+            due = []
+            with self._lock:
+                now = time.monotonic()
+                while self._heap and (self._heap[0][2].cancelled or self._heap[0][0] <= now):
+                    _, _, job = heapq.heappop(self._heap)
+                    if not job.cancelled:
+                        due.append(job)
+                timeout = self._heap[0][0] - now if self._heap else None
+
+            for job in due:
+                self._dispatch(job, now)
+
+            if due:
+                continue
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def _dispatch(self, job, now):
+        # 上一次调用尚未结束时跳过本次，避免同一监控器的分析并发执行
+        if not job.running:
+            job.running = True
+            try:
+                self._executor.submit(job.run)
+            except RuntimeError:
+                job.running = False
+                return
+
+        if job.interval is not None and not job.cancelled:
+            # 固定截止时间推进；若已落后多个周期则直接跳到下一个未来的边界
+            job.deadline += job.interval
+            if job.deadline <= now:
+                missed = int((now - job.deadline) // job.interval) + 1
+                job.deadline += missed * job.interval
+            self._push(job)
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler():
+    """返回进程内共享的调度器（首次调用时启动）"""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = Scheduler()
+        return _default_scheduler.start()
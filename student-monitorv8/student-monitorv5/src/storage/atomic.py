@@ -0,0 +1,29 @@
+"""
+原子写入工具
+功能：先写入同目录下的临时文件并刷新到磁盘，再用 os.replace 替换目标文件，
+读取方不会看到写了一半的内容
+"""
+
+import json
+import os
+import tempfile
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """以原子方式把 data 写成 JSON 文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,140 @@
+"""
+监控数据存储接口
+功能：
+1. 统一 Web 端读取用户和监控窗口数据的接口，路由不再直接解析文件
+2. CSVStorage：默认后端，增量跟随 data/ 下的 CSV 文件，每次请求只解析新追加的行
+3. 通过环境变量 MONITOR_STORAGE 选择后端（csv / sqlite）
+
+接口（各后端实现相同的方法）：
+- users：用户目录（all / get / add / save）
+- attach()：注册共享追加器的刷新监听器，接收监控器新写入的行
+- has_data(student, data_type)：学生是否有该类型的数据
+- fetch_rows(student, data_type, limit=None)：按时间顺序返回数据行（字段值为字符串，与 csv.DictReader 一致）
+- fetch_page(student, data_type, since, until, limit, cursor)：时间范围过滤 + 游标分页，
+  从最新的记录向前翻页，返回 (按时间顺序的数据行, 下一页游标或 None)
+- last_active(student)：学生最后活动时间
+- version(student, data_type)：数据版本标记，数据有变化时随之改变（用于 ETag，不读取数据本身）
+"""
+
+import base64
+import json
+import os
+import re
+from bisect import bisect_left, bisect_right
+
+from monitoring.csv_writer import add_flush_listener
+from storage.last_seen import LastSeenIndex
+from storage.tail import CSVFollower
+from storage.users import UserStore
+
+# 数据类型 -> 时间列
+DATA_TYPES = {
+    'mouse': 'start_time',
+    'keyboard': 'start_time',
+    'emotion': 'timestamp'
+}
+
+DATA_FILE_PATTERN = re.compile(r'^(?P<student>.+)_(?P<data_type>mouse|keyboard|emotion)_performance\.csv$')
+
+
+def data_file_name(student, data_type):
+    return f"{student}_{data_type}_performance.csv"
+
+
+def encode_cursor(position):
+    """把后端内部的分页位置编码为不透明游标"""
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("无效的分页游标")
+    if not isinstance(position, dict):
+        raise ValueError("无效的分页游标")
+    return position
+
+
+def parse_data_file(path):
+    """从数据文件路径解析 (学生, 数据类型)，不是监控数据文件时返回 None"""
+    match = DATA_FILE_PATTERN.match(os.path.basename(path))
+    if not match:
+        return None
+    return match.group('student'), match.group('data_type')
+
+
+class CSVStorage:
+    name = 'csv'
+
+    def __init__(self, data_dir):
+        """
+        :param data_dir: 数据目录
+        """
+        self.data_dir = data_dir
+        self.users = UserStore(os.path.join(data_dir, 'users.json'))
+        self.last_seen_index = LastSeenIndex(os.path.join(data_dir, 'last_seen.json'))
+        self.follower = CSVFollower()
+
+    def attach(self):
+        add_flush_listener(self.last_seen_index.on_flush)
+
+    def data_file(self, student, data_type):
+        return os.path.join(self.data_dir, data_file_name(student, data_type))
+
+    def has_data(self, student, data_type):
+        return data_type in DATA_TYPES and os.path.exists(self.data_file(student, data_type))
+
+    def fetch_rows(self, student, data_type, limit=None):
+        return self.fetch_page(student, data_type, limit=limit)[0]
+
+    def fetch_page(self, student, data_type, since=None, until=None, limit=None, cursor=None):
+        """
+        文件按时间顺序追加，时间范围用二分查找定位；游标为上一页首行在文件中的序号
+        """
+        if data_type not in DATA_TYPES:
+            return [], None
+
+        rows, times = self.follower.indexed_rows(self.data_file(student, data_type), DATA_TYPES[data_type])
+        # 两个列表会随文件追加在原地扩展，先固定本次请求的行数
+        count = len(times)
+        lo = bisect_left(times, since, 0, count) if since else 0
+        hi = bisect_right(times, until, 0, count) if until else count
+        if cursor:
+            position = decode_cursor(cursor)
+            hi = min(hi, int(position.get('i', 0)))
+
+        start = max(lo, hi - limit) if limit else lo
+        next_cursor = encode_cursor({'i': start}) if limit and start > lo else None
+        return rows[start:hi], next_cursor
+
+    def version(self, student, data_type):
+        """文件的 (inode, 修改时间, 大小)，只需一次 stat"""
+        if data_type not in DATA_TYPES:
+            return None
+        try:
+            st = os.stat(self.data_file(student, data_type))
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def last_active(self, student):
+        """鼠标数据优先，其次键盘数据（索引命中时只需 stat，否则从文件尾部读取最后一行）"""
+        for data_type in ('mouse', 'keyboard'):
+            if self.has_data(student, data_type):
+                return self.last_seen_index.last_seen(self.data_file(student, data_type))
+        return None
+
+
+def get_storage(data_dir, backend=None):
+    """
+    创建存储后端
+    :param backend: csv / sqlite，默认读取环境变量 MONITOR_STORAGE（未设置时为 csv）
+    """
+    backend = backend or os.environ.get('MONITOR_STORAGE', 'csv')
+    if backend == 'csv':
+        return CSVStorage(data_dir)
+    if backend == 'sqlite':
+        from storage.sqlite_store import SQLiteStorage
+        return SQLiteStorage(data_dir)
+    raise ValueError(f"未知的存储后端: {backend}")
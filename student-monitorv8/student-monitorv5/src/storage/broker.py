@@ -0,0 +1,107 @@
+"""
+进程内实时事件代理（供 Server-Sent Events 推送使用）
+功能：
+1. 注册为共享追加器的追加监听器，监控器写入一行分析结果后立即发布事件，不等待文件刷新
+2. 每个订阅者一个有界队列，可按学生过滤；队列积压过多时断开该订阅者，由浏览器自动重连
+3. 保留最近的事件，浏览器带 Last-Event-ID 重连时补发断线期间错过的事件
+"""
+
+import json
+import queue
+import threading
+from collections import deque
+
+from storage.backend import parse_data_file
+
+
+class Subscription:
+    """单个订阅者（一个 SSE 连接）"""
+
+    def __init__(self, student=None, max_pending=1000):
+        self.student = student  # None 表示接收所有学生的事件
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.closed = False
+
+    def matches(self, event):
+        return self.student is None or event['data'].get('student') == self.student
+
+    def get(self, timeout=None):
+        """取下一个事件，超时返回 None"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    def __init__(self, history=256, max_pending=1000):
+        """
+        :param history: 保留用于断线补发的事件数
+        :param max_pending: 每个订阅者最多积压的事件数
+        """
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.history = deque(maxlen=history)
+        self.max_pending = max_pending
+        self.last_id = 0
+
+    def subscribe(self, student=None, last_event_id=None):
+        """
+        新建订阅
+        :param student: 只接收该学生的事件
+        :param last_event_id: 浏览器重连时上次收到的事件 id，补发其后的事件
+        """
+        subscription = Subscription(student, self.max_pending)
+        with self.lock:
+            if last_event_id is not None:
+                for event in self.history:
+                    if event['id'] > last_event_id and subscription.matches(event):
+                        self._offer(subscription, event)
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+        subscription.closed = True
+
+    def publish(self, event_type, data):
+        """发布事件，返回事件 id"""
+        with self.lock:
+            self.last_id += 1
+            event = {'id': self.last_id, 'event': event_type, 'data': data}
+            self.history.append(event)
+            for subscription in list(self.subscribers):
+                if subscription.matches(event):
+                    self._offer(subscription, event)
+        return event['id']
+
+    def _offer(self, subscription, event):
+        """投递事件（需在持有锁时调用），积压过多时断开订阅者"""
+        try:
+            subscription.queue.put_nowait(event)
+        except queue.Full:
+            self.subscribers.discard(subscription)
+            subscription.closed = True
+
+    def on_append(self, appender, row):
+        """共享追加器的追加监听器：监控数据文件每写入一行发布一个 window 事件"""
+        parsed = parse_data_file(appender.path)
+        if parsed is None or not appender.header:
+            return
+        student, data_type = parsed
+        self.publish('window', {
+            'student': student,
+            'type': data_type,
+            'row': dict(zip(appender.header, map(str, row)))
+        })
+
+    def __len__(self):
+        with self.lock:
+            return len(self.subscribers)
+
+
+def format_sse(event, data=None):
+    """把事件编码为 SSE 文本帧；data 不为 None 时替换事件数据"""
+    payload = json.dumps(event['data'] if data is None else data, ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {payload}\n\n"
@@ -0,0 +1,105 @@
+"""
+学生最后活动时间索引
+功能：
+1. 记录每个监控数据文件最后一行的时间，以及记录时文件的大小和修改时间
+2. 共享追加器每次刷新后更新对应条目（注册为刷新监听器）
+3. 查询时只需一次 stat：文件未变化直接返回索引值，否则从文件尾部回溯读取最后一行
+4. 索引防抖保存到 data/last_seen.json，重启后无需重新读取文件
+"""
+
+import json
+import logging
+import os
+import threading
+
+from monitoring.scheduler import get_scheduler
+from storage.atomic import write_json_atomic
+from storage.tail import read_last_row
+
+TIME_COLUMNS = ('end_time', 'timestamp')  # 监控数据 / 情绪数据的时间列
+
+
+def row_time(row):
+    """取一行数据的时间字段"""
+    if row:
+        for column in TIME_COLUMNS:
+            if row.get(column):
+                return row[column]
+    return None
+
+
+class LastSeenIndex:
+    def __init__(self, index_file, save_delay=5.0):
+        """
+        :param index_file: 索引持久化文件路径
+        :param save_delay: 更新后延迟保存的秒数（合并多次更新）
+        """
+        self.index_file = index_file
+        self.save_delay = save_delay
+        self.lock = threading.Lock()
+        self.entries = {}  # 数据文件名 -> {'last_seen', 'size', 'mtime_ns'}
+        self.save_job = None
+        self.load()
+
+    def load(self):
+        """加载持久化的索引"""
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except Exception as e:
+            logging.error(f"加载最后活动索引失败: {str(e)}")
+            self.entries = {}
+
+    def save(self):
+        """保存索引"""
+        with self.lock:
+            self.save_job = None
+            entries = dict(self.entries)
+        try:
+            write_json_atomic(self.index_file, entries, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logging.error(f"保存最后活动索引失败: {str(e)}")
+
+    def _update(self, path, last_seen, st):
+        """更新条目并安排保存（需在持有锁时调用）"""
+        self.entries[os.path.basename(path)] = {
+            'last_seen': last_seen,
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns
+        }
+        if self.save_job is None:
+            self.save_job = get_scheduler().call_later(self.save_delay, self.save, name="last-seen-save")
+
+    def on_flush(self, appender, rows):
+        """共享追加器的刷新监听器：用本批最后一行更新索引"""
+        if not appender.header:
+            return
+        last_seen = row_time(dict(zip(appender.header, map(str, rows[-1]))))
+        if last_seen is None:
+            return
+        st = os.stat(appender.path)
+        with self.lock:
+            self._update(appender.path, last_seen, st)
+
+    def last_seen(self, path):
+        """
+        返回数据文件最后一行的时间
+        :return: 时间字符串；文件不存在或没有数据行时返回 None
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        with self.lock:
+            entry = self.entries.get(os.path.basename(path))
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry['last_seen']
+
+        # 文件在索引之外被修改（如独立运行的监控脚本），回溯读取最后一行
+        last_seen = row_time(read_last_row(path))
+        with self.lock:
+            self._update(path, last_seen, st)
+        return last_seen
@@ -0,0 +1,291 @@
+"""
+SQLite 存储后端（WAL 模式）
+功能：
+1. 用户、键盘窗口、鼠标窗口、情绪响应四张表，监控数据按 (student, 时间) 建索引
+2. 监控器仍写 CSV，共享追加器每次刷新后把新行同步插入数据库
+3. Web 端查询走索引：最近 N 条、最后活动时间均不随历史长度增长
+4. 一次性导入已有的 users.json 和 CSV 文件
+
+导入用法（在 src 目录下）：python -m storage.sqlite_store [数据目录] [数据库文件]
+"""
+
+import csv
+import glob
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+
+from monitoring.csv_writer import add_flush_listener
+from storage.backend import DATA_TYPES, decode_cursor, encode_cursor, parse_data_file
+
+# 数据类型 -> (表名, [(列名, 类型), ...])，列与监控器输出的 CSV 表头一致
+TABLES = {
+    'keyboard': ('keyboard_windows', [
+        ('start_time', 'TEXT'), ('end_time', 'TEXT'), ('duration_sec', 'REAL'),
+        ('total_keypresses', 'INTEGER'), ('median_ikd', 'REAL'), ('p95_ikd', 'REAL'),
+        ('mad', 'REAL'), ('auto_correction_rate', 'REAL'), ('space_rate', 'REAL'),
+        ('backspace_count', 'INTEGER'), ('space_count', 'INTEGER')
+    ]),
+    'mouse': ('mouse_windows', [
+        ('start_time', 'TEXT'), ('end_time', 'TEXT'), ('duration_sec', 'REAL'),
+        ('move_entropy', 'REAL'), ('effective_path_ratio', 'REAL'), ('avg_speed', 'REAL'),
+        ('acceleration_variance', 'REAL'), ('total_distance', 'REAL'),
+        ('click_count', 'INTEGER'), ('scroll_count', 'INTEGER')
+    ]),
+    'emotion': ('emotion_responses', [
+        ('timestamp', 'TEXT'), ('emotion', 'TEXT'), ('description', 'TEXT')
+    ])
+}
+
+
+def _text(value):
+    """数据库值转为字符串，与 csv.DictReader 读取的结果一致"""
+    return '' if value is None else str(value)
+
+
+class SQLiteUserStore:
+    """与 UserStore 接口一致的用户目录"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @staticmethod
+    def _info(password, role, extra):
+        info = {'password': password, 'role': role}
+        if extra:
+            info.update(json.loads(extra))
+        return info
+
+    @staticmethod
+    def _row(username, info):
+        extra = {k: v for k, v in info.items() if k not in ('password', 'role')}
+        return (username, info.get('password'), info.get('role', 'student'),
+                json.dumps(extra, ensure_ascii=False) if extra else None)
+
+    def all(self):
+        rows = self.storage.connect().execute('SELECT username, password, role, extra FROM users ORDER BY rowid')
+        return {username: self._info(password, role, extra) for username, password, role, extra in rows}
+
+    def get(self, username):
+        row = self.storage.connect().execute(
+            'SELECT password, role, extra FROM users WHERE username = ?', (username,)
+        ).fetchone()
+        return self._info(*row) if row else None
+
+    def add(self, username, info):
+        """添加新用户，用户名已存在时返回 False"""
+        conn = self.storage.connect()
+        with conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO users (username, password, role, extra) VALUES (?, ?, ?, ?)',
+                self._row(username, info)
+            )
+        return cursor.rowcount == 1
+
+    def save(self, users):
+        """用 users 替换全部用户"""
+        conn = self.storage.connect()
+        with conn:
+            conn.execute('DELETE FROM users')
+            conn.executemany(
+                'INSERT INTO users (username, password, role, extra) VALUES (?, ?, ?, ?)',
+                [self._row(username, info) for username, info in users.items()]
+            )
+
+
+class SQLiteStorage:
+    name = 'sqlite'
+
+    def __init__(self, data_dir, db_file=None):
+        """
+        :param data_dir: 数据目录
+        :param db_file: 数据库文件，默认 data_dir/monitor.db
+        """
+        self.data_dir = data_dir
+        self.db_file = db_file or os.path.join(data_dir, 'monitor.db')
+        self.local = threading.local()  # 每个线程一个连接
+        self.users = SQLiteUserStore(self)
+        self.init_schema()
+
+    def connect(self):
+        """返回当前线程的数据库连接"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_file)), exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    def init_schema(self):
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS users ('
+                'username TEXT PRIMARY KEY, password TEXT, role TEXT, extra TEXT)'
+            )
+            for data_type, (table, columns) in TABLES.items():
+                time_column = DATA_TYPES[data_type]
+                column_defs = ', '.join(f"{name} {sql_type}" for name, sql_type in columns)
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    f"id INTEGER PRIMARY KEY, student TEXT NOT NULL, {column_defs})"
+                )
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_student_time ON {table} (student, {time_column})"
+                )
+
+    def attach(self):
+        add_flush_listener(self.on_flush)
+
+    def on_flush(self, appender, rows):
+        """共享追加器的刷新监听器：把写入 CSV 的新行同步插入数据库"""
+        parsed = parse_data_file(appender.path)
+        if parsed is None or not appender.header:
+            return
+        student, data_type = parsed
+        self.insert_rows(student, data_type, [dict(zip(appender.header, row)) for row in rows])
+
+    def insert_rows(self, student, data_type, rows):
+        """插入数据行（字典，键为 CSV 列名）"""
+        conn = self.connect()
+        with conn:
+            self._insert(conn, student, data_type, rows)
+
+    @staticmethod
+    def _insert(conn, student, data_type, rows):
+        table, columns = TABLES[data_type]
+        names = [name for name, _ in columns]
+        conn.executemany(
+            f"INSERT INTO {table} (student, {', '.join(names)}) VALUES (?{', ?' * len(names)})",
+            [(student, *(row.get(name) for name in names)) for row in rows]
+        )
+
+    def has_data(self, student, data_type):
+        if data_type not in TABLES:
+            return False
+        table = TABLES[data_type][0]
+        row = self.connect().execute(f"SELECT 1 FROM {table} WHERE student = ? LIMIT 1", (student,)).fetchone()
+        return row is not None
+
+    def fetch_rows(self, student, data_type, limit=None):
+        return self.fetch_page(student, data_type, limit=limit)[0]
+
+    def fetch_page(self, student, data_type, since=None, until=None, limit=None, cursor=None):
+        """
+        沿 (student, 时间) 索引从最新记录向前查找；游标为上一页首行的 (时间, id)
+        """
+        if data_type not in TABLES:
+            return [], None
+        table, columns = TABLES[data_type]
+        names = [name for name, _ in columns]
+        time_column = DATA_TYPES[data_type]
+
+        conditions = ['student = ?']
+        params = [student]
+        if since:
+            conditions.append(f"{time_column} >= ?")
+            params.append(since)
+        if until:
+            conditions.append(f"{time_column} <= ?")
+            params.append(until)
+        if cursor:
+            position = decode_cursor(cursor)
+            conditions.append(f"({time_column} < ? OR ({time_column} = ? AND id < ?))")
+            params.extend([position.get('t'), position.get('t'), position.get('id')])
+
+        sql = f"SELECT id, {', '.join(names)} FROM {table} WHERE {' AND '.join(conditions)}"
+        if limit:
+            sql += f" ORDER BY {time_column} DESC, id DESC LIMIT ?"
+            params.append(limit + 1)
+        else:
+            sql += f" ORDER BY {time_column}, id"
+        rows = self.connect().execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit:
+            if len(rows) > limit:
+                rows = rows[:limit]
+                oldest = rows[-1]
+                next_cursor = encode_cursor({'t': oldest[1 + names.index(time_column)], 'id': oldest[0]})
+            rows.reverse()
+
+        return [dict(zip(names, map(_text, row[1:]))) for row in rows], next_cursor
+
+    def version(self, student, data_type):
+        """该学生最新一行的 (时间, id)，沿 (student, 时间) 索引一次查找；重新导入后 id 会变化"""
+        if data_type not in TABLES:
+            return None
+        table = TABLES[data_type][0]
+        time_column = DATA_TYPES[data_type]
+        row = self.connect().execute(
+            f"SELECT {time_column}, id FROM {table} WHERE student = ? ORDER BY {time_column} DESC, id DESC LIMIT 1",
+            (student,)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def last_active(self, student):
+        """鼠标数据优先，其次键盘数据"""
+        conn = self.connect()
+        for data_type in ('mouse', 'keyboard'):
+            table = TABLES[data_type][0]
+            row = conn.execute(
+                f"SELECT end_time FROM {table} WHERE student = ? ORDER BY start_time DESC, id DESC LIMIT 1",
+                (student,)
+            ).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def import_csv(self, data_dir=None):
+        """
+        一次性导入已有的 users.json 和监控数据 CSV（同一学生同一类型的旧记录会被替换，可重复执行）
+        :return: {数据类型: 导入行数}
+        """
+        data_dir = data_dir or self.data_dir
+        conn = self.connect()
+        counts = {'users': 0}
+
+        users_file = os.path.join(data_dir, 'users.json')
+        if os.path.exists(users_file):
+            with open(users_file, 'r', encoding='utf-8') as f:
+                users = json.load(f)
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO users (username, password, role, extra) VALUES (?, ?, ?, ?)',
+                    [SQLiteUserStore._row(username, info) for username, info in users.items()]
+                )
+            counts['users'] = len(users)
+
+        for path in sorted(glob.glob(os.path.join(data_dir, '*_performance.csv'))):
+            parsed = parse_data_file(path)
+            if parsed is None:
+                continue
+            student, data_type = parsed
+            with open(path, 'r', newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+
+            with conn:
+                conn.execute(f"DELETE FROM {TABLES[data_type][0]} WHERE student = ?", (student,))
+                self._insert(conn, student, data_type, rows)
+            counts[data_type] = counts.get(data_type, 0) + len(rows)
+            logging.info(f"已导入 {path}: {len(rows)} 行")
+
+        return counts
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(src_dir), 'data')
+    db_file = sys.argv[2] if len(sys.argv) > 2 else None
+
+    storage = SQLiteStorage(data_dir, db_file)
+    counts = storage.import_csv()
+    print(f"导入完成: {storage.db_file}")
+    for name, count in counts.items():
+        print(f"- {name}: {count}")
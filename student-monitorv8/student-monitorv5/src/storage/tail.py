@@ -0,0 +1,155 @@
+"""
+CSV 文件尾部读取
+功能：
+1. 从文件末尾向前按块回溯，取最后一条完整的行，读取量与文件长度无关
+2. 忽略末尾尚未写完的半行和空行
+3. 结合首行表头返回字典形式的最后一行
+4. CSVFollower：按文件缓存已解析的字节位置和数据行，只解析新追加的行；
+   可同时维护某一列的值列表，供按时间列二分查找（不依赖 Python 3.10 的 bisect key 参数）
+
+注意：假设字段内不含换行符（监控器输出的 CSV 均满足）
+"""
+
+import csv
+import io
+import os
+import threading
+
+
+def read_last_line(f, chunk_size=4096):
+    """
+    返回二进制文件对象 f 中最后一条完整的非空行
+    :return: (行内容（不含换行符）, 是否为文件首行)，文件中没有完整行时返回 (None, False)
+    """
+    f.seek(0, os.SEEK_END)
+    pos = f.tell()
+    buf = b''
+
+    while True:
+        lines = buf.split(b'\n')
+        lines.pop()  # 最后一个换行之后的内容尚未写完（文件以换行结尾时为空串）
+        for i in range(len(lines) - 1, -1, -1):
+            if lines[i].strip():
+                # 行首之前必须能看到换行符或文件开头，才能确认是完整的一行
+                if i > 0 or pos == 0:
+                    return lines[i].rstrip(b'\r'), pos == 0 and i == 0
+                break
+
+        if pos == 0:
+            return None, False
+
+        step = min(chunk_size, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+
+
+def read_last_row(path, encoding='utf-8', chunk_size=4096):
+    """
+    读取 CSV 文件的表头和最后一条数据行
+    :return: 以表头为键的字典；文件不存在或只有表头时返回 None
+    """
+    try:
+        with open(path, 'rb') as f:
+            header_line = f.readline()
+            if not header_line.endswith(b'\n'):
+                return None
+
+            line, is_header = read_last_line(f, chunk_size)
+            if line is None or is_header:
+                return None
+    except FileNotFoundError:
+        return None
+
+    header = next(csv.reader([header_line.decode(encoding).rstrip('\r\n')]))
+    values = next(csv.reader([line.decode(encoding)]))
+    return dict(zip(header, values))
+
+
+class _FollowedFile:
+    """单个文件的增量读取状态"""
+
+    def __init__(self, st):
+        self.inode = (st.st_dev, st.st_ino)
+        self.offset = 0  # 已解析到的字节位置（总在行尾）
+        self.header = None
+        self.rows = []
+        self.columns = {}  # 列名 -> 与 rows 一一对应的该列值列表（缺失为空串）
+
+
+class CSVFollower:
+    """
+    增量跟随 CSV 文件：记住每个文件已解析的字节位置和数据行，
+    再次读取时只解析新追加的完整行；文件被截断或替换（inode 变化）时重新读取
+    """
+
+    def __init__(self, encoding='utf-8'):
+        self.encoding = encoding
+        self.lock = threading.Lock()
+        self.files = {}  # 路径 -> _FollowedFile
+
+    def rows(self, path):
+        """
+        返回文件的全部数据行（以表头为键的字典，与 csv.DictReader 一致）
+        返回的列表只读，文件追加时会在原列表上扩展
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.files.pop(path, None)
+            return []
+
+        with self.lock:
+            return self._follow(path, st).rows
+
+    def indexed_rows(self, path, column):
+        """
+        返回 (全部数据行, 该列的值列表)，两个列表一一对应，随文件追加增量扩展
+        :param column: 列名（如时间列），值缺失时为空串
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.files.pop(path, None)
+            return [], []
+
+        with self.lock:
+            state = self._follow(path, st)
+            values = state.columns.get(column)
+            if values is None:
+                values = state.columns[column] = [row.get(column) or '' for row in state.rows]
+            return state.rows, values
+
+    def _follow(self, path, st):
+        """返回文件的读取状态，先读取新追加的行（需在持有锁时调用）"""
+        state = self.files.get(path)
+        if state is None or state.inode != (st.st_dev, st.st_ino) or st.st_size < state.offset:
+            state = self.files[path] = _FollowedFile(st)
+
+        if st.st_size > state.offset:
+            self._read_new_lines(path, state)
+        return state
+
+    def _read_new_lines(self, path, state):
+        """从上次的位置读取新追加的完整行（需在持有锁时调用）"""
+        with open(path, 'rb') as f:
+            f.seek(state.offset)
+            data = f.read()
+
+        # 只解析到最后一个换行符，未写完的半行留到下次
+        end = data.rfind(b'\n') + 1
+        if not end:
+            return
+        state.offset += end
+
+        reader = csv.reader(io.StringIO(data[:end].decode(self.encoding), newline=''))
+        if state.header is None:
+            state.header = next(reader, None)
+        header = state.header
+        start = len(state.rows)
+        state.rows.extend(dict(zip(header, values)) for values in reader if values)
+        new_rows = state.rows[start:]
+        for column, values in state.columns.items():
+            values.extend(row.get(column) or '' for row in new_rows)
@@ -0,0 +1,90 @@
+"""
+用户目录缓存
+功能：
+1. 进程内缓存 users.json 的解析结果，仅在文件的修改时间或大小变化时重新加载
+2. 保存时先写临时文件再原子替换，读取方不会看到写了一半的文件
+3. 写入采用写时复制：已返回的快照不会被后续修改影响
+"""
+
+import json
+import logging
+import os
+import threading
+
+from storage.atomic import write_json_atomic
+
+
+class UserStore:
+    def __init__(self, path):
+        """
+        :param path: 用户数据文件路径
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.users = {}
+        self.signature = None  # 已加载文件的 (mtime_ns, size)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _refresh(self):
+        """文件变化时重新加载（需在持有锁时调用）"""
+        signature = self._stat()
+        if signature == self.signature:
+            return
+
+        if signature is None:
+            self.users = {}
+            self.signature = None
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.users = json.load(f)
+            self.signature = signature
+        except Exception as e:
+            # 不记录签名，下次调用时重试
+            logging.error(f"加载用户数据失败: {str(e)}")
+            self.users = {}
+
+    def all(self):
+        """返回全部用户的只读快照：用户名 -> 用户信息"""
+        with self.lock:
+            self._refresh()
+            return self.users
+
+    def get(self, username):
+        """返回单个用户信息，不存在时返回 None"""
+        with self.lock:
+            self._refresh()
+            return self.users.get(username)
+
+    def save(self, users):
+        """原子写入全部用户数据并更新缓存"""
+        users = dict(users)
+        with self.lock:
+            self._write(users)
+
+    def add(self, username, info):
+        """
+        添加新用户（检查与写入在同一把锁内完成）
+        :return: 用户名已存在时返回 False
+        """
+        with self.lock:
+            self._refresh()
+            if username in self.users:
+                return False
+            users = dict(self.users)
+            users[username] = info
+            self._write(users)
+            return True
+
+    def _write(self, users):
+        """写入文件并更新缓存（需在持有锁时调用）"""
+        write_json_atomic(self.path, users, ensure_ascii=False, indent=2)
+        self.users = users
+        self.signature = self._stat()
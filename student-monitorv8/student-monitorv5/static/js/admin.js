@@ -1,80 +1,191 @@
-function viewStudentData(student) {
-    document.getElementById('selected-student').textContent = student;
-    document.getElementById('student-details').style.display = 'block';
-
-    // 加载所有类型的数据
-    loadStudentData(student, 'mouse');
-    loadStudentData(student, 'keyboard');
-    loadStudentData(student, 'emotion');
-}
-
-function loadStudentData(student, dataType) {
-    fetch(`/api/student_monitoring_data?student=${student}&type=${dataType}`)
-    .then(response => response.json())
-    .then(data => {
-        const tbody = document.getElementById(`${dataType}-data-body`);
-        tbody.innerHTML = '';
-
-        if (data.data && data.data.length > 0) {
-            data.data.forEach(item => {
-                const row = document.createElement('tr');
-
-                if (dataType === 'mouse') {
-                    row.innerHTML = `
-                        <td>${item.time}</td>
-                        <td>${item.action}</td>
-                        <td>${item.position}</td>
-                        <td>${item.duration}</td>
-                        <td>${item.clicks}</td>
-                    `;
-                } else if (dataType === 'keyboard') {
-                    row.innerHTML = `
-                        <td>${item.time}</td>
-                        <td>${item.key}</td>
-                        <td>${item.duration}</td>
-                        <td>${item.backspace_rate}</td>
-                    `;
-                } else if (dataType === 'emotion') {
-                    row.innerHTML = `
-                        <td>${item.time}</td>
-                        <td>${item.emotion}</td>
-                        <td>${item.description}</td>
-                    `;
-                }
-
-                tbody.appendChild(row);
-            });
-        } else {
-            tbody.innerHTML = '<tr><td colspan="5">暂无数据</td></tr>';
-        }
-    })
-    .catch(error => {
-        console.error('Error loading data:', error);
-        document.getElementById(`${dataType}-data-body`).innerHTML =
-            '<tr><td colspan="5">加载数据时发生错误</td></tr>';
-    });
-}
-
-function showTab(tabName) {
-    // 隐藏所有标签内容
-    document.querySelectorAll('.tab-content').forEach(tab => {
-        tab.style.display = 'none';
-    });
-
-    // 移除所有标签的活动状态
-    document.querySelectorAll('.tab-btn').forEach(btn => {
-        btn.classList.remove('active');
-    });
-
-    // 显示选中的标签内容
-    document.getElementById(`${tabName}-data`).style.display = 'block';
-
-    // 设置选中的标签为活动状态
-    event.target.classList.add('active');
-
-    // 如果已选择学生，则重新加载数据
-    const selectedStudent = document.getElementById('selected-student').textContent;
-    if (selectedStudent) {
-        loadStudentData(selectedStudent, tabName);
-    }
+function viewStudentData(student) {
+    document.getElementById('selected-student').textContent = student;
+    document.getElementById('student-details').style.display = 'block';
+
+    // 加载所有类型的数据
+    loadStudentData(student, 'mouse');
+    loadStudentData(student, 'keyboard');
+    loadStudentData(student, 'emotion');
+
+    // 订阅该学生的实时推送，新记录插入到表格顶部
+    subscribeStudentStream(student);
+}
+
+let studentStream = null;
+
+function subscribeStudentStream(student) {
+    if (studentStream) {
+        studentStream.close();
+        studentStream = null;
+    }
+    if (!window.EventSource) {
+        return;
+    }
+
+    studentStream = new EventSource(`/api/stream?student=${encodeURIComponent(student)}`);
+    studentStream.addEventListener('window', event => {
+        const message = JSON.parse(event.data);
+        const tbody = document.getElementById(`${message.type}-data-body`);
+        if (!tbody || !message.item || message.student !== student) {
+            return;
+        }
+
+        tbody.querySelectorAll('tr.empty').forEach(row => row.remove());
+        tbody.insertBefore(createDataRow(message.type, message.item), tbody.firstChild);
+    });
+}
+
+// 每页加载的记录数，滚动到表格底部时加载更早的一页
+const PAGE_SIZE = 50;
+// 各数据类型的分页状态：学生、下一页游标、是否正在加载、是否已加载完
+const pageState = {};
+let pageObserver = null;
+
+function loadStudentData(student, dataType) {
+    pageState[dataType] = {student: student, cursor: null, loading: false, done: false};
+    const tbody = document.getElementById(`${dataType}-data-body`);
+    removeLoadMoreRow(tbody);
+    tbody.innerHTML = '';
+    loadNextPage(dataType);
+}
+
+function loadNextPage(dataType) {
+    const state = pageState[dataType];
+    if (!state || state.loading || state.done) {
+        return;
+    }
+    state.loading = true;
+
+    let url = `/api/student_monitoring_data?student=${encodeURIComponent(state.student)}&type=${dataType}&limit=${PAGE_SIZE}`;
+    if (state.cursor) {
+        url += `&cursor=${encodeURIComponent(state.cursor)}`;
+    }
+
+    fetch(url)
+    .then(response => response.json())
+    .then(data => {
+        // 加载期间已切换学生或重新加载，丢弃旧结果
+        if (pageState[dataType] !== state) {
+            return;
+        }
+        if (data.error) {
+            throw new Error(data.error);
+        }
+
+        const tbody = document.getElementById(`${dataType}-data-body`);
+        removeLoadMoreRow(tbody);
+
+        const items = data.data || [];
+        if (!state.cursor && items.length === 0) {
+            tbody.innerHTML = '<tr class="empty"><td colspan="5">暂无数据</td></tr>';
+            state.done = true;
+            state.loading = false;
+            return;
+        }
+
+        // 每页按时间顺序返回，表格中最新的记录在前
+        items.reverse().forEach(item => {
+            tbody.appendChild(createDataRow(dataType, item));
+        });
+
+        state.cursor = data.next_cursor;
+        state.done = !data.next_cursor;
+        state.loading = false;
+        if (!state.done) {
+            appendLoadMoreRow(tbody, dataType);
+        }
+    })
+    .catch(error => {
+        console.error('Error loading data:', error);
+        state.loading = false;
+        if (pageState[dataType] === state && !state.cursor) {
+            document.getElementById(`${dataType}-data-body`).innerHTML =
+                '<tr><td colspan="5">加载数据时发生错误</td></tr>';
+        }
+    });
+}
+
+function createDataRow(dataType, item) {
+    const row = document.createElement('tr');
+
+    if (dataType === 'mouse') {
+        row.innerHTML = `
+            <td>${item.time}</td>
+            <td>${item.action}</td>
+            <td>${item.position}</td>
+            <td>${item.duration}</td>
+            <td>${item.clicks}</td>
+        `;
+    } else if (dataType === 'keyboard') {
+        row.innerHTML = `
+            <td>${item.time}</td>
+            <td>${item.key}</td>
+            <td>${item.duration}</td>
+            <td>${item.backspace_rate}</td>
+        `;
+    } else if (dataType === 'emotion') {
+        row.innerHTML = `
+            <td>${item.time}</td>
+            <td>${item.emotion}</td>
+            <td>${item.description}</td>
+        `;
+    }
+
+    return row;
+}
+
+function appendLoadMoreRow(tbody, dataType) {
+    const row = document.createElement('tr');
+    row.className = 'load-more';
+    row.dataset.type = dataType;
+    row.innerHTML = '<td colspan="5">加载更多...</td>';
+    row.addEventListener('click', () => loadNextPage(dataType));
+    tbody.appendChild(row);
+
+    // 提示行滚动进入视野时自动加载下一页
+    if ('IntersectionObserver' in window) {
+        if (!pageObserver) {
+            pageObserver = new IntersectionObserver(entries => {
+                entries.forEach(entry => {
+                    if (entry.isIntersecting) {
+                        loadNextPage(entry.target.dataset.type);
+                    }
+                });
+            });
+        }
+        pageObserver.observe(row);
+    }
+}
+
+function removeLoadMoreRow(tbody) {
+    tbody.querySelectorAll('tr.load-more').forEach(row => {
+        if (pageObserver) {
+            pageObserver.unobserve(row);
+        }
+        row.remove();
+    });
+}
+
+function showTab(tabName) {
+    // 隐藏所有标签内容
+    document.querySelectorAll('.tab-content').forEach(tab => {
+        tab.style.display = 'none';
+    });
+
+    // 移除所有标签的活动状态
+    document.querySelectorAll('.tab-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+
+    // 显示选中的标签内容
+    document.getElementById(`${tabName}-data`).style.display = 'block';
+
+    // 设置选中的标签为活动状态
+    event.target.classList.add('active');
+
+    // 如果已选择学生，则重新加载数据
+    const selectedStudent = document.getElementById('selected-student').textContent;
+    if (selectedStudent) {
+        loadStudentData(selectedStudent, tabName);
+    }
 }
\ No newline at end of file